@@ -5,6 +5,7 @@ from django.http import HttpResponse
 from django.shortcuts import redirect, render
 
 from cosmetics_shop.models import Favorite
+from cosmetics_shop.services.favorite_service import remove_favorite
 from utils.custom_types import AuthenticatedRequest
 from utils.helper_function import get_paginator_page
 
@@ -34,5 +35,5 @@ def remove_from_favorites(
     logger.info(
         f"Remove from favorites: user_id={request.user.id}, product_id={product_id}"
     )
-    Favorite.objects.filter(user=request.user, product_id=product_id).delete()
+    remove_favorite(request.user, product_id)
     return redirect("favorites")
@@ -1,6 +1,8 @@
 import django_filters
+from rest_framework.filters import OrderingFilter, SearchFilter
 
 from cosmetics_shop.models import Product
+from cosmetics_shop.services.search_service import get_search_backend
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -18,3 +20,20 @@ class ProductFilter(django_filters.FilterSet):
     class Meta:
         model = Product
         fields = ["brand", "group", "category"]
+
+
+class ProductSearchFilter(SearchFilter):
+    """SearchFilter that delegates to the product search backend"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = " ".join(self.get_search_terms(request))
+        if not query:
+            return queryset
+
+        backend = get_search_backend()
+        queryset = backend.search(queryset, query)
+
+        if not request.query_params.get(OrderingFilter.ordering_param):
+            queryset = backend.rank(queryset, query)
+
+        return queryset
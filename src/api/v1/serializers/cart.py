@@ -19,3 +19,15 @@ class CartItemSerializer(serializers.ModelSerializer):
             "price",
             "quantity",
         ]
+
+
+class CartLineSerializer(serializers.Serializer):
+    """Same fields as CartItemSerializer, read from a CartSummary line"""
+
+    id = serializers.IntegerField(source="item_id", read_only=True)
+    name = serializers.CharField(source="product.name", read_only=True)
+    code = serializers.CharField(source="product.code", read_only=True)
+    price = serializers.DecimalField(
+        source="product.price", max_digits=10, decimal_places=2, read_only=True
+    )
+    quantity = serializers.IntegerField(read_only=True)
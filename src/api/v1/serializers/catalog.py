@@ -41,6 +41,7 @@ class ProductShortListSerializer(serializers.ModelSerializer):
 class ProductListSerializer(serializers.ModelSerializer):
     brand = BrandSerializer()
     group = GroupSerializer()
+    is_favorite = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -53,8 +54,12 @@ class ProductListSerializer(serializers.ModelSerializer):
             "brand",
             "group",
             "is_active",
+            "is_favorite",
         ]
 
+    def get_is_favorite(self, obj) -> bool:
+        return obj.pk in self.context.get("favorite_ids", ())
+
 
 class ProductDetailSerializer(ProductListSerializer):
     group = GroupSerializer(read_only=True)
@@ -77,5 +82,6 @@ class ProductWriteSerializer(serializers.ModelSerializer):
             "description",
             "stock",
             "tags",
+            "image",
             "is_active",
         ]
@@ -6,6 +6,7 @@ from cosmetics_shop.tests.conftest import (  # noqa
     cart,
     cart_with_one_item,
     category,
+    clear_cache,
     client_obj,
     group,
     order_factory,
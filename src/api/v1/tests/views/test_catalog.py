@@ -20,6 +20,22 @@ def test_product_detail(product, api_client):
     assert response.data["id"] == product.id
 
 
+@pytest.mark.django_db
+def test_product_list_marks_favorites(product, user, api_client):
+    api_client.force_authenticate(user=user)
+    url = reverse("favorite-list")
+    api_client.post(url, {"product_id": product.id})
+
+    response = api_client.get(reverse("products-list"))
+
+    assert [item["is_favorite"] for item in response.data] == [True]
+
+    api_client.delete(reverse("favorite-detail", kwargs={"product_id": product.id}))
+    response = api_client.get(reverse("products-list"))
+
+    assert [item["is_favorite"] for item in response.data] == [False]
+
+
 @pytest.mark.django_db
 def test_product_soft_delete(admin_client, product):
     url = reverse("products-soft-delete", kwargs={"pk": product.id})
@@ -28,3 +44,14 @@ def test_product_soft_delete(admin_client, product):
     assert response.status_code == 200
     product.refresh_from_db()
     assert not product.is_active
+
+
+@pytest.mark.django_db
+def test_product_search(product, api_client):
+    url = reverse("products-list")
+
+    response = api_client.get(url, {"search": "description"})
+    assert [item["id"] for item in response.data] == [product.id]
+
+    response = api_client.get(url, {"search": "missing"})
+    assert response.data == []
@@ -50,6 +50,7 @@ def test_order_create_empty_cart(cart, api_client, client_obj):
 def test_create_order_cash_success(api_client, cart_with_one_item, client_obj, mocker):
     mock_clear = mocker.patch("api.v1.views.orders.clear_cart_after_order")
     mock_create_service = mocker.patch("api.v1.views.orders.create_order_from_cart")
+    mocker.patch("api.v1.views.orders.commit_reservations")
 
     mock_order = mock_create_service.return_value
     mock_order.id = 123
@@ -77,3 +78,44 @@ def test_create_order_cash_success(api_client, cart_with_one_item, client_obj, m
 
     # Check that the recycle bin has been emptied
     mock_clear.assert_called_once_with(cart_with_one_item)
+
+
+@pytest.mark.django_db
+def test_create_order_idempotency_key_replays(
+    api_client, cart_with_one_item, client_obj, mocker
+):
+    mocker.patch("api.v1.views.orders.clear_cart_after_order")
+    mocker.patch("api.v1.views.orders.commit_reservations")
+    mock_create_service = mocker.patch("api.v1.views.orders.create_order_from_cart")
+
+    mock_order = mock_create_service.return_value
+    mock_order.id = 123
+    mock_order.total_price = 1000
+    mock_order.get_status_display.return_value = "Новый"
+
+    api_client.force_authenticate(user=client_obj.user)
+    data = {
+        "payment_method": "cash",
+        "client_data": {
+            "first_name": "Test_first_name",
+            "last_name": "Test_last_name",
+            "phone": "0974539274",
+            "email": "test@example.com",
+        },
+        "address_data": {"city": "City", "post_office": "11"},
+    }
+    url = reverse("orders-list")
+
+    first = api_client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+    second = api_client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+
+    assert first.status_code == second.status_code == status.HTTP_201_CREATED
+    assert second.data == first.data
+    assert second["Idempotent-Replayed"] == "true"
+    mock_create_service.assert_called_once()
+
+    data["payment_method"] = "card"
+    reused = api_client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+
+    assert reused.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_create_service.assert_called_once()
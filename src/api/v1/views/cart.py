@@ -5,32 +5,31 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
-from api.v1.serializers.cart import CartItemSerializer
-from cosmetics_shop.models import CartItem
+from api.v1.serializers.cart import CartLineSerializer
 from cosmetics_shop.services.cart_services import (
     add_product_to_cart,
+    delete_cart,
     delete_product_from_cart,
-    get_cart_total_price,
     remove_product_from_cart,
 )
-from cosmetics_shop.utils.cart_utils import get_cart, get_or_create_cart
+from cosmetics_shop.utils.cart_utils import (
+    get_cart,
+    get_cart_summary,
+    get_or_create_cart,
+)
 
 
 class CartViewSet(ViewSet):
     permission_classes = [AllowAny]
 
     def list(self, request):
-        cart = get_cart(request)
-
-        if not cart:
+        if not get_cart(request):
             return Response({"items": [], "total_price": 0})
 
-        items = CartItem.objects.select_related("product").filter(cart=cart)
-        serializer = CartItemSerializer(items, many=True)
+        summary = get_cart_summary(request)
+        serializer = CartLineSerializer(summary.lines, many=True)
 
-        return Response(
-            {"items": serializer.data, "total_price": get_cart_total_price(items)}
-        )
+        return Response({"items": serializer.data, "total_price": summary.total_price})
 
     @extend_schema(
         summary="Add product in cart",
@@ -126,6 +125,6 @@ class CartViewSet(ViewSet):
         if not cart:
             return Response({"status": "empty"})
 
-        cart.cart_items.all().delete()
+        delete_cart(cart)
 
         return Response({"status": "cleared"})
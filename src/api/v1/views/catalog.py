@@ -1,14 +1,13 @@
-from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, inline_serializer
 from rest_framework import serializers
 from rest_framework.decorators import action
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from api.v1.filters import ProductFilter
+from api.v1.filters import ProductFilter, ProductSearchFilter
 from api.v1.permissions import ProductPermission
 from api.v1.serializers.catalog import (
     BrandSerializer,
@@ -18,14 +17,16 @@ from api.v1.serializers.catalog import (
     ProductListSerializer,
     ProductWriteSerializer,
 )
-from cosmetics_shop.models import Brand, Category, Favorite, GroupProduct, Product
+from cosmetics_shop.models import Brand, Category, GroupProduct, Product
+from cosmetics_shop.services.favorite_service import get_favorite_ids
+from cosmetics_shop.services.image_service import schedule_image_processing
 
 
 class ProductViewSet(ModelViewSet):
     queryset = Product.objects.for_catalog()
     permission_classes = [ProductPermission]
 
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     filterset_class = ProductFilter
     search_fields = ["name", "description"]
     ordering_fields = ["price", "created_at", "stock"]
@@ -37,15 +38,24 @@ class ProductViewSet(ModelViewSet):
             return ProductDetailSerializer
         return ProductWriteSerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["favorite_ids"] = get_favorite_ids(self.request.user)
+        return context
+
+    def perform_create(self, serializer):
+        product = serializer.save()
+        if "image" in serializer.validated_data:
+            schedule_image_processing(product)
+
+    def perform_update(self, serializer):
+        product = serializer.save()
+        if "image" in serializer.validated_data:
+            schedule_image_processing(product)
+
     def get_queryset(self):
         qs = super().get_queryset()
 
-        if self.request.user.is_authenticated:
-            favorites_subquery = Favorite.objects.filter(
-                user=self.request.user, product_id=OuterRef("pk")
-            )
-            qs = qs.annotate(is_favorite=Exists(favorites_subquery))
-
         if not self.request.user.is_staff:
             qs = qs.filter(is_active=True)
 
@@ -12,9 +12,21 @@ from api.v1.serializers.orders import OrderCreateSerializer, OrderSerializer
 from cosmetics_shop.models import Order, Payment, Status
 from cosmetics_shop.payments.mono import init_payment
 from cosmetics_shop.services.cart_services import clear_cart_after_order
+from cosmetics_shop.services.idempotency_service import (
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    IdempotentResponse,
+    get_idempotency_scope,
+    request_fingerprint,
+    run_idempotent,
+)
 from cosmetics_shop.services.order_service import create_order_from_cart
-from cosmetics_shop.utils.cart_utils import get_cart
-from utils.custom_exceptions import OutOfStockError
+from cosmetics_shop.services.reservation_service import commit_reservations
+from cosmetics_shop.utils.cart_utils import get_cart, persist_session_cart
+from utils.custom_exceptions import (
+    IdempotencyInProgress,
+    IdempotencyKeyMismatch,
+    OutOfStockError,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -45,9 +57,42 @@ class OrderViewSet(ModelViewSet):
         return super().get_throttles()
 
     def create(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return self._create_order(request)
+
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {"detail": "Слишком длинный Idempotency-Key"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def create_order():
+            response = self._create_order(request)
+            return IdempotentResponse(response.status_code, response.data)
+
+        try:
+            stored, replayed = run_idempotent(
+                scope=get_idempotency_scope(request),
+                key=key,
+                fingerprint=request_fingerprint(request.data),
+                func=create_order,
+            )
+        except IdempotencyKeyMismatch as e:
+            return Response(
+                {"detail": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        except IdempotencyInProgress as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+
+        headers = {"Idempotent-Replayed": "true"} if replayed else None
+        return Response(stored.data, status=stored.status, headers=headers)
+
+    def _create_order(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        persist_session_cart(request)
         cart = get_cart(request)
 
         if not cart:
@@ -92,6 +137,7 @@ class OrderViewSet(ModelViewSet):
         if payment_method == "card":
             response_data.update(self._handle_card_payment(order, request))
         else:
+            commit_reservations(order)
             clear_cart_after_order(cart)
             response_data["message"] = "Заказ принят (оплата при получении)"
 
@@ -2,6 +2,10 @@ from rest_framework import generics, mixins, viewsets
 from rest_framework.permissions import IsAuthenticated
 
 from cosmetics_shop.models import Client, Favorite, Order
+from cosmetics_shop.services.favorite_service import (
+    refresh_favorite_ids,
+    remove_favorite,
+)
 
 from ..serializers.orders import OrderSerializer
 from ..serializers.profile import FavoriteSerializer
@@ -28,6 +32,10 @@ class FavoriteViewSet(
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        refresh_favorite_ids(self.request.user)
+
+    def perform_destroy(self, instance):
+        remove_favorite(self.request.user, instance.product_id)
 
 
 class OrderHistoryListAPIView(generics.ListAPIView):
@@ -198,6 +198,19 @@ DEFAULT_FROM_EMAIL = "Cosmetics Shop <noreply@gmail.com>"
 
 PRODUCTS_PER_PAGE = 20
 
+# Where anonymous carts live until checkout or login:
+# "redis" (hash per cart), "cache" (any Django cache) or None (database)
+CART_SESSION_STORE = "redis"
+
+# Anonymous carts without a live session are deleted once older than this
+CART_ABANDONED_AFTER_DAYS = 30
+# Rows per delete statement and seconds per run of the cleanup task
+CART_CLEANUP_BATCH_SIZE = 500
+CART_CLEANUP_TIME_BUDGET = 60
+# Orders claimed per transaction and seconds per run of the expiry task
+ORDER_EXPIRY_BATCH_SIZE = 200
+ORDER_EXPIRY_TIME_BUDGET = 5 * 60
+
 
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:8080",
@@ -242,6 +255,10 @@ CELERY_BEAT_SCHEDULE = {
         "task": "cosmetics_shop.tasks.cleanup_expired_orders",
         "schedule": crontab(minute="*/15"),  # каждые 15 минут
     },
+    "cleanup-abandoned-carts-every-night": {
+        "task": "cosmetics_shop.tasks.cleanup_abandoned_carts",
+        "schedule": crontab(minute=30, hour=3),  # 03:30
+    },
 }
 CELERY_TIMEZONE = "Europe/Kiev"
 CELERY_ENABLE_UTC = True
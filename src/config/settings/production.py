@@ -4,6 +4,8 @@ from .base import *
 
 DEBUG = False
 
+INSTALLED_APPS += ["django.contrib.postgres"]
+
 _hosts = os.getenv("ALLOWED_HOSTS", "")
 ALLOWED_HOSTS = _hosts.split(",") if _hosts else []
 
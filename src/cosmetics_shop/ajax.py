@@ -1,17 +1,18 @@
 import logging
-from decimal import Decimal
 
-from django.db.models import F, Sum
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.http import require_POST
 
-from cosmetics_shop.models import Favorite, Product
+from cosmetics_shop.models import Product
 from cosmetics_shop.services.cart_services import (
     add_product_to_cart,
     remove_product_from_cart,
 )
-from cosmetics_shop.utils.cart_utils import get_or_create_cart
+from cosmetics_shop.services.favorite_service import (
+    toggle_favorite as toggle_favorite_product,
+)
+from cosmetics_shop.utils.cart_utils import get_cart_summary, get_or_create_cart
 
 logger = logging.getLogger(__name__)
 
@@ -30,22 +31,7 @@ def toggle_favorite(request: HttpRequest) -> HttpResponse:
     product = get_object_or_404(Product, id=product_id)
     message = None
     if request.user.is_authenticated:
-        favorite = Favorite.objects.filter(user=request.user, product=product)
-
-        if favorite.exists():
-            favorite.delete()
-            logger.info(
-                f"Removed from favorites: user_id={request.user.id},"
-                f" product_id={product_id}"
-            )
-            in_favorites = False
-        else:
-            Favorite.objects.get_or_create(user=request.user, product=product)
-            logger.info(
-                f"Added to favorites: user_id={request.user.id},"
-                f" product_id={product_id}"
-            )
-            in_favorites = True
+        in_favorites = toggle_favorite_product(request.user, product)
     else:
         logger.warning("Anonymous user tried to add favorite")
         message = {
@@ -71,7 +57,7 @@ def add_to_cart(request: HttpRequest) -> HttpResponse:
         logger.info(
             f"Product added to cart: cart_id={cart.id}, product_code={product_code}"
         )
-        return get_cart_status_response(cart, product_code)
+        return get_cart_status_response(request, product_code)
 
     except Product.DoesNotExist:
         logger.warning(f"Product not found: product_code={product_code}")
@@ -96,7 +82,7 @@ def cart_remove(request: HttpRequest) -> HttpResponse:
         logger.info(
             f"Product removed from cart: cart_id={cart.id}, product_code={product_code}"
         )
-        return get_cart_status_response(cart, product_code)
+        return get_cart_status_response(request, product_code)
 
     except Exception as e:
         logger.exception(
@@ -105,32 +91,22 @@ def cart_remove(request: HttpRequest) -> HttpResponse:
         return JsonResponse({"success": False, "error": str(e)}, status=500)
 
 
-def get_cart_status_response(cart, product_code):
-    cart_items = cart.cart_items.select_related("product")
-
-    total_count = cart_items.aggregate(total=Sum("quantity"))["total"] or 0
-
-    total_price = cart_items.aggregate(total=Sum(F("quantity") * F("product__price")))[
-        "total"
-    ] or Decimal("0.00")
-
-    current_item = cart_items.filter(product__code=product_code).first()
-
-    product_qty = current_item.quantity if current_item else 0
-    product_price = current_item.product.price if current_item else 0
+def get_cart_status_response(request, product_code):
+    summary = get_cart_summary(request, refresh=True)
+    current_item = summary.get_line(product_code)
 
     data = {
         "success": True,
-        "count": total_count,
-        "product_count": product_qty,
-        "product_total_price": product_qty * product_price,
-        "total_price": float(total_price),
+        "count": summary.count,
+        "product_count": current_item.quantity if current_item else 0,
+        "product_total_price": current_item.subtotal if current_item else 0,
+        "total_price": float(summary.total_price),
         "product_code": product_code,
         "message": None,
-        "is_max_quantity": current_item.product.stock == product_qty,
+        "is_max_quantity": bool(current_item) and current_item.is_max_quantity,
     }
 
-    if current_item and current_item.quantity == current_item.product.stock:
+    if current_item and current_item.is_max_quantity:
         data["message"] = {"level": "error", "text": "Это последний товар"}
 
     return JsonResponse(data)
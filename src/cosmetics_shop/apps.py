@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CosmeticsShopConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "cosmetics_shop"
+
+    def ready(self):
+        from cosmetics_shop import signals  # noqa: F401
+        from cosmetics_shop.services.search_service import create_search_index
+        from cosmetics_shop.utils import cart_utils  # noqa: F401
+
+        post_migrate.connect(create_search_index, sender=self)
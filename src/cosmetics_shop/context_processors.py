@@ -1,62 +1,92 @@
 import logging
 
 from django.contrib.auth.forms import UserCreationForm
-from django.db.models import Sum
-from django.urls import resolve
 
-from cosmetics_shop.models import CartItem, Client
-from cosmetics_shop.utils.cart_utils import get_cart
+from cosmetics_shop.models import Client
+from cosmetics_shop.utils.cart_utils import get_cart_summary
 
 logger = logging.getLogger(__name__)
 
 
+def request_memoized(request, name, func):
+    """
+    Context value computed when a template first reads it.
+
+    The template engine calls callables on lookup, so pages and fragments
+    that never show the value skip the work; the result is kept on the
+    request and shared by every template rendered for it.
+    """
+
+    def resolve():
+        values = request.__dict__.setdefault("_context_values", {})
+        if name not in values:
+            values[name] = func(request)
+        return values[name]
+
+    return resolve
+
+
+def get_cart_item_count(request):
+    count = get_cart_summary(request).count
+
+    logger.debug("Cart item count calculated", extra={"count": count})
+
+    return count
+
+
 def cart_item_count(request):
-    current_app = resolve(request.path).app_name
+    # Already resolved by the URL dispatcher, no need to resolve the path again
+    current_app = getattr(request.resolver_match, "app_name", None)
 
     if current_app == "staff":
         return {}
 
-    cart = get_cart(request)
+    return {
+        "cart_item_count": request_memoized(
+            request, "cart_item_count", get_cart_item_count
+        )
+    }
 
-    if not cart:
-        return {"cart_item_count": 0}
 
-    count = (
-        CartItem.objects.filter(cart=cart).aggregate(total=Sum("quantity"))["total"]
-        or 0
+def register_form(request):
+    return {
+        "form_register": request_memoized(
+            request, "form_register", lambda request: UserCreationForm()
+        )
+    }
+
+
+def get_client_deletion_status(request) -> Client | None:
+    client = (
+        Client.objects.filter(user=request.user)
+        .only("is_pending_deletion", "deletion_scheduled_date")
+        .first()
     )
 
-    logger.debug("Cart item count calculated", extra={"count": count})
-
-    return {"cart_item_count": count}
+    if client is None:
+        logger.warning("Client not found for user", extra={"user_id": request.user.id})
+        return None
 
+    logger.debug(
+        "Fetched client deletion status",
+        extra={
+            "user_id": request.user.id,
+            "is_pending": client.is_pending_deletion,
+        },
+    )
 
-def register_form(request):
-    return {"form_register": UserCreationForm()}
+    return client
 
 
-# need cache
 def is_pending_deletion_client(request):
-    if request.user.is_authenticated:
-        try:
-            client = Client.objects.get(user=request.user)
-
-            logger.debug(
-                "Fetched client deletion status",
-                extra={
-                    "user_id": request.user.id,
-                    "is_pending": client.is_pending_deletion,
-                },
-            )
-
-            return {
-                "is_pending_deletion": client.is_pending_deletion,
-                "deletion_scheduled_date": client.deletion_scheduled_date,
-            }
-        except Client.DoesNotExist:
-            logger.warning(
-                "Client not found for user", extra={"user_id": request.user.id}
-            )
-            return {"is_pending_deletion": None}
-    else:
+    if not request.user.is_authenticated:
         return {"is_pending_deletion": None}
+
+    client = request_memoized(request, "client", get_client_deletion_status)
+
+    return {
+        "is_pending_deletion": lambda: getattr(client(), "is_pending_deletion", None),
+        "deletion_scheduled_date": lambda: getattr(
+            client(), "deletion_scheduled_date", None
+        ),
+    }
@@ -55,6 +55,19 @@ class PaymentForm(forms.Form):
     )
 
 
+class FacetChoiceField(forms.ModelMultipleChoiceField):
+    """Multiple choice field that shows the number of matching products"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counts: dict[int, int] | None = None
+
+    def label_from_instance(self, obj):
+        if self.counts is None:
+            return super().label_from_instance(obj)
+        return f"{obj} ({self.counts.get(obj.pk, 0)})"
+
+
 class ProductFilterForm(forms.Form):
     name = forms.CharField(
         label="Название содержит",
@@ -62,7 +75,7 @@ class ProductFilterForm(forms.Form):
         widget=forms.TextInput(attrs={"class": "form-control"}),
     )
 
-    group = forms.ModelMultipleChoiceField(
+    group = FacetChoiceField(
         label="Группа",
         widget=forms.CheckboxSelectMultiple,
         queryset=GroupProduct.objects.none(),
@@ -71,7 +84,7 @@ class ProductFilterForm(forms.Form):
         to_field_name="slug",
     )
 
-    brand = forms.ModelMultipleChoiceField(
+    brand = FacetChoiceField(
         label="Бренды",
         widget=forms.CheckboxSelectMultiple,
         queryset=Brand.objects.none(),
@@ -80,7 +93,7 @@ class ProductFilterForm(forms.Form):
         to_field_name="slug",
     )
 
-    tags = forms.ModelMultipleChoiceField(
+    tags = FacetChoiceField(
         label="Теги",
         widget=forms.CheckboxSelectMultiple,
         queryset=Tag.objects.none(),
@@ -100,6 +113,8 @@ class ProductFilterForm(forms.Form):
         widget=forms.TextInput(attrs={"class": "form-control"}),
     )
 
+    facet_models = {"group": GroupProduct, "brand": Brand, "tags": Tag}
+
     def __init__(self, *args, **kwargs):
         products_qs = kwargs.pop("products_qs", None)
         hide_group = kwargs.pop("hide_group", False)
@@ -116,29 +131,44 @@ class ProductFilterForm(forms.Form):
                 group_field = cast(forms.ModelMultipleChoiceField, self.fields["group"])
 
                 group_field.queryset = GroupProduct.objects.filter(
-                    products__in=products_qs
-                ).distinct()
+                    pk__in=products_qs.values("group_id")
+                )
 
             if "brand" in self.fields:
                 brand_field = cast(forms.ModelMultipleChoiceField, self.fields["brand"])
 
                 brand_field.queryset = Brand.objects.filter(
-                    products__in=products_qs
-                ).distinct()
+                    pk__in=products_qs.values("brand_id")
+                )
 
             if "tags" in self.fields:
                 tags_field = cast(forms.ModelMultipleChoiceField, self.fields["tags"])
 
                 tags_field.queryset = Tag.objects.filter(
-                    products__in=products_qs
+                    products__in=products_qs.values("pk")
                 ).distinct()
 
         else:
-            group_field = cast(forms.ModelMultipleChoiceField, self.fields["group"])
-            group_field.queryset = GroupProduct.objects.all()
+            for name, model in self.facet_models.items():
+                if name in self.fields:
+                    field = cast(forms.ModelMultipleChoiceField, self.fields[name])
+                    field.queryset = model.objects.all()
+
+    def get_facet_selection(self) -> dict[str, set[int]]:
+        """Returns ids of the selected facet values of a validated form"""
+        return {
+            name: {obj.pk for obj in self.cleaned_data.get(name) or []}
+            for name in self.facet_models
+            if name in self.fields
+        }
 
-            brand_field = cast(forms.ModelMultipleChoiceField, self.fields["brand"])
-            brand_field.queryset = Brand.objects.all()
+    def apply_facets(self, facets) -> None:
+        """Limits facet choices to values present in the result and adds counts"""
+        for name, model in self.facet_models.items():
+            if name not in self.fields:
+                continue
 
-            tags_field = cast(forms.ModelMultipleChoiceField, self.fields["tags"])
-            tags_field.queryset = Tag.objects.all()
+            counts = facets.counts.get(name, {})
+            field = cast(FacetChoiceField, self.fields[name])
+            field.queryset = model.objects.filter(pk__in=list(counts))
+            field.counts = counts
@@ -1,19 +1,17 @@
-import json
 import os
-from decimal import Decimal
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from cosmetics_shop.models import Brand, Category, GroupProduct, Product, Tag
+from cosmetics_shop.models import Brand, Category, GroupProduct, Tag
+from cosmetics_shop.services.import_service import import_products
 
 
 class Command(BaseCommand):
     help = "Seed database with realistic demo data"
 
-    @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write("Cleaning cache...")
 
@@ -25,7 +23,31 @@ class Command(BaseCommand):
             return
 
         self.stdout.write("Seeding data...")
+        self.seed_reference_data()
+
+        # -------- PRODUCTS --------
+        # Imported in batches, each committed on its own
+        file_path = settings.PRODUCTS_FILE
 
+        if file_path:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(
+                    "products_data.json not found. Copy products_data_example.json"
+                )
+
+            result = import_products(file_path, update_existing=False)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ The database has been successfully populated with "
+                    f"({result.created} product)"
+                )
+            )
+        else:
+            self.style.ERROR("PRODUCTS_FILE not found.")
+            return
+
+    @transaction.atomic
+    def seed_reference_data(self):
         # -------- CATEGORIES --------
         categories_data = ["Лицо", "Волосы", "Тело", "Макияж", "Парфюмерия"]
         categories = {
@@ -64,9 +86,8 @@ class Command(BaseCommand):
             "Molton Brown",
             "Hermès",
         ]
-        brands = {
-            name: Brand.objects.get_or_create(name=name)[0] for name in brands_data
-        }
+        for name in brands_data:
+            Brand.objects.get_or_create(name=name)
 
         # -------- GROUPS --------
         groups_config = [
@@ -100,12 +121,8 @@ class Command(BaseCommand):
             ("Унисекс парфюмерия", "Парфюмерия"),
             ("Миниатюры", "Парфюмерия"),
         ]
-        groups = {
-            name: GroupProduct.objects.get_or_create(
-                name=name, category=categories[cat]
-            )[0]
-            for name, cat in groups_config
-        }
+        for name, cat in groups_config:
+            GroupProduct.objects.get_or_create(name=name, category=categories[cat])
 
         # -------- TAGS --------
         tags_data = [
@@ -121,40 +138,5 @@ class Command(BaseCommand):
             "Водостойкий",
             "Для всех типов кожи",
         ]
-        tags = {name: Tag.objects.get_or_create(name=name)[0] for name in tags_data}
-
-        # -------- PRODUCTS --------
-        file_path = settings.PRODUCTS_FILE
-
-        if file_path:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(
-                    "products_data.json not found. Copy products_data_example.json"
-                )
-
-            with open(file_path, encoding="utf-8") as f:
-                products_list = json.load(f)
-                for p_data in products_list:
-                    product, created = Product.objects.get_or_create(
-                        name=p_data["name"],
-                        defaults={
-                            "group": groups[p_data["group"]],
-                            "brand": brands[p_data["brand"]],
-                            "price": Decimal(p_data["price"]),
-                            "image": p_data.get("image", "default/image.jpg"),
-                            "stock": p_data["stock"],
-                            "description": p_data["desc"],
-                        },
-                    )
-
-                    if created:
-                        product.tags.set([tags[t] for t in p_data["tags"]])
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"✅ The database has been successfully populated with "
-                    f"({len(products_list)} product)"
-                )
-            )
-        else:
-            self.style.ERROR("PRODUCTS_FILE not found.")
-            return
+        for name in tags_data:
+            Tag.objects.get_or_create(name=name)
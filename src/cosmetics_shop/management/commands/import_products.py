@@ -0,0 +1,47 @@
+from django.core.management import BaseCommand, CommandError
+
+from cosmetics_shop.services.import_service import (
+    IMPORT_BATCH_SIZE,
+    import_products,
+)
+
+
+class Command(BaseCommand):
+    help = "Imports products from a JSON Lines, CSV or JSON file in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            "--start-row",
+            type=int,
+            default=0,
+            help="Skip rows already imported by an interrupted run",
+        )
+        parser.add_argument(
+            "--skip-existing",
+            action="store_true",
+            help="Leave products that already exist unchanged",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = import_products(
+                options["path"],
+                batch_size=options["batch_size"],
+                start_row=options["start_row"],
+                update_existing=not options["skip_existing"],
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Import failed: {e}") from e
+
+        for error in result.errors:
+            self.stderr.write(error)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully! {result.created} created, {result.updated} updated, "
+                f"{result.skipped} skipped ({result.rows_per_second:.0f} rows/sec). "
+                f"Last row: {result.last_row}."
+            )
+        )
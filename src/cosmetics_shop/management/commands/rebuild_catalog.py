@@ -0,0 +1,15 @@
+from django.core.management import BaseCommand
+
+from cosmetics_shop.services.catalog_service import rebuild_catalog
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the denormalized catalog read model from products"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rebuild_catalog(batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully! {total} entries rebuilt."))
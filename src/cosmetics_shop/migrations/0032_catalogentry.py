@@ -0,0 +1,124 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_catalog_entries(apps, schema_editor):
+    Product = apps.get_model("cosmetics_shop", "Product")
+    CatalogEntry = apps.get_model("cosmetics_shop", "CatalogEntry")
+
+    products = Product.objects.select_related(
+        "group__category", "brand"
+    ).prefetch_related("tags")
+    entries = [
+        CatalogEntry(
+            product=product,
+            name=product.name,
+            code=product.code,
+            price=product.price,
+            stock=product.stock,
+            image=product.image.name,
+            is_active=product.is_active,
+            in_stock=product.stock > 0,
+            created_at=product.created_at,
+            group=product.group,
+            group_name=product.group.name,
+            group_slug=product.group.slug,
+            category=product.group.category,
+            category_name=product.group.category.name,
+            category_slug=product.group.category.slug,
+            brand=product.brand,
+            brand_name=product.brand.name,
+            brand_slug=product.brand.slug,
+            tag_ids=sorted(tag.pk for tag in product.tags.all()),
+        )
+        for product in products.iterator(chunk_size=1000)
+    ]
+    CatalogEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cosmetics_shop", "0031_remove_deliveryaddress_street_order_cart_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogEntry",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="catalog_entry",
+                        serialize=False,
+                        to="cosmetics_shop.product",
+                    ),
+                ),
+                ("name", models.CharField(max_length=250)),
+                ("code", models.PositiveIntegerField(db_index=True)),
+                ("price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("stock", models.PositiveIntegerField(default=0)),
+                (
+                    "image",
+                    models.ImageField(editable=False, max_length=255, upload_to=""),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("in_stock", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField()),
+                ("group_name", models.CharField(max_length=100)),
+                ("group_slug", models.SlugField(max_length=200)),
+                ("category_name", models.CharField(max_length=50)),
+                ("category_slug", models.SlugField(max_length=200)),
+                ("brand_name", models.CharField(max_length=100)),
+                ("brand_slug", models.SlugField(max_length=200)),
+                ("tag_ids", models.JSONField(blank=True, default=list)),
+                (
+                    "brand",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="cosmetics_shop.brand",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="cosmetics_shop.category",
+                    ),
+                ),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="cosmetics_shop.groupproduct",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "запись каталога",
+                "verbose_name_plural": "Записи каталога",
+                "indexes": [
+                    models.Index(
+                        fields=["is_active", "in_stock", "stock"],
+                        name="catalog_entry_stock_idx",
+                    ),
+                    models.Index(
+                        fields=["is_active", "in_stock", "price"],
+                        name="catalog_entry_price_idx",
+                    ),
+                    models.Index(
+                        fields=["is_active", "in_stock", "name"],
+                        name="catalog_entry_name_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_catalog_entries, migrations.RunPython.noop),
+    ]
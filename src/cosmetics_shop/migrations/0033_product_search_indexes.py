@@ -0,0 +1,52 @@
+from django.db import migrations
+
+NAME_TRGM_INDEX = "product_name_trgm_idx"
+SEARCH_VECTOR_INDEX = "product_search_vector_idx"
+
+
+def create_search_indexes(apps, schema_editor):
+    # SQLite uses an FTS5 table created by SQLiteSearchBackend on first use
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models.functions import Upper
+
+    Product = apps.get_model("cosmetics_shop", "Product")
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.add_index(
+        Product,
+        GinIndex(
+            SearchVector("name", weight="A", config="simple")
+            + SearchVector("description", weight="B", config="simple"),
+            name=SEARCH_VECTOR_INDEX,
+        ),
+    )
+    schema_editor.add_index(
+        Product,
+        GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name=NAME_TRGM_INDEX),
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS product_name_trgm_sim_idx "
+        "ON cosmetics_shop_product USING gin (name gin_trgm_ops)"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name in (SEARCH_VECTOR_INDEX, NAME_TRGM_INDEX, "product_name_trgm_sim_idx"):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cosmetics_shop", "0032_catalogentry"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
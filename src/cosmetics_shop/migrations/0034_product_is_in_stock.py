@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:10
+
+from django.db import migrations, models
+
+
+def fill_is_in_stock(apps, schema_editor):
+    Product = apps.get_model("cosmetics_shop", "Product")
+    Product.objects.filter(stock__gt=0).update(is_in_stock=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cosmetics_shop", "0033_product_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="is_in_stock",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(fill_is_in_stock, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "is_in_stock", "price"],
+                name="product_stock_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "is_in_stock", "name"],
+                name="product_stock_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["group", "is_active", "is_in_stock", "id"],
+                name="product_group_stock_idx",
+            ),
+        ),
+    ]
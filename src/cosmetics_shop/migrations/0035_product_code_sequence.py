@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:17
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def start_code_counter(apps, schema_editor):
+    Product = apps.get_model("cosmetics_shop", "Product")
+    ProductCodeSequence = apps.get_model("cosmetics_shop", "ProductCodeSequence")
+
+    # Codes of existing products were derived from their pk
+    last_value = Product.objects.aggregate(max_pk=Max("pk"))["max_pk"] or 0
+
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS product_code_seq START WITH {last_value + 1}"
+        )
+    else:
+        ProductCodeSequence.objects.create(pk=1, last_value=last_value)
+
+
+def drop_code_counter(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP SEQUENCE IF EXISTS product_code_seq")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cosmetics_shop", "0034_product_is_in_stock"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductCodeSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_value", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(start_code_counter, drop_code_counter),
+    ]
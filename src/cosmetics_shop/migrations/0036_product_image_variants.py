@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cosmetics_shop", "0035_product_code_sequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="catalogentry",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cosmetics_shop", "0036_product_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cart",
+            name="session_key",
+            field=models.CharField(blank=True, db_index=True, max_length=40, null=True),
+        ),
+    ]
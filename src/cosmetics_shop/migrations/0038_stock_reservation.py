@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cosmetics_shop", "0037_cart_session_key_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="stock_reserved",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_reservations",
+                        to="cosmetics_shop.order",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_reservations",
+                        to="cosmetics_shop.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "резерв товара",
+                "verbose_name_plural": "Резервы товаров",
+                "unique_together": {("order", "product")},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cosmetics_shop", "0038_stock_reservation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="payment_url",
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+    ]
@@ -1,14 +1,13 @@
 import logging
 import uuid
 from decimal import Decimal
-from random import randint
 
 from django.conf import settings
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import IntegrityError, models, transaction
-from django.db.models import F, Sum
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
 from django.urls import NoReverseMatch, reverse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -42,22 +41,7 @@ class Status(models.IntegerChoices):
 
 class ProductQuerySet(models.QuerySet):
     def with_stock_order(self):
-        return self.annotate(
-            stock_zero=models.Case(
-                models.When(stock=0, then=models.Value(1)),
-                default=models.Value(0),
-                output_field=models.IntegerField(),
-            )
-        ).order_by("stock_zero", "-stock")
-
-    def annotate_availability(self):
-        return self.annotate(
-            is_out_of_stock=models.Case(
-                models.When(stock=0, then=models.Value(1)),
-                default=models.Value(0),
-                output_field=models.IntegerField(),
-            )
-        )
+        return self.order_by("-is_in_stock", "-stock")
 
     def for_catalog(self):
         return (
@@ -66,6 +50,24 @@ class ProductQuerySet(models.QuerySet):
             .with_stock_order()
         )
 
+    def order_by_availability(self, *fields):
+        return self.order_by("-is_in_stock", *fields)
+
+    def with_reserved(self, now=None):
+        """Annotates reserved: quantity held by unexpired stock reservations"""
+        active = Q(stock_reservations__expires_at__gt=now or timezone.now())
+        return self.annotate(
+            reserved=Coalesce(Sum("stock_reservations__quantity", filter=active), 0)
+        )
+
+
+class CatalogEntryQuerySet(models.QuerySet):
+    def for_catalog(self):
+        return self.filter(is_active=True).order_by("-in_stock", "-stock")
+
+    def order_by_availability(self, *fields):
+        return self.order_by("-in_stock", *fields)
+
 
 class SlugRedirectModel(models.Model):
     """
@@ -236,13 +238,6 @@ class Category(SlugRedirectModel):
     def __str__(self):
         return self.name
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        try:
-            cache.delete("categories_with_groups")
-        except Exception:
-            pass
-
     class Meta:
         ordering = ["name"]
         verbose_name = _("категорию")
@@ -301,6 +296,19 @@ class Tag(SlugRedirectModel):
         verbose_name_plural = _("Теги")
 
 
+class ProductCodeSequence(models.Model):
+    """
+    Counter behind product codes on databases without native sequences.
+
+    Used through cosmetics_shop.services.code_service only.
+    """
+
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.last_value)
+
+
 class Product(TimestampedModel):
     name = models.CharField(max_length=250, unique=True)
     group = models.ForeignKey(
@@ -314,26 +322,37 @@ class Product(TimestampedModel):
     stock = models.PositiveIntegerField(default=0)
     code = models.PositiveIntegerField(unique=True, editable=False, db_index=True)
     image = models.ImageField(upload_to="product_images/", default="default/image.jpg")
+    # Resized copies of image, filled by cosmetics_shop.services.image_service
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     tags = models.ManyToManyField(Tag, blank=True, related_name="products")
     is_active = models.BooleanField(default=True, db_index=True)
+    # Kept in sync with stock so availability sorting can use an index
+    is_in_stock = models.BooleanField(default=False, editable=False)
 
     objects = ProductQuerySet.as_manager()
 
+    # Codes are a permutation of a counter, 10,000,000 records should be enough.
+    # Products created before the allocator used their pk as the counter.
+    CODE_A = 4_827_137
+    CODE_B = 1_234_567
+    CODE_MOD = 10_000_000
+
+    @classmethod
+    def code_for_number(cls, number: int) -> int:
+        return (cls.CODE_A * number + cls.CODE_B) % cls.CODE_MOD
+
     def save(self, *args, **kwargs):
-        # 10,000,000 records should be enough
-        if not self.pk:
-            with transaction.atomic():
-                self.code = randint(0, 9999)
-                super().save(*args, **kwargs)
+        self.is_in_stock = self.stock > 0
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "stock" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "is_in_stock"}
+
+        if not self.pk and self.code is None:
+            from cosmetics_shop.services.code_service import allocate_codes
 
-                A = 4_827_137
-                B = 1_234_567
-                MOD = 10_000_000
+            self.code = allocate_codes(1)[0]
 
-                self.code = (A * self.pk + B) % MOD
-                Product.objects.filter(pk=self.pk).update(code=self.code)
-        else:
-            super().save(*args, **kwargs)
+        super().save(*args, **kwargs)
 
     def soft_delete(self):
         self.is_active = False
@@ -345,12 +364,86 @@ class Product(TimestampedModel):
     class Meta:
         verbose_name = _("товар")
         verbose_name_plural = _("Товары")
+        indexes = [
+            models.Index(
+                fields=["is_active", "is_in_stock", "price"],
+                name="product_stock_price_idx",
+            ),
+            models.Index(
+                fields=["is_active", "is_in_stock", "name"],
+                name="product_stock_name_idx",
+            ),
+            models.Index(
+                fields=["group", "is_active", "is_in_stock", "id"],
+                name="product_group_stock_idx",
+            ),
+        ]
         permissions = [
             ("can_change_product_price", "Может изменять цену товара"),
             ("can_manage_product_stock", "Может управлять остатками товара"),
         ]
 
 
+class CatalogEntry(models.Model):
+    """
+    Flat read model of a product card for the storefront catalog.
+
+    Rows are maintained by cosmetics_shop.services.catalog_service from
+    Product, Brand, GroupProduct, Category and Tag writes and should never
+    be edited directly.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="catalog_entry",
+    )
+    name = models.CharField(max_length=250)
+    code = models.PositiveIntegerField(db_index=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    stock = models.PositiveIntegerField(default=0)
+    image = models.ImageField(max_length=255, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    is_active = models.BooleanField(default=True)
+    in_stock = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+
+    group = models.ForeignKey(GroupProduct, on_delete=models.CASCADE, related_name="+")
+    group_name = models.CharField(max_length=100)
+    group_slug = models.SlugField(max_length=200)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+")
+    category_name = models.CharField(max_length=50)
+    category_slug = models.SlugField(max_length=200)
+    brand = models.ForeignKey(Brand, on_delete=models.CASCADE, related_name="+")
+    brand_name = models.CharField(max_length=100)
+    brand_slug = models.SlugField(max_length=200)
+    tag_ids = models.JSONField(default=list, blank=True)
+
+    objects = CatalogEntryQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.group_name} - {self.name}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["is_active", "in_stock", "stock"],
+                name="catalog_entry_stock_idx",
+            ),
+            models.Index(
+                fields=["is_active", "in_stock", "price"],
+                name="catalog_entry_price_idx",
+            ),
+            models.Index(
+                fields=["is_active", "in_stock", "name"],
+                name="catalog_entry_name_idx",
+            ),
+        ]
+        verbose_name = _("запись каталога")
+        verbose_name_plural = _("Записи каталога")
+
+
 class Favorite(TimestampedModel):
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name="favorites"
@@ -368,7 +461,7 @@ class Cart(TimestampedModel):
     user = models.OneToOneField(
         CustomUser, on_delete=models.CASCADE, null=True, related_name="cart"
     )
-    session_key = models.CharField(max_length=40, null=True, blank=True)
+    session_key = models.CharField(max_length=40, null=True, blank=True, db_index=True)
 
     def __str__(self):
         return f"{self.created_at} - {self.user}"
@@ -405,6 +498,8 @@ class Order(TimestampedModel):
     )
     completed_at = models.DateTimeField(null=True, blank=True, editable=False)
     comment = models.TextField(max_length=300, null=True, blank=True)
+    # Items are held by StockReservation rows, stock is taken on payment
+    stock_reserved = models.BooleanField(default=False, editable=False)
 
     snapshot_name = models.CharField(max_length=200)
     snapshot_phone = models.CharField(max_length=20)
@@ -469,13 +564,42 @@ class Order(TimestampedModel):
     def is_paid(self):
         return self.payments.filter(status=Payment.PaymentStatus.SUCCESS).exists()
 
+    def lock(self):
+        """
+        Locks the order row until the transaction ends and reloads its state.
+        Expiry claims orders with SKIP LOCKED, so it leaves the order alone
+        while a payment is being recorded.
+        """
+        self.status, self.stock_reserved = (
+            Order.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list("status", "stock_reserved")
+            .get()
+        )
+
     def mark_as_paid(self):
-        self.set_status(Status.PAYMENT_RECEIVED)
-        self.save()
+        from cosmetics_shop.services.reservation_service import (
+            commit_reservations,
+            take_order_stock,
+        )
+
+        with transaction.atomic():
+            self.lock()
+            if self.status == Status.CANCELED:
+                # Expired before the payment got here, its stock went back
+                logger.warning(f"Payment for expired order {self.code}")
+                take_order_stock(self)
+            self.set_status(Status.PAYMENT_RECEIVED)
+            commit_reservations(self)
+            self.save()
 
     def mark_as_failed_payment(self):
-        self.set_status(Status.PAYMENT_FAILED)
-        self.save()
+        with transaction.atomic():
+            self.lock()
+            if self.status == Status.CANCELED:
+                return
+            self.set_status(Status.PAYMENT_FAILED)
+            self.save()
 
     class Meta:
         ordering = ["-id"]
@@ -504,6 +628,8 @@ class Payment(TimestampedModel):
 
     external_id = models.CharField(max_length=255, blank=True, null=True)
     # mono invoice_id
+    payment_url = models.URLField(max_length=500, blank=True, null=True)
+    # mono pageUrl, reused while the invoice is pending
 
     def __str__(self):
         return f"{self.order.code} - {self.method} - {self.status}"
@@ -558,3 +684,24 @@ class OrderStatusLog(models.Model):
         ordering = ["-changed_at", "-id"]
         verbose_name = _("статус заказа")
         verbose_name_plural = _("Статусы заказов")
+
+
+class StockReservation(models.Model):
+    """Stock held for an unpaid order until payment or expires_at"""
+
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="stock_reservations"
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="stock_reservations"
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.order_id} - {self.product_id} - {self.quantity}"
+
+    class Meta:
+        unique_together = ("order", "product")
+        verbose_name = _("резерв товара")
+        verbose_name_plural = _("Резервы товаров")
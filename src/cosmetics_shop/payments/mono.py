@@ -33,13 +33,59 @@ def create_mono_invoice(order: Order, redirect_url: str, webhook_url: str):
         },
     }
 
-    response = requests.post(settings.MONO_URL, json=payload, headers=headers)
+    response = requests.post(
+        settings.MONO_URL, json=payload, headers=headers, timeout=10
+    )
     response.raise_for_status()
 
     return response.json()
 
 
+def get_pending_invoice(order: Order, amount: Decimal) -> Payment | None:
+    return (
+        order.payments.filter(
+            method=Payment.PaymentMethod.CARD,
+            status=Payment.PaymentStatus.PENDING,
+            amount=amount,
+        )
+        .exclude(payment_url=None)
+        .first()
+    )
+
+
 def init_payment(order: Order, request, custom_redirect_url: str | None = None):
+    """
+    Page URL of the order's Monobank invoice. A pending invoice for the
+    current total is reused, so refreshes and replayed redirects do not
+    create new ones.
+
+    The order row is locked only to look up and store the invoice, never
+    across the request to Monobank, so a slow provider does not hold up the
+    webhook, order expiry or staff changes of the order.
+    """
+    amount = order.total_price
+
+    with transaction.atomic():
+        order.lock()
+
+        pending = get_pending_invoice(order, amount)
+        if pending:
+            logger.info(f"Reusing Mono invoice {pending.external_id}")
+            return pending.payment_url
+
+        # Claims the card payment for the new amount, an older invoice of
+        # another amount is not reused anymore
+        payment, _ = Payment.objects.update_or_create(
+            order=order,
+            method=Payment.PaymentMethod.CARD,
+            defaults={
+                "amount": amount,
+                "external_id": None,
+                "payment_url": None,
+                "status": Payment.PaymentStatus.PENDING,
+            },
+        )
+
     if custom_redirect_url:
         redirect_url = custom_redirect_url
     else:
@@ -49,15 +95,22 @@ def init_payment(order: Order, request, custom_redirect_url: str | None = None):
 
     invoice = create_mono_invoice(order, redirect_url, webhook_url)
 
-    Payment.objects.update_or_create(
-        order=order,
-        method=Payment.PaymentMethod.CARD,
-        defaults={
-            "amount": order.total_price,
-            "external_id": invoice.get("invoiceId"),
-            "status": Payment.PaymentStatus.PENDING,
-        },
-    )
+    with transaction.atomic():
+        order.lock()
+
+        # A concurrent call may have stored its invoice in the meantime
+        pending = get_pending_invoice(order, amount)
+        if pending:
+            logger.info(
+                f"Dropping Mono invoice {invoice.get('invoiceId')}, "
+                f"reusing {pending.external_id}"
+            )
+            return pending.payment_url
+
+        Payment.objects.filter(pk=payment.pk).update(
+            external_id=invoice.get("invoiceId"),
+            payment_url=invoice.get("pageUrl"),
+        )
 
     return invoice.get("pageUrl")
 
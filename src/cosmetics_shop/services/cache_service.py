@@ -0,0 +1,73 @@
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+
+from cosmetics_shop.models import Brand, Category, GroupProduct, Product, Tag
+from utils.cache_utils import clear_local_caches, initial_cache_version
+
+logger = logging.getLogger(__name__)
+
+# Namespaces of cached catalog data
+MENU = "menu"
+BRANDS = "brands"
+TAGS = "tags"
+CATALOG = "catalog"
+
+CACHE_VERSION_KEY = "cache_version:{namespace}"
+
+# Which namespaces go stale when a model (or m2m table) changes
+MODEL_NAMESPACES: dict[type, tuple[str, ...]] = {
+    Category: (MENU, CATALOG),
+    GroupProduct: (MENU, CATALOG),
+    Brand: (BRANDS, CATALOG),
+    Tag: (TAGS, CATALOG),
+    Product: (CATALOG,),
+    Product.tags.through: (TAGS, CATALOG),
+}
+
+
+def namespace_version_key(namespace: str) -> str:
+    return CACHE_VERSION_KEY.format(namespace=namespace)
+
+
+def get_cache_versions(*namespaces: str) -> dict[str, int]:
+    keys = {namespace: namespace_version_key(namespace) for namespace in namespaces}
+    found = cache.get_many(keys.values())
+
+    versions = {}
+    for namespace, key in keys.items():
+        if key in found:
+            versions[namespace] = found[key]
+        else:
+            versions[namespace] = cache.get_or_set(
+                key, initial_cache_version(), timeout=None
+            )
+
+    return versions
+
+
+def bump_cache_versions(*namespaces: str) -> None:
+    """
+    Makes every key built with these namespaces unreachable once the
+    current transaction commits, a reader in between would otherwise cache
+    uncommitted data under the new version.
+    """
+    transaction.on_commit(lambda: _bump_cache_versions(namespaces))
+
+
+def _bump_cache_versions(namespaces: tuple[str, ...]) -> None:
+    for namespace in namespaces:
+        key = namespace_version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, initial_cache_version(), timeout=None)
+        clear_local_caches(key)
+
+    logger.debug(f"Cache versions bumped: {namespaces}")
+
+
+def versioned_key(key: str, *namespaces: str) -> str:
+    versions = get_cache_versions(*namespaces)
+    return ":".join([key, *(f"{ns}.{versions[ns]}" for ns in namespaces)])
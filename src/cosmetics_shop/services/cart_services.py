@@ -1,18 +1,116 @@
 import logging
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import cached_property
 
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import F, Sum
+from django.db.models import F, QuerySet, Sum
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 
 from cosmetics_shop.models import Cart, CartItem, Product
+from cosmetics_shop.services.cache_service import CATALOG, versioned_key
+from cosmetics_shop.services.cart_store import (
+    CartProduct,
+    SessionCart,
+    get_cart_products,
+)
+from cosmetics_shop.services.reservation_service import (
+    get_available_stock,
+    get_reserved_quantities,
+)
+from utils.cache_utils import (
+    CacheSchema,
+    cache_get,
+    cache_set,
+    initial_cache_version,
+)
 
 logger = logging.getLogger(__name__)
 
+CART_VERSION_KEY = "cart_version:{cart_id}"
+CART_SUMMARY_KEY = "cart_summary:{cart_id}:v{version}"
+CART_SUMMARY_TIMEOUT = 60 * 10  # 10 minutes
 
-def get_id_products_in_cart(cart: Cart) -> list[int]:
+
+@dataclass(frozen=True)
+class CartLine:
+    product: CartProduct
+    quantity: int
+    # CartItem pk, None for session carts
+    item_id: int | None = None
+
+    @property
+    def subtotal(self) -> Decimal:
+        return self.product.price * self.quantity
+
+    @cached_property
+    def available(self) -> int:
+        # Read on use, not cached with the summary: holds change on their own
+        return get_available_stock(self.product)
+
+    @property
+    def is_max_quantity(self) -> bool:
+        """The same limit add_product_to_cart() applies"""
+        return self.quantity >= self.available
+
+
+@dataclass(frozen=True)
+class CartSummary:
+    lines: tuple[CartLine, ...] = ()
+
+    @property
+    def count(self) -> int:
+        return sum(line.quantity for line in self.lines)
+
+    @property
+    def total_price(self) -> Decimal:
+        return sum((line.subtotal for line in self.lines), Decimal("0.00"))
+
+    @property
+    def product_ids(self) -> list[int]:
+        return [line.product.pk for line in self.lines]
+
+    def get_line(self, product_code: int) -> CartLine | None:
+        return next(
+            (line for line in self.lines if line.product.code == int(product_code)),
+            None,
+        )
+
+
+CART_SUMMARY_SCHEMA = CacheSchema(
+    dump=lambda summary: [
+        [
+            line.product.pk,
+            line.product.code,
+            line.product.name,
+            line.product.price,
+            line.product.stock,
+            line.quantity,
+            line.item_id,
+        ]
+        for line in summary.lines
+    ],
+    load=lambda rows: CartSummary(
+        tuple(
+            CartLine(
+                CartProduct(pk, code, name, Decimal(price), stock), quantity, item_id
+            )
+            for pk, code, name, price, stock, quantity, item_id in rows
+        )
+    ),
+)
+
+
+def get_id_products_in_cart(cart: Cart | SessionCart | None) -> list[int]:
     if not cart:
         return []
 
+    if isinstance(cart, SessionCart):
+        products = get_cart_products(cart.get_quantities())
+        return [product.pk for product in products.values()]
+
     cart_products = list(
         CartItem.objects.filter(cart=cart)
         .values_list("product_id", flat=True)
@@ -21,9 +119,22 @@ def get_id_products_in_cart(cart: Cart) -> list[int]:
     return cart_products
 
 
-def add_product_to_cart(cart: Cart, product_code: int) -> None:
+def add_product_to_cart(cart: Cart | SessionCart, product_code: int) -> None:
     logger.debug(f"Add to cart: cart_id={cart.id}, product_code={product_code}")
 
+    if isinstance(cart, SessionCart):
+        product = get_cart_products([product_code]).get(int(product_code))
+        if product is None:
+            raise Http404("No Product matches the given query.")
+
+        stock = get_available_stock(product)
+        quantity = cart.store.increment(cart.token, product.code, stock)
+        if quantity is None:
+            logger.warning(
+                f"Stock limit reached: product_id={product.pk}, stock={stock}"
+            )
+        return
+
     product = get_object_or_404(Product, code=product_code)
 
     with transaction.atomic():
@@ -33,10 +144,10 @@ def add_product_to_cart(cart: Cart, product_code: int) -> None:
 
         if created:
             logger.info(
-                f"Product added to cart: cart_id={cart.id}," f" product_id={product.id}"
+                f"Product added to cart: cart_id={cart.id}, product_id={product.id}"
             )
         else:
-            if cart_item.quantity < product.stock:
+            if cart_item.quantity < get_available_stock(product):
                 cart_item.quantity = F("quantity") + 1
                 cart_item.save()
                 logger.info(
@@ -49,10 +160,16 @@ def add_product_to_cart(cart: Cart, product_code: int) -> None:
                     f" stock={product.stock}"
                 )
 
+    bump_cart_version(cart)
+
 
-def remove_product_from_cart(cart: Cart, product_code: int) -> None:
+def remove_product_from_cart(cart: Cart | SessionCart, product_code: int) -> None:
     logger.debug(f"Remove one item: cart_id={cart.id}, product_code={product_code}")
 
+    if isinstance(cart, SessionCart):
+        cart.store.decrement(cart.token, int(product_code))
+        return
+
     with transaction.atomic():
         updated = CartItem.objects.filter(
             cart=cart, product__code=product_code, quantity__gt=1
@@ -64,13 +181,21 @@ def remove_product_from_cart(cart: Cart, product_code: int) -> None:
                 f" product_code={product_code}"
             )
 
+    if updated:
+        bump_cart_version(cart)
+
 
-def delete_product_from_cart(cart: Cart, product_code: int) -> None:
+def delete_product_from_cart(cart: Cart | SessionCart, product_code: int) -> None:
     logger.debug(f"Delete product: cart_id={cart.id}, product_code={product_code}")
 
+    if isinstance(cart, SessionCart):
+        cart.store.delete(cart.token, int(product_code))
+        return
+
     product = get_object_or_404(Product, code=product_code)
 
     deleted, _ = CartItem.objects.filter(cart=cart, product=product).delete()
+    bump_cart_version(cart)
 
     logger.info(
         f"Product removed from cart: cart_id={cart.id},"
@@ -79,21 +204,129 @@ def delete_product_from_cart(cart: Cart, product_code: int) -> None:
     )
 
 
-def delete_cart(cart: Cart) -> None:
+def delete_cart(cart: Cart | SessionCart) -> None:
     logger.debug(f"Clearing cart: cart_id={cart.id}")
 
+    if isinstance(cart, SessionCart):
+        cart.store.clear(cart.token)
+        return
+
     deleted, _ = CartItem.objects.filter(cart=cart).delete()
+    bump_cart_version(cart)
 
     logger.info(f"Cart cleared: cart_id={cart.id}, items_deleted={deleted}")
 
 
-def is_product_in_cart(cart: Cart, product_pk: int) -> bool:
+def is_product_in_cart(cart: Cart | SessionCart | None, product_pk: int) -> bool:
     if not cart:
         return False
+    if isinstance(cart, SessionCart):
+        return product_pk in get_id_products_in_cart(cart)
     return CartItem.objects.filter(cart=cart, product__pk=product_pk).exists()
 
 
+def get_cart_items(cart: Cart | SessionCart | None) -> QuerySet[CartItem] | list:
+    if not cart:
+        return CartItem.objects.none()
+
+    if isinstance(cart, SessionCart):
+        quantities = cart.get_quantities()
+        products = Product.objects.in_bulk(quantities, field_name="code")
+        return [
+            CartItem(product=products[code], quantity=quantity)
+            for code, quantity in quantities.items()
+            if code in products
+        ]
+
+    return CartItem.objects.select_related("product").filter(cart=cart)
+
+
+def set_available_stock(cart_items: list[CartItem]) -> None:
+    """Sets available_stock, on-hand stock less reservations, on each item"""
+    reserved = get_reserved_quantities(item.product.pk for item in cart_items)
+    for item in cart_items:
+        item.available_stock = max(item.product.stock - reserved[item.product.pk], 0)
+
+
+def get_cart_version(cart: Cart) -> int:
+    return cache.get_or_set(
+        CART_VERSION_KEY.format(cart_id=cart.pk),
+        initial_cache_version,
+        timeout=CART_SUMMARY_TIMEOUT,
+    )
+
+
+def bump_cart_version(cart: Cart) -> None:
+    """Makes the cached summary of the cart unreachable"""
+    try:
+        cache.incr(CART_VERSION_KEY.format(cart_id=cart.pk))
+    except ValueError:
+        # An expired version restarts from the clock and never repeats
+        pass
+
+
+def fetch_cart_summary(cart: Cart | SessionCart) -> CartSummary:
+    if isinstance(cart, SessionCart):
+        quantities = cart.get_quantities()
+        products = get_cart_products(quantities)
+        return CartSummary(
+            tuple(
+                CartLine(products[code], quantity)
+                for code, quantity in quantities.items()
+                if code in products
+            )
+        )
+
+    rows = (
+        CartItem.objects.filter(cart=cart)
+        .order_by("pk")
+        .values_list(
+            "product_id",
+            "product__code",
+            "product__name",
+            "product__price",
+            "product__stock",
+            "quantity",
+            "pk",
+        )
+    )
+    return CartSummary(
+        tuple(
+            CartLine(CartProduct(pk, code, name, price, stock), quantity, item_id)
+            for pk, code, name, price, stock, quantity, item_id in rows
+        )
+    )
+
+
+def build_cart_summary(cart: Cart | SessionCart | None) -> CartSummary:
+    """
+    Lines, count and total of a cart from a single query.
+
+    Database carts are cached per cart version, which every change of the
+    cart bumps; price and stock edits expire them with the catalog version.
+    """
+    if not cart:
+        return CartSummary()
+
+    if isinstance(cart, SessionCart):
+        return fetch_cart_summary(cart)
+
+    key = versioned_key(
+        CART_SUMMARY_KEY.format(cart_id=cart.pk, version=get_cart_version(cart)),
+        CATALOG,
+    )
+    summary = cache_get(key, CART_SUMMARY_SCHEMA)
+    if summary is None:
+        summary = fetch_cart_summary(cart)
+        cache_set(key, summary, CART_SUMMARY_SCHEMA, timeout=CART_SUMMARY_TIMEOUT)
+
+    return summary
+
+
 def get_cart_total_price(cart_items):
+    if not isinstance(cart_items, QuerySet):
+        return sum((item.product.price * item.quantity for item in cart_items), 0)
+
     return (
         cart_items.aggregate(total_price=Sum(F("product__price") * F("quantity")))[
             "total_price"
@@ -102,9 +335,89 @@ def get_cart_total_price(cart_items):
     )
 
 
+def add_cart_quantities(cart: Cart, quantities: dict[int, int]) -> None:
+    """
+    Adds quantities by product code to the cart like merge_carts(): summed
+    with the lines already there and clamped to stock
+    """
+    products = Product.objects.filter(code__in=quantities, stock__gt=0).values_list(
+        "pk", "code", "stock"
+    )
+    existing = dict(
+        CartItem.objects.filter(cart=cart, product__code__in=quantities).values_list(
+            "product_id", "quantity"
+        )
+    )
+    items = [
+        CartItem(
+            cart=cart,
+            product_id=pk,
+            quantity=min(quantities[code] + existing.get(pk, 0), stock),
+        )
+        for pk, code, stock in products
+    ]
+
+    CartItem.objects.bulk_create(
+        items,
+        update_conflicts=True,
+        unique_fields=["cart", "product"],
+        update_fields=["quantity"],
+    )
+    bump_cart_version(cart)
+
+    logger.info(f"Cart items saved: cart_id={cart.id}, count={len(items)}")
+
+
+def merge_carts(source: Cart, target: Cart) -> None:
+    """
+    Adds the items of source to target and deletes source.
+
+    Quantities of products in both carts are summed and clamped to stock,
+    all lines are written with one upsert.
+    """
+    source_id = source.pk
+    rows = list(
+        CartItem.objects.filter(cart=source, product__stock__gt=0).values_list(
+            "product_id", "quantity", "product__stock"
+        )
+    )
+    existing = dict(
+        CartItem.objects.filter(
+            cart=target, product_id__in=[pk for pk, _, _ in rows]
+        ).values_list("product_id", "quantity")
+    )
+    items = [
+        CartItem(
+            cart=target,
+            product_id=pk,
+            quantity=min(quantity + existing.get(pk, 0), stock),
+        )
+        for pk, quantity, stock in rows
+    ]
+
+    with transaction.atomic():
+        CartItem.objects.bulk_create(
+            items,
+            update_conflicts=True,
+            unique_fields=["cart", "product"],
+            update_fields=["quantity"],
+        )
+        source.delete()
+
+    bump_cart_version(target)
+
+    logger.info(
+        f"Carts merged: source_id={source_id}, target_id={target.id},"
+        f" items={len(items)}"
+    )
+
+
 def clear_cart_after_order(cart: Cart) -> None:
     logger.debug(f"Clearing cart after order: cart_id={cart.id}")
 
     deleted, _ = cart.cart_items.all().delete()
+    bump_cart_version(cart)
+    # Again on commit: a read until then still sees the items and may cache them
+    transaction.on_commit(lambda: bump_cart_version(cart))
 
     logger.info(f"Cart cleared after order: cart_id={cart.id}, items_deleted={deleted}")
@@ -0,0 +1,215 @@
+import functools
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+
+from cosmetics_shop.models import Product
+
+logger = logging.getLogger(__name__)
+
+CART_STORE_KEY = "cart:session:{token}"
+CART_STORE_TIMEOUT = 60 * 60 * 24 * 14  # 2 weeks, the session cookie age
+
+CART_PRODUCT_KEY = "cart:product:v2:{code}"
+CART_PRODUCT_TIMEOUT = 60  # 1 minute, checkout validates stock again
+
+# HINCRBY guarded by the cached stock so concurrent clicks cannot overshoot
+INCREMENT_SCRIPT = """
+local quantity = redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+if quantity > tonumber(ARGV[2]) then
+    quantity = redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+    if quantity <= 0 then redis.call('HDEL', KEYS[1], ARGV[1]) end
+    return -1
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return quantity
+"""
+
+DECREMENT_SCRIPT = """
+local quantity = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+if quantity > 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+end
+return quantity
+"""
+
+
+@dataclass(frozen=True)
+class CartProduct:
+    pk: int
+    code: int
+    name: str
+    price: Decimal
+    stock: int
+
+
+def get_cart_products(codes) -> dict[int, CartProduct]:
+    """Id, name, price and stock by product code, served from cache when fresh"""
+    codes = {int(code) for code in codes}
+    if not codes:
+        return {}
+
+    keys = {CART_PRODUCT_KEY.format(code=code): code for code in codes}
+    cached = cache.get_many(keys)
+
+    products = {
+        keys[key]: CartProduct(pk, code, name, Decimal(price), stock)
+        for key, (pk, code, name, price, stock) in cached.items()
+    }
+
+    missing = codes - products.keys()
+    if missing:
+        fetched = {}
+        for pk, code, name, price, stock in Product.objects.filter(
+            code__in=missing, is_active=True
+        ).values_list("pk", "code", "name", "price", "stock"):
+            products[code] = CartProduct(pk, code, name, price, stock)
+            fetched[CART_PRODUCT_KEY.format(code=code)] = [
+                pk,
+                code,
+                name,
+                str(price),
+                stock,
+            ]
+        cache.set_many(fetched, timeout=CART_PRODUCT_TIMEOUT)
+
+    return products
+
+
+class BaseCartStore:
+    """Quantities of an anonymous cart by product code"""
+
+    def get_quantities(self, token: str) -> dict[int, int]:
+        raise NotImplementedError
+
+    def increment(self, token: str, code: int, limit: int) -> int | None:
+        """New quantity, or None when the limit is already reached"""
+        raise NotImplementedError
+
+    def decrement(self, token: str, code: int) -> None:
+        """Takes one item off, never below one"""
+        raise NotImplementedError
+
+    def delete(self, token: str, code: int) -> None:
+        raise NotImplementedError
+
+    def clear(self, token: str) -> None:
+        raise NotImplementedError
+
+
+class RedisCartStore(BaseCartStore):
+    """One Redis hash per cart, every change is a single round trip"""
+
+    def __init__(self, client):
+        self.client = client
+        self._increment = client.register_script(INCREMENT_SCRIPT)
+        self._decrement = client.register_script(DECREMENT_SCRIPT)
+
+    @staticmethod
+    def key(token):
+        return cache.make_and_validate_key(CART_STORE_KEY.format(token=token))
+
+    def get_quantities(self, token):
+        return {
+            int(code): int(quantity)
+            for code, quantity in self.client.hgetall(self.key(token)).items()
+        }
+
+    def increment(self, token, code, limit):
+        quantity = self._increment(
+            keys=[self.key(token)], args=[code, limit, CART_STORE_TIMEOUT]
+        )
+        return None if quantity < 0 else quantity
+
+    def decrement(self, token, code):
+        self._decrement(keys=[self.key(token)], args=[code])
+
+    def delete(self, token, code):
+        self.client.hdel(self.key(token), code)
+
+    def clear(self, token):
+        self.client.delete(self.key(token))
+
+
+class CacheCartStore(BaseCartStore):
+    """
+    Same behavior on top of any Django cache for development and tests.
+
+    Read-modify-write, so concurrent requests of one session may race.
+    """
+
+    @staticmethod
+    def key(token):
+        return CART_STORE_KEY.format(token=token)
+
+    def get_quantities(self, token):
+        return {int(code): qty for code, qty in cache.get(self.key(token), {}).items()}
+
+    def _save(self, token, quantities):
+        cache.set(self.key(token), quantities, timeout=CART_STORE_TIMEOUT)
+
+    def increment(self, token, code, limit):
+        quantities = self.get_quantities(token)
+        quantity = quantities.get(code, 0) + 1
+        if quantity > limit:
+            return None
+
+        quantities[code] = quantity
+        self._save(token, quantities)
+        return quantity
+
+    def decrement(self, token, code):
+        quantities = self.get_quantities(token)
+        if quantities.get(code, 0) > 1:
+            quantities[code] -= 1
+            self._save(token, quantities)
+
+    def delete(self, token, code):
+        quantities = self.get_quantities(token)
+        if quantities.pop(code, None) is not None:
+            self._save(token, quantities)
+
+    def clear(self, token):
+        cache.delete(self.key(token))
+
+
+@functools.cache
+def get_redis_cart_store() -> RedisCartStore:
+    """One client and one set of registered scripts per process"""
+    return RedisCartStore(redis.from_url(settings.REDIS_URL))
+
+
+def get_cart_store() -> BaseCartStore | None:
+    """None keeps anonymous carts in the database"""
+    backend = getattr(settings, "CART_SESSION_STORE", None)
+
+    if backend == "redis":
+        if not getattr(settings, "REDIS_URL", None):
+            logger.warning("CART_SESSION_STORE=redis needs REDIS_URL")
+            return None
+        return get_redis_cart_store()
+
+    if backend == "cache":
+        return CacheCartStore()
+
+    return None
+
+
+@dataclass
+class SessionCart:
+    """Anonymous cart kept in the cart store until checkout or login"""
+
+    token: str
+    store: BaseCartStore
+    user: None = None
+
+    @property
+    def id(self) -> str:
+        return f"session:{self.token[:8]}"
+
+    def get_quantities(self) -> dict[int, int]:
+        return self.store.get_quantities(self.token)
@@ -0,0 +1,186 @@
+import logging
+from typing import Iterable
+
+from cosmetics_shop.models import (
+    Brand,
+    CatalogEntry,
+    Category,
+    GroupProduct,
+    Product,
+)
+from cosmetics_shop.services.cache_service import CATALOG, bump_cache_versions
+from cosmetics_shop.utils.product_filters import (
+    get_facet_rows,
+    invalidate_facet_index,
+)
+
+logger = logging.getLogger(__name__)
+
+CATALOG_ENTRY_UPDATE_FIELDS = [
+    "name",
+    "code",
+    "price",
+    "stock",
+    "image",
+    "image_variants",
+    "is_active",
+    "in_stock",
+    "created_at",
+    "group",
+    "group_name",
+    "group_slug",
+    "category",
+    "category_name",
+    "category_slug",
+    "brand",
+    "brand_name",
+    "brand_slug",
+    "tag_ids",
+]
+
+FACET_ENTRY_FIELDS = [
+    "product_id",
+    "is_active",
+    "category_id",
+    "group_id",
+    "brand_id",
+    "tag_ids",
+    "price",
+]
+
+
+def available_from_annotation(product: Product) -> int:
+    """
+    On-hand stock less the reserved annotation of
+    ProductQuerySet.with_reserved(), reservation_service.get_available_stock()
+    is the cached lookup for a single product
+    """
+    return max(product.stock - getattr(product, "reserved", 0), 0)
+
+
+def build_catalog_entry(product: Product) -> CatalogEntry:
+    group = product.group
+    stock = available_from_annotation(product)
+    category = group.category
+    brand = product.brand
+
+    return CatalogEntry(
+        product=product,
+        name=product.name,
+        code=product.code,
+        price=product.price,
+        stock=stock,
+        image=product.image.name,
+        image_variants=product.image_variants,
+        is_active=product.is_active,
+        in_stock=stock > 0,
+        created_at=product.created_at,
+        group=group,
+        group_name=group.name,
+        group_slug=group.slug,
+        category=category,
+        category_name=category.name,
+        category_slug=category.slug,
+        brand=brand,
+        brand_name=brand.name,
+        brand_slug=brand.slug,
+        tag_ids=sorted(tag.pk for tag in product.tags.all()),
+    )
+
+
+def sync_catalog_entries(product_ids: Iterable[int]) -> int:
+    """Rebuilds the catalog rows of the given products with a single upsert"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return 0
+
+    products = (
+        Product.objects.filter(pk__in=product_ids)
+        .with_reserved()
+        .select_related("group__category", "brand")
+        .prefetch_related("tags")
+    )
+    entries = [build_catalog_entry(product) for product in products]
+    facet_rows = get_facet_rows(
+        CatalogEntry.objects.filter(pk__in=product_ids).only(*FACET_ENTRY_FIELDS)
+    )
+
+    CatalogEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=CATALOG_ENTRY_UPDATE_FIELDS,
+    )
+
+    # Stock, name and image changes leave the facet index as it is
+    if get_facet_rows(entries) != facet_rows:
+        invalidate_facet_index()
+
+    logger.debug(f"Catalog entries synced: count={len(entries)}")
+
+    return len(entries)
+
+
+def sync_catalog_stock(product_codes: Iterable[int]) -> None:
+    """
+    Copies available stock of products changed with queryset.update() or
+    by reservations to the catalog
+    """
+    products = Product.objects.filter(code__in=list(product_codes)).with_reserved()
+    entries = []
+    for product in products.only("pk", "stock"):
+        stock = available_from_annotation(product)
+        entries.append(
+            CatalogEntry(product_id=product.pk, stock=stock, in_stock=stock > 0)
+        )
+    CatalogEntry.objects.bulk_update(entries, ["stock", "in_stock"])
+    # queryset.update() sends no signals
+    bump_cache_versions(CATALOG)
+
+
+def sync_brand_entries(brand: Brand) -> None:
+    updated = CatalogEntry.objects.filter(brand=brand).update(
+        brand_name=brand.name, brand_slug=brand.slug
+    )
+    logger.debug(f"Catalog entries updated for brand_id={brand.pk}: {updated}")
+
+
+def sync_group_entries(group: GroupProduct) -> None:
+    category = group.category
+    entries = CatalogEntry.objects.filter(group=group)
+    # Only a move to another category changes the facet index
+    moved = entries.exclude(category=category).exists()
+
+    updated = entries.update(
+        group_name=group.name,
+        group_slug=group.slug,
+        category=category,
+        category_name=category.name,
+        category_slug=category.slug,
+    )
+    if moved:
+        invalidate_facet_index()
+
+    logger.debug(f"Catalog entries updated for group_id={group.pk}: {updated}")
+
+
+def sync_category_entries(category: Category) -> None:
+    updated = CatalogEntry.objects.filter(category=category).update(
+        category_name=category.name, category_slug=category.slug
+    )
+    logger.debug(f"Catalog entries updated for category_id={category.pk}: {updated}")
+
+
+def rebuild_catalog(batch_size: int = 1000) -> int:
+    """Rebuilds the whole catalog read model"""
+    product_ids = list(Product.objects.order_by("pk").values_list("pk", flat=True))
+
+    total = 0
+    for start in range(0, len(product_ids), batch_size):
+        total += sync_catalog_entries(product_ids[start : start + batch_size])
+
+    bump_cache_versions(CATALOG)
+
+    logger.info(f"Catalog rebuilt: entries={total}")
+
+    return total
@@ -0,0 +1,233 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import DatabaseError, transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet, Sum
+from django.utils import timezone
+
+from cosmetics_shop.models import (
+    Cart,
+    CartItem,
+    Order,
+    OrderItem,
+    OrderStatusLog,
+    Payment,
+    Status,
+    StockReservation,
+)
+from cosmetics_shop.services.product_service import release_stock
+from cosmetics_shop.services.reservation_service import (
+    RESERVATION_TTL,
+    release_order_reservations,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CleanupResult:
+    carts: int = 0
+    cart_items: int = 0
+    sessions: int = 0
+    orders: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    # False when the time budget ran out, the next run continues
+    finished: bool = True
+
+
+def get_abandoned_carts(now=None) -> QuerySet[Cart]:
+    """
+    Anonymous carts older than CART_ABANDONED_AFTER_DAYS whose session
+    has expired or is gone, nobody can reach them anymore.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.CART_ABANDONED_AFTER_DAYS)
+    live_sessions = Session.objects.filter(
+        session_key=OuterRef("session_key"), expire_date__gte=now
+    )
+    return Cart.objects.filter(user__isnull=True, created_at__lt=cutoff).exclude(
+        Exists(live_sessions)
+    )
+
+
+class CleanupRun:
+    """
+    Deletes rows in primary key order, one short transaction per batch,
+    and stops once the time budget is spent.
+    """
+
+    def __init__(self, batch_size: int, time_budget: float):
+        self.batch_size = batch_size
+        self.deadline = time.monotonic() + time_budget
+        self.result = CleanupResult()
+
+    def out_of_time(self) -> bool:
+        if time.monotonic() < self.deadline:
+            return False
+        self.result.finished = False
+        return True
+
+    def batches(self, queryset: QuerySet):
+        last_pk = None
+        while not self.out_of_time():
+            page = queryset.order_by("pk")
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+
+            pks = list(page.values_list("pk", flat=True)[: self.batch_size])
+            if not pks:
+                return
+
+            yield pks
+            self.result.batches += 1
+            last_pk = pks[-1]
+
+    def delete_carts(self, queryset: QuerySet[Cart]) -> None:
+        for pks in self.batches(queryset):
+            with transaction.atomic():
+                items, _ = CartItem.objects.filter(cart_id__in=pks).delete()
+                _, deleted = Cart.objects.filter(pk__in=pks).delete()
+
+            self.result.cart_items += items
+            self.result.carts += deleted.get(Cart._meta.label, 0)
+
+    def delete_sessions(self, queryset: QuerySet[Session]) -> None:
+        for pks in self.batches(queryset):
+            deleted, _ = Session.objects.filter(pk__in=pks).delete()
+            self.result.sessions += deleted
+
+
+def purge_abandoned_carts(
+    batch_size: int | None = None,
+    time_budget: float | None = None,
+) -> CleanupResult:
+    """Removes abandoned anonymous carts with their items, then expired sessions"""
+    run = CleanupRun(
+        batch_size=batch_size or settings.CART_CLEANUP_BATCH_SIZE,
+        time_budget=time_budget or settings.CART_CLEANUP_TIME_BUDGET,
+    )
+    started = time.monotonic()
+    now = timezone.now()
+
+    run.delete_carts(get_abandoned_carts(now))
+    run.delete_sessions(Session.objects.filter(expire_date__lt=now))
+
+    result = run.result
+    result.elapsed = time.monotonic() - started
+
+    logger.info(
+        f"Cart cleanup: carts={result.carts}, cart_items={result.cart_items}, "
+        f"sessions={result.sessions}, batches={result.batches}, "
+        f"elapsed={result.elapsed:.2f}s, finished={result.finished}"
+    )
+
+    return result
+
+
+ORDER_EXPIRED_COMMENT = "Order expired: payment not received within 30 minutes."
+
+
+def get_expired_orders(now=None) -> QuerySet[Order]:
+    """
+    Unpaid orders older than RESERVATION_TTL. Orders holding stock expire
+    with their last live reservation, older orders that took stock directly
+    by age alone. Cash on delivery orders are paid later and never expire.
+    """
+    now = now or timezone.now()
+    payments = Payment.objects.filter(order=OuterRef("pk"))
+    live_holds = StockReservation.objects.filter(
+        order=OuterRef("pk"), expires_at__gt=now
+    )
+    return (
+        Order.objects.filter(
+            status__in=[Status.NEW, Status.PAYMENT_FAILED],
+            created_at__lt=now - RESERVATION_TTL,
+        )
+        .filter(Q(stock_reserved=False) | ~Exists(live_holds))
+        .exclude(Exists(payments.filter(method=Payment.PaymentMethod.CASH)))
+        .exclude(Exists(payments.filter(status=Payment.PaymentStatus.SUCCESS)))
+    )
+
+
+def cancel_orders(orders: list[tuple[int, bool]]) -> None:
+    """
+    Cancels claimed (pk, stock_reserved) orders as a set: their holds or
+    taken stock go back, then one statement per table for the rest.
+    """
+    order_ids = [pk for pk, _ in orders]
+    reserved = [pk for pk, stock_reserved in orders if stock_reserved]
+    taken = [pk for pk, stock_reserved in orders if not stock_reserved]
+
+    if reserved:
+        release_order_reservations(reserved)
+    if taken:
+        release_stock(
+            OrderItem.objects.filter(order_id__in=taken, product__isnull=False)
+            .values("product__code")
+            .annotate(total=Sum("quantity"))
+            .values_list("product__code", "total")
+        )
+
+    Order.objects.filter(pk__in=order_ids).update(status=Status.CANCELED)
+    OrderStatusLog.objects.bulk_create(
+        OrderStatusLog(
+            order_id=pk, status=Status.CANCELED, comment=ORDER_EXPIRED_COMMENT
+        )
+        for pk in order_ids
+    )
+    Payment.objects.filter(
+        order_id__in=order_ids, status=Payment.PaymentStatus.PENDING
+    ).update(status=Payment.PaymentStatus.FAILED)
+
+
+def expire_unpaid_orders(
+    batch_size: int | None = None,
+    time_budget: float | None = None,
+) -> CleanupResult:
+    """
+    Cancels expired unpaid orders in batches claimed with
+    FOR UPDATE SKIP LOCKED, so parallel workers never take the same order
+    and orders locked by a payment in flight wait for the next run.
+    """
+    run = CleanupRun(
+        batch_size=batch_size or settings.ORDER_EXPIRY_BATCH_SIZE,
+        time_budget=time_budget or settings.ORDER_EXPIRY_TIME_BUDGET,
+    )
+    started = time.monotonic()
+    now = timezone.now()
+
+    while not run.out_of_time():
+        try:
+            with transaction.atomic():
+                orders = list(
+                    get_expired_orders(now)
+                    .select_for_update(skip_locked=True, of=("self",))
+                    .order_by("pk")
+                    .values_list("pk", "stock_reserved")[: run.batch_size]
+                )
+                if not orders:
+                    break
+                cancel_orders(orders)
+        except DatabaseError:
+            # The batch rolled back, retrying it now would fail the same way
+            logger.exception("Failed to expire orders")
+            run.result.finished = False
+            break
+
+        run.result.orders += len(orders)
+        run.result.batches += 1
+
+    result = run.result
+    result.elapsed = time.monotonic() - started
+
+    logger.info(
+        f"Order expiry: orders={result.orders}, batches={result.batches}, "
+        f"elapsed={result.elapsed:.2f}s, finished={result.finished}"
+    )
+
+    return result
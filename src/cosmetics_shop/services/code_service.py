@@ -0,0 +1,120 @@
+import logging
+import threading
+from collections import deque
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from cosmetics_shop.models import Product, ProductCodeSequence
+
+logger = logging.getLogger(__name__)
+
+CODE_SEQUENCE = "product_code_seq"
+CODE_BLOCK_SIZE = 50
+
+
+def initial_code_number() -> int:
+    # Existing codes were derived from pk, start the counter after them
+    return Product.objects.aggregate(max_pk=Max("pk"))["max_pk"] or 0
+
+
+class BaseCodeAllocator:
+    def reserve_numbers(self, count: int) -> list[int]:
+        raise NotImplementedError
+
+    def allocate(self, count: int) -> list[int]:
+        numbers = self.reserve_numbers(count)
+        if numbers and numbers[-1] >= Product.CODE_MOD:
+            raise OverflowError("Product code space is exhausted")
+        return [Product.code_for_number(number) for number in numbers]
+
+
+class SequenceCodeAllocator(BaseCodeAllocator):
+    """
+    Draws counters from a PostgreSQL sequence.
+
+    nextval() is not rolled back with the transaction, so numbers can be
+    fetched in blocks and handed out from memory: most inserts then need no
+    extra statement. Unused numbers of a block are lost on restart.
+    """
+
+    def __init__(self, block_size: int = CODE_BLOCK_SIZE):
+        self.block_size = block_size
+        self._numbers: deque[int] = deque()
+        self._lock = threading.Lock()
+        self._ensured = False
+
+    def ensure_sequence(self):
+        if self._ensured:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_class WHERE relname = %s", [CODE_SEQUENCE])
+            if not cursor.fetchone():
+                logger.info("Creating product code sequence")
+                cursor.execute(
+                    f"CREATE SEQUENCE IF NOT EXISTS {CODE_SEQUENCE} "
+                    f"START WITH {initial_code_number() + 1}"
+                )
+        self._ensured = True
+
+    def fetch(self, count: int) -> list[int]:
+        self.ensure_sequence()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                [CODE_SEQUENCE, count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def reserve_numbers(self, count):
+        with self._lock:
+            if len(self._numbers) < count:
+                missing = count - len(self._numbers)
+                self._numbers.extend(self.fetch(max(missing, self.block_size)))
+            return [self._numbers.popleft() for _ in range(count)]
+
+
+class TableCodeAllocator(BaseCodeAllocator):
+    """
+    Counter row updated under a lock, for SQLite and other backends.
+
+    The reservation commits or rolls back with the surrounding transaction,
+    so numbers are never cached between calls.
+    """
+
+    def reserve_numbers(self, count):
+        with transaction.atomic():
+            sequence = (
+                ProductCodeSequence.objects.select_for_update().filter(pk=1).first()
+            )
+            if sequence is None:
+                sequence = ProductCodeSequence(pk=1, last_value=initial_code_number())
+
+            start = sequence.last_value + 1
+            sequence.last_value += count
+            sequence.save()
+
+        return list(range(start, start + count))
+
+
+CODE_ALLOCATORS: dict[str, type[BaseCodeAllocator]] = {
+    "postgresql": SequenceCodeAllocator,
+}
+
+_allocator: BaseCodeAllocator | None = None
+
+
+def get_code_allocator() -> BaseCodeAllocator:
+    global _allocator
+    if _allocator is None:
+        allocator_class = CODE_ALLOCATORS.get(connection.vendor, TableCodeAllocator)
+        _allocator = allocator_class()
+    return _allocator
+
+
+def allocate_codes(count: int) -> list[int]:
+    """Unique product codes for objects about to be inserted"""
+    if count <= 0:
+        return []
+    return get_code_allocator().allocate(count)
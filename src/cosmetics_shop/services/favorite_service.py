@@ -0,0 +1,78 @@
+import logging
+from typing import Iterable
+
+from django.core.cache import cache
+
+from accounts.models import CustomUser
+from cosmetics_shop.models import Favorite, Product
+
+logger = logging.getLogger(__name__)
+
+FAVORITE_IDS_KEY = "favorites:{user_id}"
+FAVORITE_IDS_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+def refresh_favorite_ids(user: CustomUser) -> frozenset[int]:
+    """Reloads the cached set after the user's favorites changed"""
+    favorite_ids = frozenset(
+        Favorite.objects.filter(user=user).values_list("product_id", flat=True)
+    )
+    cache.set(
+        FAVORITE_IDS_KEY.format(user_id=user.pk),
+        sorted(favorite_ids),
+        timeout=FAVORITE_IDS_TIMEOUT,
+    )
+    user._favorite_ids = favorite_ids
+    return favorite_ids
+
+
+def get_favorite_ids(user: CustomUser) -> frozenset[int]:
+    """Ids of the user's favorite products, read once per request"""
+    if not user.is_authenticated:
+        return frozenset()
+
+    favorite_ids = getattr(user, "_favorite_ids", None)
+    if favorite_ids is not None:
+        return favorite_ids
+
+    cached = cache.get(FAVORITE_IDS_KEY.format(user_id=user.pk))
+    if cached is None:
+        logger.debug(f"Favorite ids loaded from DB: user_id={user.pk}")
+        return refresh_favorite_ids(user)
+
+    favorite_ids = frozenset(cached)
+    user._favorite_ids = favorite_ids
+    return favorite_ids
+
+
+def mark_favorites(products: Iterable, user: CustomUser) -> None:
+    """Sets is_favorite on products or catalog entries already fetched"""
+    favorite_ids = get_favorite_ids(user)
+    for product in products:
+        product.is_favorite = product.pk in favorite_ids
+
+
+def add_favorite(user: CustomUser, product: Product) -> Favorite:
+    favorite, created = Favorite.objects.get_or_create(user=user, product=product)
+    refresh_favorite_ids(user)
+
+    logger.info(f"Added to favorites: user_id={user.pk}, product_id={product.pk}")
+
+    return favorite
+
+
+def remove_favorite(user: CustomUser, product_id: int) -> None:
+    Favorite.objects.filter(user=user, product_id=product_id).delete()
+    refresh_favorite_ids(user)
+
+    logger.info(f"Removed from favorites: user_id={user.pk}, product_id={product_id}")
+
+
+def toggle_favorite(user: CustomUser, product: Product) -> bool:
+    """Returns whether the product is in favorites after the toggle"""
+    if product.pk in get_favorite_ids(user):
+        remove_favorite(user, product.pk)
+        return False
+
+    add_favorite(user, product)
+    return True
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.http import HttpRequest
+
+from utils.custom_exceptions import IdempotencyInProgress, IdempotencyKeyMismatch
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY = "idempotency:{scope}:{key}"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_TTL = 60 * 60 * 24  # 1 day
+# A request that dies mid-checkout frees its key after this
+IDEMPOTENCY_LOCK_TIMEOUT = 60  # 1 minute
+IDEMPOTENCY_POLL_INTERVAL = 0.1
+
+
+@dataclass(frozen=True)
+class IdempotentResponse:
+    status: int
+    data: Any
+
+
+def request_fingerprint(*parts) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_idempotency_scope(request: HttpRequest) -> str:
+    """Keys are per user or per session, clients never share them"""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    if not request.session.session_key:
+        request.session.save()
+    return f"session:{request.session.session_key}"
+
+
+def claim_idempotency_key(
+    cache_key: str, fingerprint: str, wait: float = 0
+) -> IdempotentResponse | None:
+    """
+    Returns None when the caller owns the key and has to run the request,
+    otherwise the stored response of the first request. Waits up to `wait`
+    seconds for a first request still in progress.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        pending = {"fingerprint": fingerprint, "response": None}
+        if cache.add(cache_key, pending, timeout=IDEMPOTENCY_LOCK_TIMEOUT):
+            return None
+
+        record = cache.get(cache_key)
+        if record is None:
+            # Expired between add() and get(), claim it again
+            continue
+        if record["fingerprint"] != fingerprint:
+            raise IdempotencyKeyMismatch("Ключ уже использован с другими данными")
+        if record["response"] is not None:
+            return record["response"]
+        if time.monotonic() >= deadline:
+            raise IdempotencyInProgress("Запрос с этим ключом уже обрабатывается")
+
+        time.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+
+def run_idempotent(
+    scope: str,
+    key: str,
+    fingerprint: str,
+    func: Callable[[], IdempotentResponse],
+    wait: float = 0,
+    ttl: int = IDEMPOTENCY_TTL,
+) -> tuple[IdempotentResponse, bool]:
+    """
+    Runs func() once per (scope, key) and replays its response for the
+    same fingerprint for ttl seconds. Only successful responses are
+    kept, after an error or an exception the key can be retried.
+
+    Returns the response and whether it was replayed.
+    """
+    cache_key = IDEMPOTENCY_KEY.format(scope=scope, key=key)
+
+    stored = claim_idempotency_key(cache_key, fingerprint, wait=wait)
+    if stored is not None:
+        logger.info(f"Idempotent replay: scope={scope}, key={key}")
+        return stored, True
+
+    try:
+        response = func()
+    except Exception:
+        cache.delete(cache_key)
+        raise
+
+    if response.status >= 400:
+        cache.delete(cache_key)
+    else:
+        cache.set(
+            cache_key,
+            {"fingerprint": fingerprint, "response": response},
+            timeout=ttl,
+        )
+
+    return response, False
@@ -0,0 +1,163 @@
+import logging
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from cosmetics_shop.models import Product
+from cosmetics_shop.services.cache_service import CATALOG, bump_cache_versions
+from cosmetics_shop.services.catalog_service import sync_catalog_entries
+
+logger = logging.getLogger(__name__)
+
+# Card and product page widths, 1x and 2x
+IMAGE_WIDTHS = (240, 480, 960)
+VARIANTS_DIR = "product_images/variants"
+
+# Most compact first, <source> elements are picked in document order
+IMAGE_FORMATS = {
+    "avif": ("AVIF", "image/avif", {"quality": 50}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True}),
+    "png": ("PNG", "image/png", {"optimize": True}),
+}
+
+
+# Thumbnails in a format every browser reads, used by <img srcset>
+FALLBACK_FORMATS = ("jpeg", "png")
+
+
+def get_variant_formats(image: Image.Image) -> list[str]:
+    modern = [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+    fallback = "png" if image.mode in ("RGBA", "LA", "P") else "jpeg"
+    return [*modern, fallback]
+
+
+def encode_variant(image: Image.Image, fmt: str) -> bytes:
+    pil_format, _, options = IMAGE_FORMATS[fmt]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_image_variants(product: Product) -> dict:
+    """Writes resized copies of the product image next to the original"""
+    storage = product.image.storage
+    source = product.image.name
+
+    with storage.open(source) as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+
+    stem = PurePosixPath(source).stem
+    widths = sorted({min(width, image.width) for width in IMAGE_WIDTHS})
+
+    items = []
+    for width in widths:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        for fmt in get_variant_formats(image):
+            name = storage.save(
+                f"{VARIANTS_DIR}/{stem}_{width}.{fmt}",
+                ContentFile(encode_variant(resized, fmt)),
+            )
+            items.append(
+                {
+                    "format": fmt,
+                    "name": name,
+                    "url": storage.url(name),
+                    "width": width,
+                    "height": height,
+                }
+            )
+
+    return {"source": source, "items": items}
+
+
+def delete_image_variants(storage, variants: dict) -> None:
+    for item in variants.get("items", []):
+        try:
+            storage.delete(item["name"])
+        except OSError as e:
+            logger.warning(f"Failed to delete image variant {item['name']}: {e}")
+
+
+def process_product_image(product_id: int) -> bool:
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None or not product.image:
+        return False
+
+    try:
+        variants = generate_image_variants(product)
+    except (OSError, UnidentifiedImageError) as e:
+        logger.error(f"Image processing failed: product_id={product_id}, error={e}")
+        return False
+
+    # The image may have been replaced while the variants were generated
+    updated = Product.objects.filter(pk=product_id, image=variants["source"]).update(
+        image_variants=variants
+    )
+    if not updated:
+        delete_image_variants(product.image.storage, variants)
+        logger.info(f"Stale image variants dropped: product_id={product_id}")
+        return False
+
+    if product.image_variants.get("source") != variants["source"]:
+        delete_image_variants(product.image.storage, product.image_variants)
+
+    sync_catalog_entries([product_id])
+    bump_cache_versions(CATALOG)
+
+    logger.info(
+        f"Image variants created: product_id={product_id}, "
+        f"count={len(variants['items'])}"
+    )
+
+    return True
+
+
+def schedule_image_processing(product: Product) -> None:
+    """Queues variant generation once the new image is committed"""
+    if not product.image or product.image.name == Product.image.field.default:
+        return
+
+    from cosmetics_shop.tasks import process_product_image_task
+
+    transaction.on_commit(lambda: process_product_image_task.delay(product.pk))
+
+
+def get_image_sources(obj) -> list[dict]:
+    """
+    <source>/srcset data for a Product or CatalogEntry, best format first.
+
+    Empty until variants of the current image exist, templates then keep
+    serving the original.
+    """
+    variants = obj.image_variants or {}
+    if variants.get("source") != obj.image.name:
+        return []
+
+    by_format: dict[str, list[dict]] = {}
+    for item in variants.get("items", []):
+        by_format.setdefault(item["format"], []).append(item)
+
+    return [
+        {
+            "format": fmt,
+            "type": IMAGE_FORMATS[fmt][1],
+            "srcset": ", ".join(
+                f"{item['url']} {item['width']}w" for item in by_format[fmt]
+            ),
+            "fallback": fmt in FALLBACK_FORMATS,
+            "width": by_format[fmt][-1]["width"],
+            "height": by_format[fmt][-1]["height"],
+        }
+        for fmt in IMAGE_FORMATS
+        if fmt in by_format
+    ]
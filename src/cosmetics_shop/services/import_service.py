@@ -0,0 +1,252 @@
+import csv
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from django.db import transaction
+
+from cosmetics_shop.models import Brand, GroupProduct, Product, Tag
+from cosmetics_shop.services.cache_service import (
+    CATALOG,
+    TAGS,
+    bump_cache_versions,
+)
+from cosmetics_shop.services.catalog_service import sync_catalog_entries
+from cosmetics_shop.services.code_service import allocate_codes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE = "default/image.jpg"
+CSV_TAG_SEPARATOR = "|"
+IMPORT_BATCH_SIZE = 1000
+
+PRODUCT_IMPORT_FIELDS = [
+    "group",
+    "brand",
+    "price",
+    "stock",
+    "description",
+    "is_in_stock",
+]
+# Written only for rows bringing a new image, the variants of the old one go
+PRODUCT_IMAGE_FIELDS = ["image", "image_variants"]
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    # Number of the last row committed, pass it as start_row to resume
+    last_row: int = 0
+    errors: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def read_jsonl(path: Path) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_csv(path: Path) -> Iterator[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            tags = row.get("tags") or ""
+            row["tags"] = [
+                t.strip() for t in tags.split(CSV_TAG_SEPARATOR) if t.strip()
+            ]
+            yield row
+
+
+def read_json(path: Path) -> Iterator[dict]:
+    # A plain JSON array cannot be streamed, kept for the demo data file
+    with open(path, encoding="utf-8") as f:
+        yield from json.load(f)
+
+
+READERS = {
+    ".jsonl": read_jsonl,
+    ".csv": read_csv,
+    ".json": read_json,
+}
+
+
+def read_rows(path: str | Path) -> Iterator[dict]:
+    path = Path(path)
+    reader = READERS.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"Unsupported import format: {path.suffix}")
+    return reader(path)
+
+
+class ProductImporter:
+    """
+    Loads product rows in batches with a constant number of queries per batch.
+
+    Brands, groups and tags are resolved against dicts loaded once, products
+    are matched by name, new ones are bulk inserted and existing ones bulk
+    updated (or skipped). Each batch is its own transaction, so a failed run
+    can be resumed from ImportResult.last_row.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        update_existing: bool = True,
+    ):
+        self.batch_size = batch_size
+        self.update_existing = update_existing
+
+        self.brands = {brand.name: brand for brand in Brand.objects.all()}
+        self.groups = {group.name: group for group in GroupProduct.objects.all()}
+        self.tags = {tag.name: tag for tag in Tag.objects.all()}
+
+    def parse_row(self, row: dict) -> tuple[Product, list[int]]:
+        try:
+            name = row["name"].strip()
+            group = self.groups[row["group"]]
+            brand = self.brands[row["brand"]]
+            price = Decimal(str(row["price"]))
+            stock = int(row["stock"])
+            description = row.get("desc", row.get("description", ""))
+            tag_ids = [self.tags[tag].pk for tag in row.get("tags") or []]
+        except KeyError as e:
+            raise ImportRowError(f"unknown or missing value {e}") from e
+        except (AttributeError, InvalidOperation, TypeError, ValueError) as e:
+            raise ImportRowError(f"invalid value: {e}") from e
+
+        if not name or price < 0 or stock < 0:
+            raise ImportRowError("empty name or negative price/stock")
+
+        product = Product(
+            name=name,
+            group=group,
+            brand=brand,
+            price=price,
+            stock=stock,
+            is_in_stock=stock > 0,
+            # Empty when the row has none, existing products keep theirs
+            image=row.get("image") or "",
+            description=description,
+        )
+        return product, tag_ids
+
+    def import_batch(self, rows: list[tuple[int, dict]], result: ImportResult) -> None:
+        parsed: dict[str, tuple[Product, list[int]]] = {}
+        for number, row in rows:
+            try:
+                product, tag_ids = self.parse_row(row)
+            except ImportRowError as e:
+                result.skipped += 1
+                result.errors.append(f"row {number}: {e}")
+                logger.warning(f"Import row skipped: row={number}, error={e}")
+                continue
+            # The last row wins when a name repeats within a batch
+            parsed[product.name] = (product, tag_ids)
+
+        with transaction.atomic():
+            existing = {
+                name: (pk, image)
+                for name, pk, image in Product.objects.filter(
+                    name__in=parsed
+                ).values_list("name", "pk", "image")
+            }
+
+            new_products = [
+                p for name, (p, _) in parsed.items() if name not in existing
+            ]
+            changed_products = []
+            new_images = []
+            if self.update_existing:
+                for name, (pk, image) in existing.items():
+                    product = parsed[name][0]
+                    product.pk = pk
+                    changed_products.append(product)
+                    if product.image and product.image.name != image:
+                        new_images.append(product)
+
+            self.create_products(new_products)
+            Product.objects.bulk_update(changed_products, PRODUCT_IMPORT_FIELDS)
+            Product.objects.bulk_update(new_images, PRODUCT_IMAGE_FIELDS)
+
+            written = new_products + changed_products
+            if changed_products:
+                Product.tags.through.objects.filter(
+                    product_id__in=[p.pk for p in changed_products]
+                ).delete()
+            Product.tags.through.objects.bulk_create(
+                [
+                    Product.tags.through(product_id=product.pk, tag_id=tag_id)
+                    for product in written
+                    for tag_id in parsed[product.name][1]
+                ],
+                ignore_conflicts=True,
+            )
+
+            # Bulk writes send no signals
+            sync_catalog_entries(p.pk for p in written)
+
+        result.created += len(new_products)
+        result.updated += len(changed_products)
+        result.skipped += len(existing) - len(changed_products)
+
+    @staticmethod
+    def create_products(products: list[Product]) -> None:
+        for product, code in zip(products, allocate_codes(len(products))):
+            product.code = code
+            product.image = product.image or DEFAULT_IMAGE
+        Product.objects.bulk_create(products)
+
+    def run(self, rows: Iterable[dict], start_row: int = 0) -> ImportResult:
+        result = ImportResult(last_row=start_row)
+        started = time.monotonic()
+
+        numbered = islice(enumerate(rows, start=1), start_row, None)
+        while batch := list(islice(numbered, self.batch_size)):
+            self.import_batch(batch, result)
+
+            result.rows += len(batch)
+            result.last_row = batch[-1][0]
+            result.elapsed = time.monotonic() - started
+            logger.info(
+                f"Import progress: row={result.last_row}, "
+                f"rows_per_second={result.rows_per_second:.0f}"
+            )
+
+        result.elapsed = time.monotonic() - started
+        if result.created or result.updated:
+            bump_cache_versions(TAGS, CATALOG)
+
+        logger.info(
+            f"Import finished: rows={result.rows}, created={result.created}, "
+            f"updated={result.updated}, skipped={result.skipped}, "
+            f"rows_per_second={result.rows_per_second:.0f}"
+        )
+
+        return result
+
+
+def import_products(
+    path: str | Path,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    start_row: int = 0,
+    update_existing: bool = True,
+) -> ImportResult:
+    importer = ProductImporter(batch_size=batch_size, update_existing=update_existing)
+    return importer.run(read_rows(path), start_row=start_row)
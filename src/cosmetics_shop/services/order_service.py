@@ -1,4 +1,6 @@
 import logging
+from dataclasses import dataclass
+from decimal import Decimal
 from typing import Any
 
 from django.db import transaction
@@ -8,27 +10,100 @@ from cosmetics_shop.models import (
     Cart,
     CartItem,
     Client,
-    DeliveryAddress,
     Order,
     OrderItem,
+    OrderStatusLog,
+    Status,
 )
-from cosmetics_shop.services.product_service import (
-    change_stock_product,
-    restore_stock_product,
+from cosmetics_shop.services.product_service import release_stock, reserve_stock
+from cosmetics_shop.services.reservation_service import (
+    renew_reservations,
+    reserve_for_order,
 )
 from utils.custom_exceptions import OutOfStockError
 
 logger = logging.getLogger(__name__)
 
 
+ORDER_UPDATE_FIELDS = [
+    "snapshot_name",
+    "snapshot_phone",
+    "snapshot_email",
+    "snapshot_address",
+    "cart",
+    "total_price",
+]
+
+
+def get_stock_deltas(old_items, cart_items) -> dict[int, int]:
+    """Net quantity change by product code, positive when more is ordered"""
+    deltas: dict[int, int] = {}
+    for item in old_items:
+        if item.product:
+            code = item.product.code
+            deltas[code] = deltas.get(code, 0) - item.quantity
+    for item in cart_items:
+        code = item.product.code
+        deltas[code] = deltas.get(code, 0) + item.quantity
+    return {code: delta for code, delta in deltas.items() if delta}
+
+
 @transaction.atomic
 def update_order_from_cart(order, cart, client_data, address_data):
+    """
+    Brings an unpaid order in line with the cart.
+
+    Orders holding reservations get them replaced by the cart lines, or
+    only renewed when the cart is unchanged. Older
+    orders that took stock directly get only the net change of each
+    product applied. Only lines that differ are written.
+    """
     logger.info(f"Updating order started: order_id={order.id}")
 
-    old_items = order.order_items.all()
-    for item in old_items:
-        restore_stock_product(item.product.code, item.quantity)
-    old_items.delete()
+    old_items = list(order.order_items.select_related("product"))
+    cart_items = list(cart.cart_items.select_related("product"))
+
+    deltas = get_stock_deltas(old_items, cart_items)
+    try:
+        if order.stock_reserved:
+            # Holds are renewed on every visit, so the order does not expire
+            # while the customer is still checking out
+            if deltas or not renew_reservations(order):
+                reserve_for_order(
+                    order, ((item.product.code, item.quantity) for item in cart_items)
+                )
+        else:
+            reserve_stock((code, delta) for code, delta in deltas.items() if delta > 0)
+            release_stock((code, -delta) for code, delta in deltas.items() if delta < 0)
+    except OutOfStockError as e:
+        logger.warning(f"Out of stock during update: order_id={order.id}, error={e}")
+        raise
+
+    old_by_product = {item.product_id: item for item in old_items if item.product}
+    new_items, changed_items = [], []
+    for line in build_order_items(order, cart_items):
+        item = old_by_product.pop(line.product_id, None)
+        if item is None:
+            new_items.append(line)
+        elif (item.quantity, item.price, item.snapshot_product) != (
+            line.quantity,
+            line.price,
+            line.snapshot_product,
+        ):
+            item.quantity = line.quantity
+            item.price = line.price
+            item.snapshot_product = line.snapshot_product
+            changed_items.append(item)
+
+    # Lines no longer in the cart and lines of deleted products
+    removed_ids = [item.pk for item in old_by_product.values()]
+    removed_ids += [item.pk for item in old_items if not item.product]
+
+    OrderItem.objects.filter(pk__in=removed_ids).delete()
+    OrderItem.objects.bulk_update(
+        changed_items, ["quantity", "price", "snapshot_product"]
+    )
+    OrderItem.objects.bulk_create(new_items)
 
     city = client_data.get("city", order.snapshot_address)
     post_office = client_data.get("post_office", "")
@@ -44,129 +119,123 @@ def update_order_from_cart(order, cart, client_data, address_data):
     order.snapshot_email = client_data.get("email", order.snapshot_email)
     order.snapshot_address = address
     order.cart = cart
+    order.total_price = sum(
+        (item.product.price * item.quantity for item in cart_items), Decimal("0.00")
+    )
+    order.save(update_fields=ORDER_UPDATE_FIELDS)
 
-    new_order_items = []
-    cart_items = cart.cart_items.select_related("product")
-
-    for item in cart_items:
-        try:
-            change_stock_product(item.product.code, item.quantity)
-        except ValueError:
-            logger.warning(f"Out of stock during update: product={item.product.name}")
-            raise OutOfStockError(f"Товара {item.product.name} недостаточно")
-
-        new_order_items.append(
-            OrderItem(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price,
-                snapshot_product=item.product.name,
-            )
-        )
-
-    OrderItem.objects.bulk_create(new_order_items)
-    order.update_total_price()
-    order.save()
-
-    logger.info(f"Order updated successfully: order_id={order.id}")
+    logger.info(
+        f"Order updated successfully: order_id={order.id}, "
+        f"stock_changes={len(deltas)}, added={len(new_items)}, "
+        f"changed={len(changed_items)}, removed={len(removed_ids)}"
+    )
     return order
 
 
-def create_order_from_cart(cart: Cart, client_data, address_data) -> Order:
-    logger.info(f"START create_order_from_cart: cart_id={cart.id}")
+@dataclass(frozen=True)
+class OrderSnapshot:
+    client: Client | None
+    name: str
+    phone: str
+    email: str
+    address: str
 
-    cart_items = CartItem.objects.select_related("product").filter(cart=cart)
-
-    if not cart_items.exists():
-        logger.warning(f"Cart is empty: cart_id={cart.id}")
-        raise ValueError("Корзина пуста")
 
+def get_order_snapshot(cart: Cart, client_data, address_data) -> OrderSnapshot:
+    """Contact details copied into the order, from the client or the session"""
     if cart.user:
         logger.debug(f"Authenticated user checkout: user_id={cart.user.id}")
 
         client = get_object_or_404(Client, user=cart.user)
+        primary_address = client.addresses.filter(is_primary=True).first()
+
+        return OrderSnapshot(
+            client=client,
+            name=f"{client.first_name} {client.last_name}".strip(),
+            phone=client.phone or "",
+            email=client.email or "",
+            address=str(primary_address) if primary_address else "Адрес не указан",
+        )
 
-        full_name = f"{client.last_name} {client.first_name}"
-        user_email = client.email
-        phone = client.phone
+    logger.debug("Anonymous checkout")
 
-        primary_address = DeliveryAddress.objects.filter(
-            client=client, is_primary=True
-        ).first()
+    if not client_data or not address_data:
+        logger.warning(
+            "CHECKOUT_FAILED: Missing delivery data | "
+            f"client_data={bool(client_data)} address_data={bool(address_data)}"
+        )
+        raise ValueError("Данные для доставки отсутствуют")
+
+    return OrderSnapshot(
+        client=None,
+        name=f"{client_data['last_name']} {client_data['first_name']}",
+        phone=client_data["phone"],
+        email=client_data["email"],
+        address=f"{address_data['city']}, {address_data['post_office']}",
+    )
 
-        address = str(primary_address) if primary_address else "Адрес не указан"
 
-    else:
-        logger.debug("Anonymous checkout")
+def build_order_items(order: Order, cart_items: list[CartItem]) -> list[OrderItem]:
+    return [
+        OrderItem(
+            order=order,
+            product=item.product,
+            quantity=item.quantity,
+            price=item.product.price,
+            snapshot_product=item.product.name,
+        )
+        for item in cart_items
+    ]
 
-        if not client_data or not address_data:
-            logger.warning(
-                "CHECKOUT_FAILED: Missing delivery data | "
-                f"client_data={bool(client_data)} address_data={bool(address_data)}"
-            )
-            raise ValueError("Данные для доставки отсутствуют")
 
-        client = None
-        full_name = f"{client_data['last_name']} {client_data['first_name']}"
-        user_email = client_data["email"]
-        phone = client_data["phone"]
+def create_order_from_cart(cart: Cart, client_data, address_data) -> Order:
+    """
+    Checkout with a fixed number of statements whatever the basket size.
+
+    The cart lines are read once; the total and snapshots are computed from
+    them, then the order, its stock reservations, its items and the first
+    status log entry are each written with a single statement. Order.save()
+    is bypassed, the snapshot above does its work.
+    """
+    logger.info(f"START create_order_from_cart: cart_id={cart.id}")
+
+    cart_items = list(CartItem.objects.select_related("product").filter(cart=cart))
+
+    if not cart_items:
+        logger.warning(f"Cart is empty: cart_id={cart.id}")
+        raise ValueError("Корзина пуста")
 
-        address = f"{address_data['city']}, " f"{address_data['post_office']}"
+    snapshot = get_order_snapshot(cart, client_data, address_data)
+
+    order = Order(
+        client=snapshot.client,
+        cart=cart,
+        status=Status.NEW,
+        stock_reserved=True,
+        snapshot_name=snapshot.name,
+        snapshot_phone=snapshot.phone,
+        snapshot_email=snapshot.email,
+        snapshot_address=snapshot.address,
+    )
+    order_items = build_order_items(order, cart_items)
+    order.total_price = sum(
+        (item.price * item.quantity for item in order_items), Decimal("0.00")
+    )
 
     try:
         with transaction.atomic():
-            logger.debug("Transaction started")
-
-            order = Order.objects.create(
-                client=client,
-                cart=cart,
-                snapshot_name=full_name,
-                snapshot_phone=phone,
-                snapshot_email=user_email,
-                snapshot_address=address,
+            Order.objects.bulk_create([order])
+            reserve_for_order(
+                order, ((item.product.code, item.quantity) for item in cart_items)
             )
-
-            logger.info(f"Order created: order_id={order.id}")
-
-            order_items = []
-
-            for item in cart_items:
-                logger.debug(
-                    f"Processing item: product={item.product.name}, qty={item.quantity}"
-                )
-
-                if item.product.code and item.quantity:
-                    try:
-                        change_stock_product(item.product.code, item.quantity)
-                    except ValueError:
-                        logger.warning(
-                            f"Out of stock: product={item.product.name}, "
-                            f"requested={item.quantity}"
-                        )
-                        raise OutOfStockError(
-                            f"Товара {item.product.name} недостаточно"
-                        )
-
-                order_items.append(
-                    OrderItem(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.price,
-                        snapshot_product=item.product.name,
-                    )
-                )
-
             OrderItem.objects.bulk_create(order_items)
-
-            logger.debug(f"Order items created: count={len(order_items)}")
-
-            order.update_total_price()
-            order.save()
+            OrderStatusLog.objects.bulk_create(
+                [OrderStatusLog(order=order, status=order.status)]
+            )
 
             logger.info(
-                f"Order finalized: order_id={order.id}, total={order.total_price}"
+                f"Order finalized: order_id={order.id}, items={len(order_items)}, "
+                f"total={order.total_price}"
             )
 
     except Exception as e:
@@ -1,48 +1,113 @@
 import logging
+from collections import Counter
+from typing import Iterable
 
-from django.db.models import Exists, F, OuterRef, QuerySet
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, When
 
-from accounts.models import CustomUser
-from cosmetics_shop.models import Favorite, Product
+from cosmetics_shop.models import Product
+from cosmetics_shop.services.catalog_service import sync_catalog_stock
+from utils.custom_exceptions import OutOfStockError, StockShortage
 
 logger = logging.getLogger(__name__)
 
 
 def restore_stock_product(product_code: int, count: int) -> None:
     logger.debug(f"Restoring stock: product_code={product_code}, count={count}")
-    Product.objects.filter(code=product_code).update(stock=F("stock") + count)
+    Product.objects.filter(code=product_code).update(
+        stock=F("stock") + count,
+        is_in_stock=True if count > 0 else Q(stock__gt=-count),
+    )
+    sync_catalog_stock([product_code])
 
 
 def change_stock_product(product_code: int, count: int) -> None:
     logger.debug(f"Stock update attempt: product_code={product_code}, count={count}")
 
+    # SET expressions see the stock before the update
     updated = Product.objects.filter(code=product_code, stock__gte=count).update(
-        stock=F("stock") - count
+        stock=F("stock") - count, is_in_stock=Q(stock__gt=count)
     )
     if not updated:
-        logger.warning(
-            f"Out of stock: product_code={product_code}, " f"requested={count}"
-        )
+        logger.warning(f"Out of stock: product_code={product_code}, requested={count}")
         raise ValueError("Товара недостаточно на складе")
 
+    sync_catalog_stock([product_code])
+
     logger.info(f"Stock updated: product_code={product_code}, decreased_by={count}")
 
 
-def favorites_products(user: CustomUser) -> QuerySet[Product]:
-    logger.debug(f"Fetching favorite products for user_id={user.id}")
+def count_by_code(items: Iterable[tuple[int, int]]) -> Counter:
+    quantities: Counter = Counter()
+    for code, quantity in items:
+        if code and quantity:
+            quantities[int(code)] += quantity
+    return quantities
+
 
-    favorites_subquery = Favorite.objects.filter(user=user, product_id=OuterRef("pk"))
+def quantity_by_code(quantities: Counter) -> Case:
+    return Case(
+        *(When(code=code, then=quantity) for code, quantity in quantities.items()),
+        default=0,
+        output_field=IntegerField(),
+    )
+
+
+@transaction.atomic
+def reserve_stock(items: Iterable[tuple[int, int]]) -> dict[int, int]:
+    """
+    Takes (product code, quantity) lines off stock, all or nothing.
+
+    Rows are locked in primary key order, so checkouts sharing products
+    wait for each other instead of deadlocking, and every short line is
+    reported at once. Returns the remaining stock by product code.
+    """
+    quantities = count_by_code(items)
+    if not quantities:
+        return {}
 
     products = (
-        (
-            Product.objects.filter(is_active=True).annotate(
-                is_favorite=Exists(favorites_subquery)
-            )
+        Product.objects.select_for_update()
+        .filter(code__in=quantities)
+        .order_by("pk")
+        .values_list("code", "name", "stock")
+    )
+    found = {code: (name, stock) for code, name, stock in products}
+
+    shortages = []
+    for code, quantity in quantities.items():
+        name, stock = found.get(code, ("", 0))
+        if quantity > stock:
+            shortages.append(StockShortage(code, name, quantity, stock))
+
+    if shortages:
+        logger.warning(
+            "Out of stock: "
+            + ", ".join(f"{s.code} ({s.requested}/{s.available})" for s in shortages)
         )
-        .order_by("-stock")
-        .for_catalog()
+        raise OutOfStockError.for_shortages(shortages)
+
+    delta = quantity_by_code(quantities)
+    # SET expressions see the stock before the update
+    Product.objects.filter(code__in=quantities).update(
+        stock=F("stock") - delta, is_in_stock=Q(stock__gt=delta)
     )
+    sync_catalog_stock(quantities)
+
+    logger.info(f"Stock reserved: products={len(quantities)}")
 
-    logger.debug("Favorite products queryset prepared")
+    return {code: found[code][1] - quantity for code, quantity in quantities.items()}
+
+
+def release_stock(items: Iterable[tuple[int, int]]) -> None:
+    """Puts (product code, quantity) lines back on stock with one statement"""
+    quantities = count_by_code(items)
+    if not quantities:
+        return
+
+    Product.objects.filter(code__in=quantities).update(
+        stock=F("stock") + quantity_by_code(quantities), is_in_stock=True
+    )
+    sync_catalog_stock(quantities)
 
-    return products
+    logger.info(f"Stock released: products={len(quantities)}")
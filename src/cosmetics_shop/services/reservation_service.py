@@ -0,0 +1,266 @@
+import logging
+from datetime import timedelta
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from cosmetics_shop.models import Order, Product, StockReservation
+from cosmetics_shop.services.catalog_service import sync_catalog_stock
+from cosmetics_shop.services.product_service import (
+    count_by_code,
+    quantity_by_code,
+)
+from utils.custom_exceptions import OutOfStockError, StockShortage
+
+logger = logging.getLogger(__name__)
+
+# Renewed on every update of the order, an unpaid order expires once
+# none of its holds is live (see cleanup_service.get_expired_orders)
+RESERVATION_TTL = timedelta(minutes=30)
+
+RESERVED_KEY = "stock:reserved:{product_id}"
+RESERVED_TIMEOUT = 60  # 1 minute, reservations are checked again under lock
+
+
+def invalidate_reserved(product_ids: Iterable[int]) -> None:
+    """
+    Drops the cached counts once the transaction commits, a reader in
+    between would cache the old count again
+    """
+    keys = [RESERVED_KEY.format(product_id=pk) for pk in product_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_reserved_quantities(product_ids: Iterable[int]) -> dict[int, int]:
+    """Quantity held by active reservations by product id, cached per product"""
+    keys = {RESERVED_KEY.format(product_id=pk): pk for pk in set(product_ids)}
+    if not keys:
+        return {}
+
+    reserved = {keys[key]: value for key, value in cache.get_many(keys).items()}
+
+    missing = set(keys.values()) - reserved.keys()
+    if missing:
+        counts = dict(
+            StockReservation.objects.filter(
+                product_id__in=missing, expires_at__gt=timezone.now()
+            )
+            .values("product_id")
+            .annotate(total=Sum("quantity"))
+            .values_list("product_id", "total")
+        )
+        fetched = {pk: counts.get(pk, 0) for pk in missing}
+        cache.set_many(
+            {RESERVED_KEY.format(product_id=pk): v for pk, v in fetched.items()},
+            timeout=RESERVED_TIMEOUT,
+        )
+        reserved.update(fetched)
+
+    return reserved
+
+
+def get_available_stock(product) -> int:
+    """
+    On-hand stock of a Product or CartProduct less active reservations,
+    for limits outside checkout
+    """
+    reserved = get_reserved_quantities([product.pk])[product.pk]
+    return max(product.stock - reserved, 0)
+
+
+@transaction.atomic
+def reserve_for_order(order: Order, items: Iterable[tuple[int, int]]) -> None:
+    """
+    Holds (product code, quantity) lines for the order until RESERVATION_TTL.
+
+    Replaces the order's previous reservations. Products are locked in
+    primary key order and every short line is reported at once, stock
+    itself is only taken by commit_reservations().
+    """
+    quantities = count_by_code(items)
+    now = timezone.now()
+
+    products = list(
+        Product.objects.select_for_update()
+        .filter(code__in=quantities)
+        .order_by("pk")
+        .only("pk", "code", "name", "stock")
+    )
+    by_code = {product.code: product for product in products}
+
+    # Other orders only, this order's holds are being replaced
+    held = dict(
+        StockReservation.objects.filter(product__in=products, expires_at__gt=now)
+        .exclude(order=order)
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+
+    shortages = []
+    for code, quantity in quantities.items():
+        product = by_code.get(code)
+        available = max(product.stock - held.get(product.pk, 0), 0) if product else 0
+        if quantity > available:
+            name = product.name if product else ""
+            shortages.append(StockShortage(code, name, quantity, available))
+    if shortages:
+        logger.warning(
+            f"Reservation failed: order_id={order.pk}, "
+            f"short={[shortage.code for shortage in shortages]}"
+        )
+        raise OutOfStockError.for_shortages(shortages)
+
+    previous = set(order.stock_reservations.values_list("product_id", flat=True))
+    expires_at = now + RESERVATION_TTL
+    StockReservation.objects.filter(order=order).exclude(product__in=products).delete()
+    StockReservation.objects.bulk_create(
+        [
+            StockReservation(
+                order=order,
+                product=by_code[code],
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for code, quantity in quantities.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["order", "product"],
+        update_fields=["quantity", "expires_at"],
+    )
+
+    if not order.stock_reserved:
+        order.stock_reserved = True
+        Order.objects.filter(pk=order.pk).update(stock_reserved=True)
+
+    changed = previous | {product.pk for product in products}
+    invalidate_reserved(changed)
+    sync_catalog_stock(
+        Product.objects.filter(pk__in=changed).values_list("code", flat=True)
+    )
+
+    logger.info(
+        f"Stock reserved: order_id={order.pk}, products={len(quantities)}, "
+        f"expires_at={expires_at.isoformat()}"
+    )
+
+
+def renew_reservations(order: Order) -> bool:
+    """
+    Extends the order's live holds by RESERVATION_TTL. False when any of
+    them has expired already, stock then has to be checked again.
+    """
+    now = timezone.now()
+    reservations = order.stock_reservations.all()
+
+    total = reservations.count()
+    renewed = reservations.filter(expires_at__gt=now).update(
+        expires_at=now + RESERVATION_TTL
+    )
+
+    logger.debug(f"Reservations renewed: order_id={order.pk}, count={renewed}")
+
+    return total > 0 and renewed == total
+
+
+@transaction.atomic
+def commit_reservations(order: Order) -> None:
+    """
+    Turns the order's holds into stock decrements once it is paid.
+
+    The order lines are taken, not the reservations: a payment arriving
+    after its hold expired still takes the stock, never below zero.
+    """
+    if not order.stock_reserved:
+        return
+
+    # Dropped first, the catalog must not count them next to the decrement
+    order.stock_reservations.all().delete()
+    order.stock_reserved = False
+    Order.objects.filter(pk=order.pk).update(stock_reserved=False)
+
+    take_order_stock(order)
+
+    logger.info(f"Reservations committed: order_id={order.pk}")
+
+
+@transaction.atomic
+def take_order_stock(order: Order) -> None:
+    """Takes the order lines off stock, clamped at zero for lines oversold"""
+    quantities = count_by_code(
+        order.order_items.filter(product__isnull=False).values_list(
+            "product__code", "quantity"
+        )
+    )
+
+    # Locked in primary key order like reserve_for_order()
+    product_ids = list(
+        Product.objects.select_for_update()
+        .filter(code__in=quantities)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+    delta = quantity_by_code(quantities)
+    short = list(
+        Product.objects.filter(code__in=quantities, stock__lt=delta).values_list(
+            "code", flat=True
+        )
+    )
+    for code in short:
+        logger.error(f"Paid order oversells stock: order_id={order.pk}, code={code}")
+
+    Product.objects.filter(code__in=quantities, stock__gte=delta).update(
+        stock=F("stock") - delta, is_in_stock=Q(stock__gt=delta)
+    )
+    Product.objects.filter(code__in=short).update(stock=0, is_in_stock=False)
+
+    invalidate_reserved(product_ids)
+    sync_catalog_stock(quantities)
+
+
+def release_reservations(order: Order) -> None:
+    """Drops the holds of an order that will not be paid"""
+    release_order_reservations([order.pk])
+    order.stock_reserved = False
+
+    logger.info(f"Reservations released: order_id={order.pk}")
+
+
+def release_order_reservations(order_ids: list[int]) -> None:
+    """Drops the holds of several orders with one delete"""
+    reservations = StockReservation.objects.filter(order_id__in=order_ids)
+    product_ids = set(reservations.values_list("product_id", flat=True))
+    reservations.delete()
+    Order.objects.filter(pk__in=order_ids, stock_reserved=True).update(
+        stock_reserved=False
+    )
+
+    if product_ids:
+        invalidate_reserved(product_ids)
+        sync_catalog_stock(
+            Product.objects.filter(pk__in=product_ids).values_list("code", flat=True)
+        )
+
+
+def expire_stock_reservations(now=None) -> int:
+    """Deletes every reservation past its expiry with one statement"""
+    expired = StockReservation.objects.filter(expires_at__lte=now or timezone.now())
+
+    product_ids = set(expired.values_list("product_id", flat=True))
+    if not product_ids:
+        return 0
+
+    deleted, _ = expired.delete()
+
+    invalidate_reserved(product_ids)
+    sync_catalog_stock(
+        Product.objects.filter(pk__in=product_ids).values_list("code", flat=True)
+    )
+
+    logger.info(f"Stock reservations expired: count={deleted}")
+
+    return deleted
@@ -0,0 +1,212 @@
+import logging
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import F, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from cosmetics_shop.models import Product
+
+logger = logging.getLogger(__name__)
+
+MIN_TRIGRAM_LENGTH = 3
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def split_terms(query: str) -> list[str]:
+    return re.findall(r"\w+", query)
+
+
+class BaseSearchBackend:
+    """
+    Product search over name and description.
+
+    search() restricts any queryset whose primary key is the product id
+    (Product, CatalogEntry), rank() annotates a Product queryset with
+    search_rank and orders it by relevance.
+    """
+
+    def match_ids(self, query: str):
+        raise NotImplementedError
+
+    def rank_expression(self, query: str):
+        return Value(0.0, output_field=FloatField())
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        query = normalize_query(query)
+        if not query:
+            return queryset
+        return queryset.filter(pk__in=self.match_ids(query))
+
+    def rank(self, queryset: QuerySet, query: str) -> QuerySet:
+        query = normalize_query(query)
+        if not query:
+            return queryset
+        return queryset.annotate(search_rank=self.rank_expression(query)).order_by(
+            "-search_rank", "-pk"
+        )
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Fallback for databases without full-text support"""
+
+    def match_ids(self, query):
+        return self.filter_terms(Product.objects.all(), split_terms(query)).values("pk")
+
+    @staticmethod
+    def filter_terms(queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(
+                Q(name__icontains=term) | Q(description__icontains=term)
+            )
+        return queryset
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Weighted tsvector match plus pg_trgm similarity on the name.
+
+    Both expressions are backed by GIN indexes created in the
+    product_search_indexes migration, the expressions here must stay
+    identical to the indexed ones.
+    """
+
+    config = "simple"
+
+    def search_vector(self):
+        return SearchVector("name", weight="A", config=self.config) + SearchVector(
+            "description", weight="B", config=self.config
+        )
+
+    def search_query(self, query):
+        return SearchQuery(query, config=self.config, search_type="websearch")
+
+    def match_ids(self, query):
+        return (
+            Product.objects.annotate(search=self.search_vector())
+            .filter(
+                Q(search=self.search_query(query))
+                | Q(name__trigram_similar=query)
+                | Q(name__icontains=query)
+            )
+            .values("pk")
+        )
+
+    def rank_expression(self, query):
+        return SearchRank(
+            self.search_vector(), self.search_query(query)
+        ) + TrigramSimilarity(F("name"), query)
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    FTS5 index with the trigram tokenizer, an offline stand-in for pg_trgm.
+
+    The virtual table is an external content table over the product table
+    kept up to date by triggers; create_search_index() creates it after every
+    migrate, so it also exists in test databases built without migrations.
+    """
+
+    table = "product_search"
+
+    def ensure_index(self, using=DEFAULT_DB_ALIAS):
+        product_table = Product._meta.db_table
+
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [self.table],
+            )
+            if cursor.fetchone():
+                return
+
+            logger.info("Creating SQLite product search index")
+
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {self.table} USING fts5("
+                f"name, description, content='{product_table}', "
+                f"content_rowid='id', tokenize='trigram')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER {self.table}_ai AFTER INSERT ON {product_table} "
+                f"BEGIN INSERT INTO {self.table}(rowid, name, description) "
+                f"VALUES (new.id, new.name, new.description); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER {self.table}_ad AFTER DELETE ON {product_table} "
+                f"BEGIN INSERT INTO {self.table}({self.table}, rowid, name, "
+                f"description) VALUES ('delete', old.id, old.name, "
+                f"old.description); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER {self.table}_au AFTER UPDATE OF name, description "
+                f"ON {product_table} BEGIN INSERT INTO {self.table}({self.table}, "
+                f"rowid, name, description) VALUES ('delete', old.id, old.name, "
+                f"old.description); INSERT INTO {self.table}(rowid, name, "
+                f"description) VALUES (new.id, new.name, new.description); END"
+            )
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def fts_query(self, query):
+        terms = [term for term in split_terms(query) if len(term) >= MIN_TRIGRAM_LENGTH]
+        if not terms:
+            return None
+        return " ".join(f'"{term}"' for term in terms)
+
+    def match_ids(self, query):
+        # The trigram tokenizer can't match terms shorter than three chars
+        short_terms = [
+            term for term in split_terms(query) if len(term) < MIN_TRIGRAM_LENGTH
+        ]
+        products = SimpleSearchBackend.filter_terms(Product.objects.all(), short_terms)
+
+        fts_query = self.fts_query(query)
+        if fts_query is not None:
+            products = products.filter(
+                pk__in=RawSQL(
+                    f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+                    [fts_query],
+                )
+            )
+
+        return products.values("pk")
+
+    def rank_expression(self, query):
+        fts_query = self.fts_query(query)
+        if fts_query is None:
+            return super().rank_expression(query)
+
+        product_table = Product._meta.db_table
+        return RawSQL(
+            f"SELECT -bm25({self.table}) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid = {product_table}.id",
+            [fts_query],
+            output_field=FloatField(),
+        )
+
+
+SEARCH_BACKENDS: dict[str, type[BaseSearchBackend]] = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend() -> BaseSearchBackend:
+    backend_class = SEARCH_BACKENDS.get(connection.vendor, SimpleSearchBackend)
+    return backend_class()
+
+
+def create_search_index(using=DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """post_migrate handler, search requests never check for the index"""
+    backend_class = SEARCH_BACKENDS.get(connections[using].vendor)
+    if backend_class is SQLiteSearchBackend:
+        backend_class().ensure_index(using)
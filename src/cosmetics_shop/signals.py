@@ -0,0 +1,92 @@
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from cosmetics_shop.models import Brand, Category, GroupProduct, Product, Tag
+from cosmetics_shop.services.cache_service import (
+    MODEL_NAMESPACES,
+    bump_cache_versions,
+)
+from cosmetics_shop.services.catalog_service import (
+    sync_brand_entries,
+    sync_catalog_entries,
+    sync_category_entries,
+    sync_group_entries,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync_catalog_entries([instance.pk])
+
+
+@receiver(post_save, sender=Brand)
+def brand_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    sync_brand_entries(instance)
+
+
+@receiver(post_save, sender=GroupProduct)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    sync_group_entries(instance)
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    sync_category_entries(instance)
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def product_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # The tag side does not report which products lose it
+        instance._catalog_product_ids = list(
+            instance.products.values_list("pk", flat=True)
+        )
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        product_ids = [instance.pk]
+    elif action == "post_clear":
+        product_ids = getattr(instance, "_catalog_product_ids", [])
+    else:
+        product_ids = list(pk_set or [])
+
+    sync_catalog_entries(product_ids)
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    instance._catalog_product_ids = list(instance.products.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    sync_catalog_entries(getattr(instance, "_catalog_product_ids", []))
+
+
+def catalog_model_changed(sender, raw=False, action=None, **kwargs):
+    if raw or action not in (None, "post_add", "post_remove", "post_clear"):
+        return
+    bump_cache_versions(*MODEL_NAMESPACES[sender])
+
+
+for model in MODEL_NAMESPACES:
+    if model._meta.auto_created:
+        m2m_changed.connect(catalog_model_changed, sender=model)
+    else:
+        post_save.connect(catalog_model_changed, sender=model)
+        post_delete.connect(catalog_model_changed, sender=model)
@@ -295,12 +295,33 @@ function updateContent(url) {
             sortingPanel.innerHTML = data.sorting_html;
         }
 
-        // 3. Обновляем URL
+        // 3. Отмечаем избранное и товары в корзине пользователя
+        applyUserOverlay(data);
+
+        // 4. Обновляем URL
         history.pushState(null, "", data.url);
     })
     .catch(error => console.error('Error:', error));
 }
 
+// HTML списка товаров общий для всех, состояние пользователя приходит отдельно
+function applyUserOverlay(data) {
+    (data.favorite_ids || []).forEach(productId => {
+        const button = document.querySelector(`.favorite-btn[data-product-id="${productId}"]`);
+        if (button) button.classList.add("active");
+    });
+
+    (data.cart_products || []).forEach(productId => {
+        const button = document.querySelector(`.js-cart-btn-list[data-product-id="${productId}"]`);
+        if (!button) return;
+
+        button.textContent = "В корзине";
+        button.classList.remove("btn-success", "js-cart-btn-list");
+        button.classList.add("btn-primary", "disabled");
+        button.disabled = true;
+    });
+}
+
 // === ЛОГИКА СОРТИРОВКИ ===
 document.addEventListener("click", function (e) {
     // Ищем клик внутри контейнера сортировки
@@ -332,6 +353,7 @@ document.addEventListener("click", function (e) {
 
     // Сбрасываем пагинацию при смене сортировки
     currentParams.delete("page");
+    currentParams.delete("cursor");
 
     updateContent(`?${currentParams.toString()}`);
 });
@@ -366,6 +388,7 @@ document.addEventListener("submit", function (e) {
 
         // Сбрасываем пагинацию при фильтрации
         newParams.delete("page");
+        newParams.delete("cursor");
 
         updateContent(`?${newParams.toString()}`);
     }
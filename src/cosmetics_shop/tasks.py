@@ -1,12 +1,13 @@
 import logging
-from datetime import timedelta
 
 from celery import shared_task
-from django.db import transaction
-from django.utils import timezone
 
-from cosmetics_shop.models import Order, Payment, Status
-from cosmetics_shop.services.product_service import restore_stock_product
+from cosmetics_shop.services.cleanup_service import (
+    expire_unpaid_orders,
+    purge_abandoned_carts,
+)
+from cosmetics_shop.services.image_service import process_product_image
+from cosmetics_shop.services.reservation_service import expire_stock_reservations
 
 logger = logging.getLogger(__name__)
 
@@ -14,51 +15,36 @@ logger = logging.getLogger(__name__)
 @shared_task
 def cleanup_expired_orders():
     """
-    Cancels unpaid orders created more than 30 minutes ago
-    and returns the items to the warehouse.
+    Cancels unpaid orders whose stock holds have expired (older orders
+    after 30 minutes) and returns the items to the warehouse.
     """
-    expiry_threshold = timezone.now() - timedelta(minutes=30)
+    expire_stock_reservations()
 
-    expired_orders = (
-        Order.objects.filter(
-            status__in=[Status.NEW, Status.PAYMENT_FAILED],
-            created_at__lt=expiry_threshold,
-        )
-        .exclude(payments__method=Payment.PaymentMethod.CASH)
-        .distinct()
-    )
-
-    if not expired_orders.exists():
+    result = expire_unpaid_orders()
+    if not result.orders:
         return "No expired orders found."
 
-    count = 0
-    for order in expired_orders:
-        try:
-            with transaction.atomic():
-                order = Order.objects.select_for_update().get(pk=order.pk)
-
-                if order.is_paid():
-                    continue
-
-                logger.info(f"Expiring order {order.code}...")
+    return f"Successfully expired {result.orders} orders."
 
-                for item in order.order_items.select_related("product"):
-                    if item.product:
-                        restore_stock_product(item.product.code, item.quantity)
-                        logger.debug(f"Restored {item.quantity} of {item.product.name}")
 
-                order.set_status(
-                    new_status=Status.CANCELED,
-                    comment="Order expired: payment not received within 30 minutes.",
-                )
-
-                order.payments.filter(status=Payment.PaymentStatus.PENDING).update(
-                    status=Payment.PaymentStatus.FAILED
-                )
-
-                count += 1
+@shared_task
+def process_product_image_task(product_id: int):
+    """
+    Generates thumbnails and WebP/AVIF variants of a product image.
+    """
+    if process_product_image(product_id):
+        return f"Image variants created for product {product_id}."
+    return f"Image variants skipped for product {product_id}."
 
-        except Exception as e:
-            logger.error(f"Failed to expire order {order.code}: {e}")
 
-    return f"Successfully expired {count} orders."
+@shared_task
+def cleanup_abandoned_carts():
+    """
+    Deletes abandoned anonymous carts and expired sessions in small batches.
+    Whatever does not fit in the time budget is left for the next run.
+    """
+    result = purge_abandoned_carts()
+    return (
+        f"Deleted {result.carts} carts, {result.cart_items} cart items "
+        f"and {result.sessions} sessions."
+    )
@@ -1,5 +1,7 @@
 from django import template
 
+from cosmetics_shop.services.image_service import get_image_sources
+
 register = template.Library()
 
 
@@ -27,3 +29,11 @@ def add_class(field, css_class):
     Добавляет CSS-класс к полю формы.
     """
     return field.as_widget(attrs={"class": css_class})
+
+
+@register.filter
+def image_sources(obj):
+    """
+    Варианты изображения товара для <picture>, пусто пока они не готовы.
+    """
+    return get_image_sources(obj)
@@ -3,9 +3,11 @@ from decimal import Decimal
 
 import pytest
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
 from django.utils import timezone
 
 from accounts.models import CustomUser
+from utils.cache_utils import clear_local_caches
 
 from ..models import (
     Brand,
@@ -169,6 +171,15 @@ def mock_env(mocker):
     )
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    clear_local_caches()
+    yield
+    cache.clear()
+    clear_local_caches()
+
+
 def add_session(request):
     middleware = SessionMiddleware(lambda r: None)
     middleware.process_request(request)
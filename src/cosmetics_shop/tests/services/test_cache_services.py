@@ -0,0 +1,77 @@
+import pytest
+
+from cosmetics_shop.models import Brand, Tag
+from cosmetics_shop.services.cache_service import (
+    BRANDS,
+    CATALOG,
+    MENU,
+    TAGS,
+    bump_cache_versions,
+    get_cache_versions,
+    versioned_key,
+)
+from cosmetics_shop.utils.context_utils import context_categories, menu_cache
+
+
+@pytest.mark.django_db
+def test_bump_changes_only_given_namespace(django_capture_on_commit_callbacks):
+    before = get_cache_versions(MENU, CATALOG)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        bump_cache_versions(MENU)
+        # Readers keep the old version until the commit
+        assert get_cache_versions(MENU) == {MENU: before[MENU]}
+
+    after = get_cache_versions(MENU, CATALOG)
+    assert after[MENU] == before[MENU] + 1
+    assert after[CATALOG] == before[CATALOG]
+
+
+@pytest.mark.django_db
+def test_versioned_key_changes_after_bump(django_capture_on_commit_callbacks):
+    key = versioned_key("menu", MENU)
+    assert key == versioned_key("menu", MENU)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        bump_cache_versions(MENU)
+
+    assert key != versioned_key("menu", MENU)
+
+
+@pytest.mark.django_db
+def test_group_rename_refreshes_menu(group, django_capture_on_commit_callbacks):
+    context_categories()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        group.name = "Renamed Group"
+        group.save()
+
+    groups = [g.name for item in context_categories() for g in item["groups"]]
+    assert "Renamed Group" in groups
+
+
+@pytest.mark.django_db
+def test_model_changes_bump_versions(product, tag, django_capture_on_commit_callbacks):
+    before = get_cache_versions(BRANDS, TAGS, CATALOG)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Brand.objects.create(name="New Brand")
+        product.tags.remove(tag)
+        Tag.objects.filter(pk=tag.pk).delete()
+
+    after = get_cache_versions(BRANDS, TAGS, CATALOG)
+    assert after[BRANDS] > before[BRANDS]
+    assert after[TAGS] > before[TAGS]
+    assert after[CATALOG] > before[CATALOG]
+
+
+@pytest.mark.django_db
+def test_menu_loaded_from_shared_cache(group, django_assert_num_queries):
+    context_categories()
+    menu_cache.clear_local()
+
+    with django_assert_num_queries(0):
+        menu = context_categories()
+
+    assert menu[0]["category"].slug == group.category.slug
+    assert [g.name for g in menu[0]["groups"]] == [group.name]
@@ -1,16 +1,22 @@
+from decimal import Decimal
+
 import pytest
+from django.urls import reverse
 
 from cosmetics_shop.models import Cart, CartItem
 from cosmetics_shop.services.cart_services import (
     add_product_to_cart,
+    build_cart_summary,
     clear_cart_after_order,
     delete_cart,
     delete_product_from_cart,
     get_cart_total_price,
     get_id_products_in_cart,
     is_product_in_cart,
+    merge_carts,
     remove_product_from_cart,
 )
+from cosmetics_shop.services.reservation_service import reserve_for_order
 
 
 @pytest.mark.django_db
@@ -91,3 +97,118 @@ def test_clear_cart_after_order(user, product):
     CartItem.objects.create(cart=cart, product=product, quantity=2)
     clear_cart_after_order(cart)
     assert not CartItem.objects.filter(cart=cart)
+
+
+@pytest.mark.django_db
+def test_build_cart_summary(cart, products, django_assert_num_queries):
+    first, second = products[:2]
+    CartItem.objects.create(cart=cart, product=first, quantity=2)
+    CartItem.objects.create(cart=cart, product=second, quantity=1)
+
+    with django_assert_num_queries(1):
+        summary = build_cart_summary(cart)
+
+    assert summary.count == 3
+    assert summary.total_price == first.price * 2 + second.price
+    assert summary.product_ids == [first.pk, second.pk]
+    assert summary.get_line(first.code).quantity == 2
+    assert summary.get_line(999) is None
+
+
+@pytest.mark.django_db
+def test_build_cart_summary_is_cached(cart, product, django_assert_num_queries):
+    CartItem.objects.create(cart=cart, product=product, quantity=2)
+    build_cart_summary(cart)
+
+    with django_assert_num_queries(0):
+        summary = build_cart_summary(cart)
+
+    line = summary.get_line(product.code)
+    assert line.product.price == Decimal("100.50")
+    assert line.item_id == CartItem.objects.get(cart=cart).pk
+
+
+@pytest.mark.django_db
+def test_build_cart_summary_after_cart_change(cart, product):
+    assert build_cart_summary(cart).count == 0
+
+    add_product_to_cart(cart, product.code)
+    add_product_to_cart(cart, product.code)
+    assert build_cart_summary(cart).count == 2
+
+    remove_product_from_cart(cart, product.code)
+    assert build_cart_summary(cart).count == 1
+
+    delete_cart(cart)
+    assert build_cart_summary(cart).lines == ()
+
+
+@pytest.mark.django_db
+def test_build_cart_summary_after_catalog_change(
+    cart, product, django_capture_on_commit_callbacks
+):
+    CartItem.objects.create(cart=cart, product=product, quantity=1)
+    build_cart_summary(cart)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product.price = 10
+        product.save()
+
+    assert build_cart_summary(cart).total_price == Decimal("10")
+
+
+@pytest.mark.django_db
+def test_build_cart_summary_without_cart():
+    summary = build_cart_summary(None)
+
+    assert summary.count == 0
+    assert summary.total_price == 0
+
+
+@pytest.mark.django_db
+def test_merge_carts(cart, products, django_assert_num_queries):
+    first, second, third = products[:3]
+    session_cart = Cart.objects.create(session_key="abc")
+    CartItem.objects.create(cart=cart, product=first, quantity=1)
+    CartItem.objects.create(cart=session_cart, product=first, quantity=2)
+    CartItem.objects.create(cart=session_cart, product=second, quantity=12)
+    CartItem.objects.create(cart=session_cart, product=third, quantity=1)
+    build_cart_summary(cart)
+
+    merge_carts(session_cart, cart)
+
+    assert not Cart.objects.filter(session_key="abc").exists()
+    assert build_cart_summary(cart).product_ids == [first.pk, second.pk]
+    assert build_cart_summary(cart).get_line(first.code).quantity == 3
+    assert build_cart_summary(cart).get_line(second.code).quantity == second.stock
+
+
+@pytest.mark.django_db
+def test_cart_line_max_quantity_counts_reservations(
+    cart, product, order_factory, django_capture_on_commit_callbacks
+):
+    CartItem.objects.create(cart=cart, product=product, quantity=2)
+    line = build_cart_summary(cart).get_line(product.code)
+    assert not line.is_max_quantity
+
+    with django_capture_on_commit_callbacks(execute=True):
+        reserve_for_order(order_factory(), [(product.code, product.stock - 2)])
+
+    # The cached summary does not hide the new hold
+    line = build_cart_summary(cart).get_line(product.code)
+    assert line.is_max_quantity
+
+
+@pytest.mark.django_db
+def test_cart_page_disables_plus_at_available_stock(
+    client, user, product, order_factory
+):
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.create(cart=cart, product=product, quantity=2)
+    reserve_for_order(order_factory(), [(product.code, product.stock - 2)])
+    client.force_login(user)
+
+    response = client.get(reverse("cart"))
+
+    [item] = response.context["cart_items"]
+    assert item.available_stock == 2
@@ -0,0 +1,162 @@
+import pytest
+from django.urls import reverse
+
+from cosmetics_shop.models import Cart, CartItem
+from cosmetics_shop.services.cart_services import get_cart_items
+from cosmetics_shop.services.cart_store import (
+    RedisCartStore,
+    SessionCart,
+    get_cart_store,
+    get_redis_cart_store,
+)
+from cosmetics_shop.utils.cart_utils import (
+    CART_TOKEN_SESSION_KEY,
+    get_cart,
+    persist_session_cart,
+)
+
+
+@pytest.fixture
+def session_store(settings):
+    settings.CART_SESSION_STORE = "cache"
+
+
+def add_to_cart(client, product, times=1):
+    for _ in range(times):
+        response = client.post(
+            reverse("ajax_add_to_cart"), {"product_code": product.code}
+        )
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_anonymous_cart_stays_out_of_database(client, product, session_store):
+    data = add_to_cart(client, product, times=2)
+
+    assert data["count"] == 2
+    assert data["product_count"] == 2
+    assert data["total_price"] == float(product.price * 2)
+    assert not Cart.objects.exists()
+    assert CART_TOKEN_SESSION_KEY in client.session
+
+
+@pytest.mark.django_db
+def test_quantity_clamped_to_stock(client, product, session_store):
+    data = add_to_cart(client, product, times=product.stock + 2)
+
+    assert data["product_count"] == product.stock
+    assert data["is_max_quantity"] is True
+
+
+@pytest.mark.django_db
+def test_remove_keeps_at_least_one(client, product, session_store):
+    add_to_cart(client, product, times=2)
+
+    for _ in range(3):
+        response = client.post(
+            reverse("ajax_cart_remove"), {"product_code": product.code}
+        )
+
+    assert response.json()["product_count"] == 1
+
+
+@pytest.mark.django_db
+def test_session_cart_persisted_on_checkout(rf, client, product, session_store):
+    add_to_cart(client, product, times=3)
+
+    request = rf.get("/")
+    request.user = type("AnonymousUser", (), {"is_authenticated": False})()
+    request.session = client.session
+
+    cart = get_cart(request)
+    assert isinstance(cart, SessionCart)
+    assert [(item.product, item.quantity) for item in get_cart_items(cart)] == [
+        (product, 3)
+    ]
+
+    persist_session_cart(request)
+
+    cart = get_cart(request)
+    assert isinstance(cart, Cart)
+    assert cart.session_key == request.session.session_key
+    assert CartItem.objects.get(cart=cart, product=product).quantity == 3
+    assert CART_TOKEN_SESSION_KEY not in request.session
+
+
+@pytest.mark.django_db
+def test_session_cart_moves_to_user_on_login(client, user, product, session_store):
+    add_to_cart(client, product, times=2)
+
+    client.login(email=user.email, password="12345678")
+
+    item = CartItem.objects.get(cart__user=user)
+    assert item.product == product
+    assert item.quantity == 2
+    assert CART_TOKEN_SESSION_KEY not in client.session
+
+
+@pytest.mark.django_db
+def test_session_cart_added_to_user_cart_on_login(
+    client, user, cart, products, session_store
+):
+    first, second = products[0], products[1]
+    CartItem.objects.create(cart=cart, product=first, quantity=2)
+    CartItem.objects.create(cart=cart, product=second, quantity=1)
+    add_to_cart(client, first, times=2)
+
+    client.login(email=user.email, password="12345678")
+
+    # Summed like merge_carts() does for database carts
+    assert dict(cart.cart_items.values_list("product", "quantity")) == {
+        first.pk: 4,
+        second.pk: 1,
+    }
+
+
+@pytest.fixture
+def redis_store():
+    fakeredis = pytest.importorskip("fakeredis")
+    # Lua scripts need lupa next to fakeredis
+    pytest.importorskip("lupa")
+    return RedisCartStore(fakeredis.FakeRedis())
+
+
+@pytest.mark.django_db
+def test_redis_store_increment_stops_at_limit(redis_store):
+    assert redis_store.increment("token", 101, limit=2) == 1
+    assert redis_store.increment("token", 101, limit=2) == 2
+    assert redis_store.increment("token", 101, limit=2) is None
+    assert redis_store.increment("token", 102, limit=0) is None
+
+    assert redis_store.get_quantities("token") == {101: 2}
+    assert redis_store.client.ttl(redis_store.key("token")) > 0
+
+
+@pytest.mark.django_db
+def test_redis_store_decrement_delete_clear(redis_store):
+    for code in (101, 101, 102):
+        redis_store.increment("token", code, limit=5)
+
+    redis_store.decrement("token", 101)
+    redis_store.decrement("token", 101)
+    redis_store.decrement("token", 102)
+    assert redis_store.get_quantities("token") == {101: 1, 102: 1}
+
+    redis_store.delete("token", 102)
+    assert redis_store.get_quantities("token") == {101: 1}
+
+    redis_store.clear("token")
+    assert redis_store.get_quantities("token") == {}
+
+
+@pytest.mark.django_db
+def test_redis_store_built_once(settings):
+    settings.CART_SESSION_STORE = "redis"
+    settings.REDIS_URL = "redis://localhost:6379/1"
+    get_redis_cart_store.cache_clear()
+
+    store = get_cart_store()
+
+    assert isinstance(store, RedisCartStore)
+    assert get_cart_store() is store
+    get_redis_cart_store.cache_clear()
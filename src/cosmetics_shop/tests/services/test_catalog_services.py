@@ -0,0 +1,90 @@
+import pytest
+
+from cosmetics_shop.models import CatalogEntry, Product, Tag
+from cosmetics_shop.services.catalog_service import rebuild_catalog
+from cosmetics_shop.services.product_service import (
+    change_stock_product,
+    restore_stock_product,
+)
+
+
+@pytest.mark.django_db
+def test_entry_created_with_product(product, group, brand, tag):
+    entry = CatalogEntry.objects.get(pk=product.pk)
+
+    assert entry.code == product.code
+    assert entry.name == product.name
+    assert entry.group_slug == group.slug
+    assert entry.category_slug == group.category.slug
+    assert entry.brand_name == brand.name
+    assert entry.tag_ids == [tag.pk]
+    assert entry.in_stock is True
+
+
+@pytest.mark.django_db
+def test_entry_follows_product_save(product):
+    product.price = 999
+    product.stock = 0
+    product.save()
+
+    entry = CatalogEntry.objects.get(pk=product.pk)
+
+    assert entry.price == 999
+    assert entry.in_stock is False
+
+
+@pytest.mark.django_db
+def test_entry_follows_stock_updates(product):
+    change_stock_product(product.code, product.stock)
+    assert CatalogEntry.objects.get(pk=product.pk).in_stock is False
+
+    restore_stock_product(product.code, 2)
+    entry = CatalogEntry.objects.get(pk=product.pk)
+    assert entry.stock == 2
+    assert entry.in_stock is True
+
+
+@pytest.mark.django_db
+def test_entry_follows_brand_and_group_rename(product, brand, group):
+    brand.name = "Renamed Brand"
+    brand.slug = "renamed-brand"
+    brand.save()
+    group.name = "Renamed Group"
+    group.save()
+
+    entry = CatalogEntry.objects.get(pk=product.pk)
+
+    assert entry.brand_name == "Renamed Brand"
+    assert entry.brand_slug == "renamed-brand"
+    assert entry.group_name == "Renamed Group"
+
+
+@pytest.mark.django_db
+def test_entry_follows_tag_changes(product, tag):
+    new_tag = Tag.objects.create(name="New Tag")
+
+    product.tags.add(new_tag)
+    assert CatalogEntry.objects.get(pk=product.pk).tag_ids == [tag.pk, new_tag.pk]
+
+    new_tag.products.clear()
+    assert CatalogEntry.objects.get(pk=product.pk).tag_ids == [tag.pk]
+
+    tag.delete()
+    assert CatalogEntry.objects.get(pk=product.pk).tag_ids == []
+
+
+@pytest.mark.django_db
+def test_entry_deleted_with_product(product):
+    Product.objects.filter(pk=product.pk).delete()
+
+    assert not CatalogEntry.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_catalog(products):
+    CatalogEntry.objects.all().delete()
+
+    total = rebuild_catalog(batch_size=3)
+
+    assert total == products.count()
+    assert CatalogEntry.objects.count() == products.count()
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+from cosmetics_shop.models import Cart, CartItem
+from cosmetics_shop.services.cleanup_service import (
+    get_abandoned_carts,
+    purge_abandoned_carts,
+)
+
+
+def make_session(key, expires_in):
+    return Session.objects.create(
+        session_key=key,
+        session_data="",
+        expire_date=timezone.now() + expires_in,
+    )
+
+
+def make_cart(product, age_days, session_key=None, user=None):
+    cart = Cart.objects.create(session_key=session_key, user=user)
+    CartItem.objects.create(cart=cart, product=product, quantity=1)
+    Cart.objects.filter(pk=cart.pk).update(
+        created_at=timezone.now() - timedelta(days=age_days)
+    )
+    return cart
+
+
+@pytest.mark.django_db
+def test_get_abandoned_carts(user, product):
+    make_session("live", timedelta(days=1))
+    make_session("expired", -timedelta(days=1))
+
+    abandoned = make_cart(product, 40, session_key="expired")
+    orphan = make_cart(product, 40, session_key="missing")
+    make_cart(product, 40, session_key="live")
+    make_cart(product, 1, session_key="recent")
+    make_cart(product, 40, user=user)
+
+    assert set(get_abandoned_carts()) == {abandoned, orphan}
+
+
+@pytest.mark.django_db
+def test_purge_abandoned_carts(user, product):
+    make_session("live", timedelta(days=1))
+    make_session("expired", -timedelta(days=1))
+    for i in range(5):
+        make_cart(product, 40, session_key=f"gone{i}")
+    kept = make_cart(product, 40, session_key="live")
+
+    result = purge_abandoned_carts(batch_size=2)
+
+    assert list(Cart.objects.all()) == [kept]
+    assert CartItem.objects.count() == 1
+    assert list(Session.objects.values_list("pk", flat=True)) == ["live"]
+    assert (result.carts, result.cart_items, result.sessions) == (5, 5, 1)
+    assert result.batches == 4
+    assert result.finished
+
+
+@pytest.mark.django_db
+def test_purge_abandoned_carts_stops_at_time_budget(product, mocker):
+    make_cart(product, 40, session_key="gone")
+    mocker.patch(
+        "cosmetics_shop.services.cleanup_service.time.monotonic",
+        side_effect=[0, 0, 100, 100, 100],
+    )
+
+    result = purge_abandoned_carts(time_budget=1)
+
+    assert result.carts == 0
+    assert not result.finished
+    assert Cart.objects.exists()
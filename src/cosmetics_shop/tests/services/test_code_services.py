@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cosmetics_shop.models import Product
+from cosmetics_shop.services.code_service import (
+    SequenceCodeAllocator,
+    TableCodeAllocator,
+    allocate_codes,
+)
+
+
+@pytest.mark.django_db
+def test_allocated_codes_are_unique(products):
+    existing = set(Product.objects.values_list("code", flat=True))
+
+    codes = allocate_codes(100) + allocate_codes(5)
+
+    assert len(set(codes)) == 105
+    assert not existing & set(codes)
+
+
+@pytest.mark.django_db
+def test_counter_starts_after_existing_products(product):
+    numbers = TableCodeAllocator().reserve_numbers(2)
+
+    assert numbers == [product.pk + 1, product.pk + 2]
+    assert Product.code_for_number(numbers[0]) != product.code
+
+
+@pytest.mark.django_db
+def test_product_created_with_single_insert(group, brand):
+    with CaptureQueriesContext(connection) as ctx:
+        product = Product.objects.create(
+            name="Single insert", group=group, brand=brand, price=1, stock=1
+        )
+
+    product_table = Product._meta.db_table
+    product_writes = [
+        q["sql"]
+        for q in ctx.captured_queries
+        if f'"{product_table}"' in q["sql"]
+        and q["sql"].startswith(("INSERT", "UPDATE"))
+    ]
+    assert len(product_writes) == 1
+    assert Product.objects.get(pk=product.pk).code == product.code
+
+
+@pytest.mark.django_db
+def test_sequence_allocator_hands_out_blocks(mocker):
+    allocator = SequenceCodeAllocator(block_size=10)
+    fetch = mocker.patch.object(
+        allocator, "fetch", side_effect=lambda count: list(range(1, count + 1))
+    )
+
+    first = allocator.allocate(3)
+    second = allocator.allocate(7)
+
+    fetch.assert_called_once_with(10)
+    assert len(set(first + second)) == 10
+
+
+@pytest.mark.django_db
+def test_code_space_exhaustion_is_reported(mocker):
+    allocator = TableCodeAllocator()
+    mocker.patch.object(allocator, "reserve_numbers", return_value=[Product.CODE_MOD])
+
+    with pytest.raises(OverflowError):
+        allocator.allocate(1)
@@ -0,0 +1,51 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+
+from accounts.models import CustomUser
+from cosmetics_shop.models import Favorite
+from cosmetics_shop.services.favorite_service import (
+    get_favorite_ids,
+    mark_favorites,
+    toggle_favorite,
+)
+
+
+@pytest.mark.django_db
+def test_favorite_ids_cached_between_requests(user, product, django_assert_num_queries):
+    Favorite.objects.create(user=user, product=product)
+
+    assert get_favorite_ids(user) == {product.pk}
+
+    fresh_user = CustomUser.objects.get(pk=user.pk)
+    with django_assert_num_queries(0):
+        assert get_favorite_ids(fresh_user) == {product.pk}
+
+
+@pytest.mark.django_db
+def test_toggle_favorite_updates_cached_ids(user, product):
+    assert get_favorite_ids(user) == set()
+
+    assert toggle_favorite(user, product) is True
+    assert Favorite.objects.filter(user=user, product=product).exists()
+    assert get_favorite_ids(CustomUser.objects.get(pk=user.pk)) == {product.pk}
+
+    assert toggle_favorite(user, product) is False
+    assert not Favorite.objects.filter(user=user, product=product).exists()
+    assert get_favorite_ids(CustomUser.objects.get(pk=user.pk)) == set()
+
+
+@pytest.mark.django_db
+def test_mark_favorites(user, products):
+    Favorite.objects.create(user=user, product=products[0])
+    items = list(products)
+
+    mark_favorites(items, user)
+
+    assert [item.is_favorite for item in items] == [
+        item.pk == products[0].pk for item in items
+    ]
+
+
+@pytest.mark.django_db
+def test_anonymous_has_no_favorites():
+    assert get_favorite_ids(AnonymousUser()) == frozenset()
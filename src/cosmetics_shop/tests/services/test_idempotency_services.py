@@ -0,0 +1,65 @@
+import pytest
+from django.core.cache import cache
+
+from cosmetics_shop.services.idempotency_service import (
+    IDEMPOTENCY_KEY,
+    IdempotentResponse,
+    request_fingerprint,
+    run_idempotent,
+)
+from utils.custom_exceptions import IdempotencyInProgress, IdempotencyKeyMismatch
+
+
+@pytest.mark.django_db
+def test_request_fingerprint_ignores_key_order():
+    fingerprint = request_fingerprint({"a": 1, "b": 2})
+
+    assert fingerprint == request_fingerprint({"b": 2, "a": 1})
+    assert request_fingerprint({"a": 1}) != request_fingerprint({"a": 2})
+
+
+@pytest.mark.django_db
+def test_run_idempotent_replays_response(mocker):
+    func = mocker.Mock(return_value=IdempotentResponse(201, {"order_id": 1}))
+
+    first = run_idempotent("user:1", "key", "hash", func)
+    second = run_idempotent("user:1", "key", "hash", func)
+
+    assert first == (IdempotentResponse(201, {"order_id": 1}), False)
+    assert second == (IdempotentResponse(201, {"order_id": 1}), True)
+    func.assert_called_once()
+
+    # Other clients have their own keys
+    run_idempotent("user:2", "key", "hash", func)
+    assert func.call_count == 2
+
+
+@pytest.mark.django_db
+def test_run_idempotent_rejects_other_data(mocker):
+    run_idempotent("user:1", "key", "hash", lambda: IdempotentResponse(201, {}))
+
+    with pytest.raises(IdempotencyKeyMismatch):
+        run_idempotent("user:1", "key", "other", mocker.Mock())
+
+
+@pytest.mark.django_db
+def test_run_idempotent_forgets_errors(mocker):
+    conflict, created = IdempotentResponse(409, {}), IdempotentResponse(201, {})
+    func = mocker.Mock(side_effect=[ValueError, conflict, created])
+
+    with pytest.raises(ValueError):
+        run_idempotent("user:1", "key", "hash", func)
+    assert run_idempotent("user:1", "key", "hash", func)[0].status == 409
+    assert run_idempotent("user:1", "key", "hash", func)[0].status == 201
+    assert func.call_count == 3
+
+
+@pytest.mark.django_db
+def test_run_idempotent_in_progress(mocker):
+    cache_key = IDEMPOTENCY_KEY.format(scope="user:1", key="key")
+    cache.add(cache_key, {"fingerprint": "hash", "response": None})
+    func = mocker.Mock()
+
+    with pytest.raises(IdempotencyInProgress):
+        run_idempotent("user:1", "key", "hash", func, wait=0.2)
+    func.assert_not_called()
@@ -0,0 +1,99 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
+from PIL import Image
+
+from cosmetics_shop.models import CatalogEntry, Product
+from cosmetics_shop.services.image_service import (
+    get_image_sources,
+    process_product_image,
+    schedule_image_processing,
+)
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def product_with_image(product, media_root):
+    buffer = BytesIO()
+    Image.new("RGB", (600, 400), "red").save(buffer, "JPEG")
+    product.image = SimpleUploadedFile("photo.jpg", buffer.getvalue())
+    product.save()
+    return product
+
+
+@pytest.mark.django_db
+def test_variants_created_for_each_width(product_with_image):
+    assert process_product_image(product_with_image.pk) is True
+
+    product_with_image.refresh_from_db()
+    variants = product_with_image.image_variants
+    assert variants["source"] == product_with_image.image.name
+
+    jpeg = [item for item in variants["items"] if item["format"] == "jpeg"]
+    webp = [item for item in variants["items"] if item["format"] == "webp"]
+    # Never upscaled past the original width
+    assert [(item["width"], item["height"]) for item in jpeg] == [
+        (240, 160),
+        (480, 320),
+        (600, 400),
+    ]
+    assert len(webp) == 3
+    for item in variants["items"]:
+        assert product_with_image.image.storage.exists(item["name"])
+
+    entry = CatalogEntry.objects.get(pk=product_with_image.pk)
+    assert entry.image_variants == variants
+
+
+@pytest.mark.django_db
+def test_sources_ignored_after_image_replaced(product_with_image):
+    process_product_image(product_with_image.pk)
+    product_with_image.refresh_from_db()
+
+    sources = get_image_sources(product_with_image)
+    assert sources[-1]["fallback"] is True
+    assert sources[-1]["type"] == "image/jpeg"
+    assert "webp" in [source["format"] for source in sources]
+
+    product_with_image.image = "product_images/other.jpg"
+    assert get_image_sources(product_with_image) == []
+
+
+@pytest.mark.django_db
+def test_broken_image_is_skipped(product, media_root):
+    product.image = SimpleUploadedFile("broken.jpg", b"not an image")
+    product.save()
+
+    assert process_product_image(product.pk) is False
+    assert Product.objects.get(pk=product.pk).image_variants == {}
+
+
+@pytest.mark.django_db
+def test_default_image_not_scheduled(product, mocker):
+    on_commit = mocker.patch("cosmetics_shop.services.image_service.transaction")
+
+    schedule_image_processing(product)
+
+    on_commit.on_commit.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_card_renders_srcset(product_with_image):
+    process_product_image(product_with_image.pk)
+    entry = CatalogEntry.objects.get(pk=product_with_image.pk)
+
+    html = render_to_string(
+        "cosmetics_shop/includes/product_image.html",
+        {"product": entry, "sizes": "240px"},
+    )
+
+    assert 'type="image/webp"' in html
+    assert "240w" in html
+    assert f'src="{entry.image.url}"' in html
@@ -0,0 +1,149 @@
+import json
+
+import pytest
+
+from cosmetics_shop.models import CatalogEntry, Product
+from cosmetics_shop.services.import_service import DEFAULT_IMAGE, import_products
+
+
+def make_row(name, group, brand, tags=(), stock=3, price="10.00"):
+    return {
+        "name": name,
+        "group": group.name,
+        "brand": brand.name,
+        "price": price,
+        "stock": stock,
+        "tags": [tag.name for tag in tags],
+        "desc": f"{name} description",
+    }
+
+
+def write_jsonl(path, rows):
+    path.write_text("\n".join(json.dumps(row) for row in rows), encoding="utf-8")
+    return path
+
+
+@pytest.mark.django_db
+def test_import_jsonl_creates_products(tmp_path, group, brand, tag):
+    rows = [make_row(f"Imported {i}", group, brand, tags=[tag]) for i in range(5)]
+    path = write_jsonl(tmp_path / "products.jsonl", rows)
+
+    result = import_products(path, batch_size=2)
+
+    assert result.created == 5
+    assert result.last_row == 5
+    products = Product.objects.filter(name__startswith="Imported")
+    assert products.count() == 5
+    assert len({product.code for product in products}) == 5
+    for product in products:
+        assert list(product.tags.all()) == [tag]
+    assert CatalogEntry.objects.filter(product__in=products).count() == 5
+
+
+@pytest.mark.django_db
+def test_import_csv_updates_existing_products(tmp_path, product, group2, brand, tag):
+    path = tmp_path / "products.csv"
+    path.write_text(
+        "name,group,brand,price,stock,tags,desc\n"
+        f"{product.name},{group2.name},{brand.name},55.00,0,,Updated\n",
+        encoding="utf-8",
+    )
+
+    result = import_products(path)
+
+    product.refresh_from_db()
+    assert result.updated == 1
+    assert product.group == group2
+    assert product.stock == 0
+    assert product.is_in_stock is False
+    assert not product.tags.exists()
+    assert CatalogEntry.objects.get(pk=product.pk).in_stock is False
+
+
+@pytest.mark.django_db
+def test_import_skips_invalid_rows(tmp_path, group, brand):
+    rows = [
+        make_row("Valid", group, brand),
+        {**make_row("Unknown brand", group, brand), "brand": "Missing"},
+        {**make_row("Bad price", group, brand), "price": "free"},
+    ]
+    path = write_jsonl(tmp_path / "products.jsonl", rows)
+
+    result = import_products(path)
+
+    assert result.created == 1
+    assert result.skipped == 2
+    assert len(result.errors) == 2
+    assert not Product.objects.filter(name__in=["Unknown brand", "Bad price"]).exists()
+
+
+@pytest.mark.django_db
+def test_import_resumes_from_start_row(tmp_path, group, brand):
+    rows = [make_row(f"Resumed {i}", group, brand) for i in range(4)]
+    path = write_jsonl(tmp_path / "products.jsonl", rows)
+
+    result = import_products(path, start_row=2)
+
+    assert result.rows == 2
+    assert set(
+        Product.objects.filter(name__startswith="Resumed").values_list(
+            "name", flat=True
+        )
+    ) == {"Resumed 2", "Resumed 3"}
+
+
+@pytest.mark.django_db
+def test_import_batch_runs_constant_queries(
+    tmp_path, group, brand, tag, django_assert_max_num_queries
+):
+    rows = [make_row(f"Bulk {i}", group, brand, tags=[tag]) for i in range(50)]
+    path = write_jsonl(tmp_path / "products.jsonl", rows)
+
+    with django_assert_max_num_queries(20):
+        result = import_products(path, batch_size=50)
+
+    assert result.created == 50
+
+
+@pytest.mark.django_db
+def test_import_without_image_keeps_existing_image(tmp_path, product, group, brand):
+    variants = {"source": "product_images/old.jpg", "items": []}
+    Product.objects.filter(pk=product.pk).update(
+        image="product_images/old.jpg", image_variants=variants
+    )
+    path = write_jsonl(
+        tmp_path / "products.jsonl", [make_row(product.name, group, brand)]
+    )
+
+    import_products(path)
+
+    product.refresh_from_db()
+    assert product.image.name == "product_images/old.jpg"
+    assert product.image_variants == variants
+
+
+@pytest.mark.django_db
+def test_import_with_new_image_resets_variants(tmp_path, product, group, brand):
+    Product.objects.filter(pk=product.pk).update(
+        image="product_images/old.jpg",
+        image_variants={"source": "product_images/old.jpg", "items": []},
+    )
+    row = {**make_row(product.name, group, brand), "image": "product_images/new.jpg"}
+    path = write_jsonl(tmp_path / "products.jsonl", [row])
+
+    import_products(path)
+
+    product.refresh_from_db()
+    assert product.image.name == "product_images/new.jpg"
+    assert product.image_variants == {}
+
+
+@pytest.mark.django_db
+def test_import_new_product_without_image_gets_default(tmp_path, group, brand):
+    path = write_jsonl(
+        tmp_path / "products.jsonl", [make_row("No image", group, brand)]
+    )
+
+    import_products(path)
+
+    assert Product.objects.get(name="No image").image.name == DEFAULT_IMAGE
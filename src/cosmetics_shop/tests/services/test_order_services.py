@@ -1,10 +1,26 @@
+from datetime import timedelta
+from decimal import Decimal
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from cosmetics_shop.models import CartItem, Order, OrderItem
+from cosmetics_shop.models import (
+    Cart,
+    CartItem,
+    CatalogEntry,
+    Order,
+    OrderItem,
+    Product,
+    Status,
+)
 from cosmetics_shop.services.order_service import (
     create_order_from_cart,
     get_order_items_by_client,
+    update_order_from_cart,
 )
+from utils.custom_exceptions import OutOfStockError
 
 
 @pytest.mark.django_db
@@ -35,3 +51,155 @@ def test_get_order_items_by_client(client_obj, product):
 
     assert client_order_items[0]["latest_status"] == "Новый"
     assert client_order_items[0]["status_badge_class"] == "info"
+
+
+@pytest.mark.django_db
+def test_create_order_from_cart_snapshots(cart, client_obj, address, products):
+    CartItem.objects.create(cart=cart, product=products[0], quantity=2)
+    CartItem.objects.create(cart=cart, product=products[1], quantity=1)
+
+    order = create_order_from_cart(cart, None, None)
+    order.refresh_from_db()
+
+    assert order.total_price == Decimal("150") * 2 + Decimal("100.50")
+    assert order.snapshot_name == "John Doe"
+    assert order.snapshot_address == str(address)
+    assert order.order_items.count() == 2
+    assert list(order.order_status_log.values_list("status", flat=True)) == [Status.NEW]
+    # Held by reservations until payment, the catalog shows what is left
+    assert order.stock_reserved
+    assert dict(order.stock_reservations.values_list("product", "quantity")) == {
+        products[0].pk: 2,
+        products[1].pk: 1,
+    }
+    assert Product.objects.get(pk=products[0].pk).stock == 5
+    assert CatalogEntry.objects.get(product=products[0]).stock == 3
+
+
+def count_checkout_queries(products, quantity):
+    cart = Cart.objects.create(session_key=f"budget{len(products)}")
+    CartItem.objects.bulk_create(
+        [CartItem(cart=cart, product=p, quantity=quantity) for p in products]
+    )
+    client_data = {
+        "first_name": "John",
+        "last_name": "Doe",
+        "phone": "+380000000000",
+        "email": "john@test.com",
+    }
+    address_data = {"city": "Kyiv", "post_office": "1"}
+
+    with CaptureQueriesContext(connection) as queries:
+        create_order_from_cart(cart, client_data, address_data)
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_create_order_from_cart_query_budget(group, brand):
+    products = [
+        Product.objects.create(
+            name=f"Product {i}", group=group, brand=brand, price=10, stock=10
+        )
+        for i in range(12)
+    ]
+
+    small = count_checkout_queries(products[:1], quantity=1)
+    large = count_checkout_queries(products[1:], quantity=2)
+
+    assert small == large
+    # 12 statements and the savepoints of the three atomic blocks
+    assert large <= 18
+
+
+@pytest.mark.django_db
+def test_update_order_from_cart_replaces_reservations(cart, client_obj, products):
+    first, second, third = products[0], products[1], products[2]
+    third.stock = 5
+    third.save()
+    CartItem.objects.create(cart=cart, product=first, quantity=2)
+    CartItem.objects.create(cart=cart, product=second, quantity=1)
+    order = create_order_from_cart(cart, None, None)
+
+    CartItem.objects.filter(cart=cart, product=first).update(quantity=3)
+    CartItem.objects.filter(cart=cart, product=second).delete()
+    CartItem.objects.create(cart=cart, product=third, quantity=1)
+
+    update_order_from_cart(order, cart, {"city": "Kyiv"}, {})
+
+    reserved = dict(order.stock_reservations.values_list("product", "quantity"))
+    assert reserved == {first.pk: 3, third.pk: 1}
+    stocks = dict(Product.objects.values_list("pk", "stock"))
+    assert (stocks[first.pk], stocks[second.pk], stocks[third.pk]) == (5, 10, 5)
+
+
+@pytest.mark.django_db
+def test_update_order_from_cart_applies_net_changes(cart, client_obj, products):
+    first, second, third = products[0], products[1], products[2]
+    third.stock = 5
+    third.save()
+    CartItem.objects.create(cart=cart, product=first, quantity=2)
+    CartItem.objects.create(cart=cart, product=second, quantity=1)
+    order = create_order_from_cart(cart, None, None)
+    # An order placed before reservations, its stock was already taken
+    order.stock_reservations.all().delete()
+    Order.objects.filter(pk=order.pk).update(stock_reserved=False)
+    order.stock_reserved = False
+    Product.objects.filter(pk=first.pk).update(stock=3)
+    Product.objects.filter(pk=second.pk).update(stock=9)
+    kept_item = order.order_items.get(product=first)
+
+    CartItem.objects.filter(cart=cart, product=first).update(quantity=3)
+    CartItem.objects.filter(cart=cart, product=second).delete()
+    CartItem.objects.create(cart=cart, product=third, quantity=1)
+
+    update_order_from_cart(order, cart, {"city": "Kyiv"}, {})
+
+    quantities = dict(order.order_items.values_list("product", "quantity"))
+    assert quantities == {first.pk: 3, third.pk: 1}
+    assert order.order_items.get(product=first).pk == kept_item.pk
+    stocks = dict(Product.objects.values_list("pk", "stock"))
+    assert (stocks[first.pk], stocks[second.pk], stocks[third.pk]) == (2, 10, 4)
+    order.refresh_from_db()
+    assert order.total_price == Decimal("150") * 3 + third.price
+
+
+@pytest.mark.django_db
+def test_update_order_from_unchanged_cart_writes_no_lines(cart, client_obj, products):
+    CartItem.objects.create(cart=cart, product=products[0], quantity=2)
+    order = create_order_from_cart(cart, None, None)
+
+    with CaptureQueriesContext(connection) as queries:
+        update_order_from_cart(order, cart, {"city": "Kyiv"}, {})
+
+    writes = [
+        q["sql"]
+        for q in queries
+        if q["sql"].startswith(("INSERT", "DELETE"))
+        or q["sql"].startswith('UPDATE "cosmetics_shop_product"')
+        or q["sql"].startswith('UPDATE "cosmetics_shop_orderitem"')
+    ]
+    assert writes == []
+    assert order.stock_reservations.get().quantity == 2
+
+
+@pytest.mark.django_db
+def test_update_order_from_cart_renews_holds(cart, client_obj, products):
+    CartItem.objects.create(cart=cart, product=products[0], quantity=2)
+    order = create_order_from_cart(cart, None, None)
+    soon = timezone.now() + timedelta(minutes=1)
+    order.stock_reservations.update(expires_at=soon)
+
+    update_order_from_cart(order, cart, {"city": "Kyiv"}, {})
+
+    assert order.stock_reservations.get().expires_at > soon + timedelta(minutes=20)
+
+
+@pytest.mark.django_db
+def test_update_order_from_cart_checks_expired_holds_again(cart, client_obj, products):
+    CartItem.objects.create(cart=cart, product=products[0], quantity=2)
+    order = create_order_from_cart(cart, None, None)
+    order.stock_reservations.update(expires_at=timezone.now())
+    Product.objects.filter(pk=products[0].pk).update(stock=1)
+
+    with pytest.raises(OutOfStockError):
+        update_order_from_cart(order, cart, {"city": "Kyiv"}, {})
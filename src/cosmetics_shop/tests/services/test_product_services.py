@@ -1,10 +1,13 @@
 import pytest
 
-from cosmetics_shop.models import Favorite
+from cosmetics_shop.models import CatalogEntry, Product
 from cosmetics_shop.services.product_service import (
     change_stock_product,
-    favorites_products,
+    release_stock,
+    reserve_stock,
+    restore_stock_product,
 )
+from utils.custom_exceptions import OutOfStockError
 
 
 @pytest.mark.django_db
@@ -24,9 +27,55 @@ def test_change_stock_product_more_than_there_is(product):
 
 
 @pytest.mark.django_db
-def test_favorites_products(user, products):
-    for product in products:
-        Favorite.objects.create(product=product, user=user)
-    favorite_products = favorites_products(user)
+def test_stock_updates_keep_is_in_stock(product):
+    change_stock_product(product.code, product.stock)
+    product.refresh_from_db()
+    assert product.is_in_stock is False
+
+    restore_stock_product(product.code, 1)
+    product.refresh_from_db()
+    assert product.is_in_stock is True
+
+
+@pytest.mark.django_db
+def test_reserve_stock(products):
+    first, second = products[:2]
+
+    remaining = reserve_stock(
+        [(first.code, 2), (second.code, 1), (first.code, 3)],
+    )
+
+    assert remaining == {first.code: 0, second.code: second.stock - 1}
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.stock, first.is_in_stock) == (0, False)
+    assert second.is_in_stock
+    assert CatalogEntry.objects.get(product=first).stock == 0
+
+
+@pytest.mark.django_db
+def test_reserve_stock_reports_every_short_line(products):
+    first, second, third = products[:3]
+
+    with pytest.raises(OutOfStockError) as e:
+        reserve_stock([(first.code, 6), (second.code, 1), (third.code, 1)])
+
+    assert [(s.code, s.requested, s.available) for s in e.value.shortages] == [
+        (first.code, 6, first.stock),
+        (third.code, 1, 0),
+    ]
+    assert first.name in str(e.value)
+    # Nothing is taken when a line is short
+    assert Product.objects.get(pk=second.pk).stock == second.stock
+
+
+@pytest.mark.django_db
+def test_release_stock(products):
+    first, _, third = products[:3]
+
+    release_stock([(first.code, 2), (third.code, 1)])
 
-    assert set(products) == set(favorite_products)
+    first.refresh_from_db()
+    third.refresh_from_db()
+    assert first.stock == 7
+    assert (third.stock, third.is_in_stock) == (1, True)
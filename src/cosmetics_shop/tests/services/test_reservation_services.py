@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from cosmetics_shop.models import CatalogEntry, Product, StockReservation
+from cosmetics_shop.services.reservation_service import (
+    commit_reservations,
+    expire_stock_reservations,
+    get_available_stock,
+    get_reserved_quantities,
+    release_reservations,
+    reserve_for_order,
+)
+from utils.custom_exceptions import OutOfStockError
+
+
+@pytest.mark.django_db
+def test_reserve_for_order_counts_other_orders(order_factory, products):
+    first, second = products[0], products[1]
+    reserve_for_order(order_factory(), [(first.code, 3)])
+
+    with pytest.raises(OutOfStockError) as exc:
+        reserve_for_order(order_factory(), [(first.code, 3), (second.code, 11)])
+
+    assert {(s.code, s.available) for s in exc.value.shortages} == {
+        (first.code, 2),
+        (second.code, 10),
+    }
+    assert StockReservation.objects.count() == 1
+    assert Product.objects.get(pk=first.pk).stock == 5
+
+
+@pytest.mark.django_db
+def test_reserve_for_order_replaces_own_holds(order_factory, products):
+    first, second = products[0], products[1]
+    order = order_factory()
+    reserve_for_order(order, [(first.code, 5), (second.code, 1)])
+
+    # The order's own holds do not count against it
+    reserve_for_order(order, [(first.code, 4)])
+
+    assert dict(order.stock_reservations.values_list("product", "quantity")) == {
+        first.pk: 4
+    }
+    assert CatalogEntry.objects.get(product=first).stock == 1
+    assert CatalogEntry.objects.get(product=second).stock == 10
+
+
+@pytest.mark.django_db
+def test_commit_reservations_takes_stock(order_factory, order_item_factory, product):
+    order = order_factory()
+    order_item_factory(order, product, quantity=2)
+    reserve_for_order(order, [(product.code, 2)])
+
+    order.mark_as_paid()
+
+    product.refresh_from_db()
+    assert product.stock == 3
+    assert not order.stock_reservations.exists()
+    assert not order.stock_reserved
+    assert CatalogEntry.objects.get(product=product).stock == 3
+
+
+@pytest.mark.django_db
+def test_commit_expired_reservations_never_oversells(
+    order_factory, order_item_factory, product
+):
+    order = order_factory()
+    order_item_factory(order, product, quantity=4)
+    reserve_for_order(order, [(product.code, 4)])
+    Product.objects.filter(pk=product.pk).update(stock=2)
+
+    commit_reservations(order)
+
+    product.refresh_from_db()
+    assert (product.stock, product.is_in_stock) == (0, False)
+
+
+@pytest.mark.django_db
+def test_release_reservations(
+    order_factory, product, django_capture_on_commit_callbacks
+):
+    order = order_factory()
+    reserve_for_order(order, [(product.code, 5)])
+    assert get_available_stock(product) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        release_reservations(order)
+        # The cached count goes only after the commit
+        assert get_available_stock(product) == 0
+
+    assert get_available_stock(product) == 5
+    assert not StockReservation.objects.exists()
+    assert CatalogEntry.objects.get(product=product).stock == 5
+
+
+@pytest.mark.django_db
+def test_expire_stock_reservations(order_factory, products):
+    first, second = products[0], products[1]
+    stale, live = order_factory(), order_factory()
+    reserve_for_order(stale, [(first.code, 2)])
+    reserve_for_order(live, [(second.code, 1)])
+    StockReservation.objects.filter(order=stale).update(
+        expires_at=timezone.now() - timedelta(minutes=1)
+    )
+
+    assert expire_stock_reservations() == 1
+
+    assert list(StockReservation.objects.values_list("order", flat=True)) == [live.pk]
+    assert CatalogEntry.objects.get(product=first).stock == 5
+    assert expire_stock_reservations() == 0
+
+
+@pytest.mark.django_db
+def test_get_reserved_quantities_is_cached(
+    order_factory, product, django_assert_num_queries
+):
+    reserve_for_order(order_factory(), [(product.code, 2)])
+
+    with django_assert_num_queries(1):
+        assert get_reserved_quantities([product.pk]) == {product.pk: 2}
+    with django_assert_num_queries(0):
+        assert get_reserved_quantities([product.pk]) == {product.pk: 2}
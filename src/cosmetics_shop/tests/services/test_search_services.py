@@ -0,0 +1,81 @@
+import pytest
+
+from cosmetics_shop.models import CatalogEntry, Product
+from cosmetics_shop.services.search_service import (
+    SimpleSearchBackend,
+    SQLiteSearchBackend,
+    get_search_backend,
+)
+
+
+@pytest.mark.django_db
+def test_sqlite_backend_selected():
+    assert isinstance(get_search_backend(), SQLiteSearchBackend)
+
+
+@pytest.mark.django_db
+def test_search_by_substring(products):
+    backend = get_search_backend()
+
+    result = backend.search(Product.objects.all(), "аллерген оттенок 2")
+
+    assert list(result.values_list("description", flat=True)) == ["Test2"]
+
+
+@pytest.mark.django_db
+def test_search_catalog_entries(products):
+    result = get_search_backend().search(CatalogEntry.objects.all(), "ТУШЬ")
+
+    assert result.count() == products.count()
+
+
+@pytest.mark.django_db
+def test_search_follows_product_changes(product):
+    backend = get_search_backend()
+    assert backend.search(Product.objects.all(), "Test Product").exists()
+
+    product.name = "Renamed cream"
+    product.save()
+
+    assert not backend.search(Product.objects.all(), "Test Product").exists()
+    assert backend.search(Product.objects.all(), "cream").exists()
+
+
+@pytest.mark.django_db
+def test_short_query_falls_back_to_icontains(products):
+    result = get_search_backend().search(Product.objects.all(), "1")
+
+    assert set(result) == set(SimpleSearchBackend().search(Product.objects.all(), "1"))
+
+
+@pytest.mark.django_db
+def test_rank_prefers_name_matches(group, brand):
+    in_description = Product.objects.create(
+        name="Shampoo",
+        description="Not a cream at all",
+        group=group,
+        brand=brand,
+        price=10,
+    )
+    in_name = Product.objects.create(
+        name="Face cream cream",
+        description="Moisturizing",
+        group=group,
+        brand=brand,
+        price=10,
+    )
+    backend = get_search_backend()
+
+    result = list(backend.rank(backend.search(Product.objects.all(), "cream"), "cream"))
+
+    assert result == [in_name, in_description]
+
+
+@pytest.mark.django_db
+def test_search_does_not_probe_for_index(products, django_assert_num_queries):
+    backend = get_search_backend()
+
+    with django_assert_num_queries(1) as captured:
+        list(backend.rank(backend.search(Product.objects.all(), "Test"), "Test"))
+
+    assert "sqlite_master" not in captured.captured_queries[0]["sql"]
@@ -2,6 +2,7 @@ import pytest
 from django.urls import reverse
 
 from cosmetics_shop.models import Favorite, Product
+from cosmetics_shop.services.reservation_service import reserve_for_order
 
 
 @pytest.mark.django_db
@@ -74,3 +75,20 @@ def test_cart_remove_error(mocker, client):
 
     assert response.status_code == 500
     assert response.json()["success"] is False
+
+
+@pytest.mark.django_db
+def test_add_to_cart_max_quantity_counts_reservations(
+    client, user, product, order_factory
+):
+    reserve_for_order(order_factory(), [(product.code, product.stock - 2)])
+    client.force_login(user)
+
+    for _ in range(3):
+        response = client.post(
+            reverse("ajax_add_to_cart"), {"product_code": product.code}
+        )
+
+    data = response.json()
+    assert data["product_count"] == 2
+    assert data["is_max_quantity"] is True
@@ -1,6 +1,7 @@
 from unittest.mock import Mock
 
 import pytest
+from django.template import Context, Template
 from django.test import RequestFactory
 
 from cosmetics_shop.context_processors import (
@@ -8,6 +9,7 @@ from cosmetics_shop.context_processors import (
     is_pending_deletion_client,
     register_form,
 )
+from cosmetics_shop.models import Client
 from cosmetics_shop.tests.conftest import add_session
 
 
@@ -22,6 +24,7 @@ def test_cart_item_count_empty():
     result = cart_item_count(request)
 
     assert "cart_item_count" in result
+    assert result["cart_item_count"]() == 0
 
 
 @pytest.mark.django_db
@@ -42,3 +45,30 @@ def test_pending_deletion_anonymous():
     result = is_pending_deletion_client(request)
 
     assert result["is_pending_deletion"] is None
+
+
+@pytest.mark.django_db
+def test_context_processors_are_lazy(user, django_assert_num_queries):
+    request = RequestFactory().get("/")
+    add_session(request)
+    request.user = user
+
+    with django_assert_num_queries(0):
+        cart_item_count(request)
+        is_pending_deletion_client(request)
+        register_form(request)
+
+
+@pytest.mark.django_db
+def test_pending_deletion_is_memoized_per_request(
+    user, client_obj, django_assert_num_queries
+):
+    Client.objects.filter(pk=client_obj.pk).update(is_pending_deletion=True)
+    request = RequestFactory().get("/")
+    request.user = user
+    template = Template("{% if is_pending_deletion %}pending{% endif %}")
+
+    with django_assert_num_queries(1):
+        for _ in range(2):
+            context = Context(is_pending_deletion_client(request))
+            assert template.render(context) == "pending"
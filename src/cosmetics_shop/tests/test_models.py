@@ -118,6 +118,15 @@ class TestProduct:
 
         assert stocks == [10, 5, 0, 0] or stocks == [5, 10, 0, 0]
 
+    def test_product_save_sets_is_in_stock(self, product):
+        assert product.is_in_stock is True
+
+        product.stock = 0
+        product.save(update_fields=["stock"])
+        product.refresh_from_db()
+
+        assert product.is_in_stock is False
+
     def test_product_queryset_for_catalog(
         self,
         category,
@@ -152,6 +161,25 @@ class TestOrder:
 
         assert order.total_price == Decimal("201.00")
 
+    def test_paid_after_expiry_takes_stock_again(self, product, client_obj):
+        order = Order.objects.create(client=client_obj, status=Status.CANCELED)
+        OrderItem.objects.create(order=order, product=product, price=100.50, quantity=2)
+
+        order.mark_as_paid()
+
+        product.refresh_from_db()
+        assert order.status == Status.PAYMENT_RECEIVED
+        assert product.stock == 3
+
+    def test_failed_payment_keeps_expired_order_canceled(self, client_obj):
+        order = Order.objects.create(client=client_obj, status=Status.NEW)
+        Order.objects.filter(pk=order.pk).update(status=Status.CANCELED)
+
+        order.mark_as_failed_payment()
+
+        order.refresh_from_db()
+        assert order.status == Status.CANCELED
+
 
 @pytest.mark.django_db
 class TestOrderStatusLog:
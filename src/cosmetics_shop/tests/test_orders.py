@@ -0,0 +1,26 @@
+import pytest
+from django.urls import reverse
+
+from cosmetics_shop.models import Order, Payment
+
+
+@pytest.fixture
+def checkout_client(client, user, cart_with_one_item, client_obj):
+    client.force_login(user)
+    session = client.session
+    session["payment_method"] = "cash"
+    session["client_data"] = {"first_name": "John", "last_name": "Doe"}
+    session["address_data"] = {"city": "Kyiv", "post_office": "1"}
+    session.save()
+    return client
+
+
+@pytest.mark.django_db
+def test_double_submitted_checkout_is_replayed(checkout_client):
+    first = checkout_client.post(reverse("order"))
+    second = checkout_client.post(reverse("order"))
+
+    assert first.status_code == second.status_code == 302
+    assert first.url == second.url == reverse("order_result")
+    assert Order.objects.count() == 1
+    assert Payment.objects.count() == 1
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+
+from cosmetics_shop.models import Payment
+from cosmetics_shop.payments.mono import init_payment
+
+
+@pytest.fixture
+def mock_invoice(mocker):
+    return mocker.patch(
+        "cosmetics_shop.payments.mono.create_mono_invoice",
+        side_effect=[
+            {"invoiceId": "inv-1", "pageUrl": "https://pay.mbnk.biz/inv-1"},
+            {"invoiceId": "inv-2", "pageUrl": "https://pay.mbnk.biz/inv-2"},
+        ],
+    )
+
+
+@pytest.mark.django_db
+def test_init_payment_reuses_pending_invoice(order_factory, mock_invoice):
+    order = order_factory(total_price=Decimal("100.00"))
+    request = RequestFactory().get("/")
+
+    first = init_payment(order, request)
+    second = init_payment(order, request)
+
+    assert first == second == "https://pay.mbnk.biz/inv-1"
+    mock_invoice.assert_called_once()
+    assert Payment.objects.get(order=order).external_id == "inv-1"
+
+
+@pytest.mark.django_db
+def test_init_payment_new_invoice_after_change(order_factory, mock_invoice):
+    order = order_factory(total_price=Decimal("100.00"))
+    request = RequestFactory().get("/")
+    init_payment(order, request)
+
+    order.total_price = Decimal("150.00")
+    order.save()
+
+    assert init_payment(order, request) == "https://pay.mbnk.biz/inv-2"
+    payment = Payment.objects.get(order=order)
+    assert (payment.external_id, payment.amount) == ("inv-2", Decimal("150.00"))
+
+
+@pytest.mark.django_db
+def test_init_payment_calls_mono_outside_transaction(order_factory, mocker):
+    order = order_factory(total_price=Decimal("100.00"))
+    depth = len(connection.atomic_blocks)
+
+    def create_invoice(*args):
+        # The order lock is not held during the request
+        assert len(connection.atomic_blocks) == depth
+        return {"invoiceId": "inv-1", "pageUrl": "https://pay.mbnk.biz/inv-1"}
+
+    mocker.patch(
+        "cosmetics_shop.payments.mono.create_mono_invoice", side_effect=create_invoice
+    )
+
+    assert init_payment(order, RequestFactory().get("/")) == (
+        "https://pay.mbnk.biz/inv-1"
+    )
+    assert Payment.objects.get(order=order).external_id == "inv-1"
+
+
+@pytest.mark.django_db
+def test_init_payment_keeps_invoice_stored_meanwhile(order_factory, mocker):
+    order = order_factory(total_price=Decimal("100.00"))
+
+    def create_invoice(*args):
+        # A concurrent call stores its invoice first
+        Payment.objects.filter(order=order).update(
+            external_id="inv-1", payment_url="https://pay.mbnk.biz/inv-1"
+        )
+        return {"invoiceId": "inv-2", "pageUrl": "https://pay.mbnk.biz/inv-2"}
+
+    mocker.patch(
+        "cosmetics_shop.payments.mono.create_mono_invoice", side_effect=create_invoice
+    )
+
+    assert init_payment(order, RequestFactory().get("/")) == (
+        "https://pay.mbnk.biz/inv-1"
+    )
+    assert Payment.objects.get(order=order).external_id == "inv-1"
@@ -1,11 +1,23 @@
 from datetime import timedelta
 from decimal import Decimal
+from unittest.mock import Mock
 
 import pytest
+from django.db import DatabaseError
 from django.utils import timezone
 
-from cosmetics_shop.models import Payment, Status
-from cosmetics_shop.tasks import cleanup_expired_orders
+from cosmetics_shop.models import (
+    CatalogEntry,
+    Order,
+    OrderStatusLog,
+    Payment,
+    Status,
+    StockReservation,
+)
+from cosmetics_shop.services import cleanup_service
+from cosmetics_shop.services.cleanup_service import expire_unpaid_orders
+from cosmetics_shop.services.reservation_service import reserve_for_order
+from cosmetics_shop.tasks import cleanup_abandoned_carts, cleanup_expired_orders
 
 
 @pytest.mark.django_db
@@ -128,3 +140,106 @@ def test_error_does_not_crash_task(
     result = cleanup_expired_orders()
 
     assert "Successfully expired 1 orders." in result
+
+
+@pytest.mark.django_db
+def test_reservations_released(order_factory, order_item_factory, product):
+    order = order_factory()
+    Order.objects.filter(pk=order.pk).update(
+        created_at=timezone.now() - timedelta(minutes=32)
+    )
+    order_item_factory(order=order, product=product, quantity=2)
+    reserve_for_order(order, [(product.code, 2)])
+    StockReservation.objects.update(expires_at=timezone.now())
+
+    cleanup_expired_orders()
+
+    order.refresh_from_db()
+    product.refresh_from_db()
+    assert (order.status, order.stock_reserved) == (Status.CANCELED, False)
+    assert not StockReservation.objects.exists()
+    assert product.stock == 5
+    assert CatalogEntry.objects.get(product=product).stock == 5
+
+
+@pytest.mark.django_db
+def test_orders_expire_with_their_holds(order_factory, order_item_factory, product):
+    order = order_factory()
+    Order.objects.filter(pk=order.pk).update(
+        created_at=timezone.now() - timedelta(minutes=40)
+    )
+    order_item_factory(order=order, product=product, quantity=1)
+    # Renewed while the customer was still on the checkout page
+    reserve_for_order(order, [(product.code, 1)])
+
+    cleanup_expired_orders()
+    order.refresh_from_db()
+    assert order.status == Status.NEW
+
+    StockReservation.objects.update(expires_at=timezone.now())
+    cleanup_expired_orders()
+    order.refresh_from_db()
+    assert order.status == Status.CANCELED
+
+
+@pytest.mark.django_db
+def test_expire_unpaid_orders_in_batches(
+    order_factory, order_item_factory, product, django_assert_max_num_queries
+):
+    orders = [order_factory() for _ in range(5)]
+    Order.objects.update(created_at=timezone.now() - timedelta(minutes=32))
+    for order in orders:
+        order_item_factory(order=order, product=product, quantity=1)
+    product.stock = 0
+    product.save()
+
+    # About ten statements per batch of two orders, whatever the batch size
+    with django_assert_max_num_queries(36):
+        result = expire_unpaid_orders(batch_size=2)
+
+    assert (result.orders, result.batches, result.finished) == (5, 3, True)
+    product.refresh_from_db()
+    assert product.stock == 5
+    logs = OrderStatusLog.objects.filter(order__in=orders, status=Status.CANCELED)
+    assert logs.count() == 5
+
+
+@pytest.mark.django_db
+def test_expire_unpaid_orders_stops_on_database_error(order_factory, monkeypatch):
+    order = order_factory()
+    Order.objects.update(created_at=timezone.now() - timedelta(minutes=32))
+
+    def fail(orders):
+        raise DatabaseError("deadlock detected")
+
+    monkeypatch.setattr(cleanup_service, "cancel_orders", fail)
+    logger = Mock()
+    monkeypatch.setattr(cleanup_service, "logger", logger)
+
+    result = expire_unpaid_orders()
+
+    assert (result.orders, result.finished) == (0, False)
+    assert Order.objects.get(pk=order.pk).status == Status.NEW
+    # Logged with the traceback
+    logger.exception.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_expire_unpaid_orders_raises_programming_errors(order_factory, monkeypatch):
+    order_factory()
+    Order.objects.update(created_at=timezone.now() - timedelta(minutes=32))
+
+    def fail(orders):
+        raise TypeError("bad call")
+
+    monkeypatch.setattr(cleanup_service, "cancel_orders", fail)
+
+    with pytest.raises(TypeError):
+        expire_unpaid_orders()
+
+
+@pytest.mark.django_db
+def test_cleanup_abandoned_carts():
+    result = cleanup_abandoned_carts()
+
+    assert result == "Deleted 0 carts, 0 cart items and 0 sessions."
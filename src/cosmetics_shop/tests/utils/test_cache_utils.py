@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+
+from utils.cache_utils import (
+    CODEC_JSON,
+    CODEC_ZLIB,
+    CacheSchema,
+    TwoTierCache,
+    cache_get,
+    cache_set,
+    decode_cache_value,
+    encode_cache_value,
+)
+
+
+@pytest.fixture
+def two_tier():
+    return TwoTierCache("test:version", maxsize=2, check_interval=60)
+
+
+@pytest.mark.django_db
+def test_second_read_is_local(two_tier, mocker):
+    loader = mocker.Mock(return_value={"a": 1})
+
+    assert two_tier.get_or_set("key", loader) == {"a": 1}
+
+    shared_get = mocker.spy(cache, "get")
+    assert two_tier.get_or_set("key", loader) == {"a": 1}
+
+    loader.assert_called_once()
+    shared_get.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_local_miss_reads_shared_tier(two_tier, mocker):
+    two_tier.get_or_set("key", lambda: "value")
+    two_tier.clear_local()
+
+    loader = mocker.Mock()
+    assert two_tier.get_or_set("key", loader) == "value"
+    loader.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_lru_evicts_oldest(two_tier):
+    for key in ("a", "b", "c"):
+        two_tier.get_or_set(key, lambda: key)
+
+    assert list(two_tier._entries) == ["b", "c"]
+
+
+@pytest.mark.django_db
+def test_invalidate_reloads(two_tier, mocker):
+    two_tier.get_or_set("key", lambda: "old")
+
+    two_tier.invalidate()
+
+    assert two_tier.get_or_set("key", lambda: "new") == "new"
+
+
+@pytest.mark.django_db
+def test_other_process_invalidation_is_noticed():
+    worker = TwoTierCache("test:version", check_interval=0)
+
+    worker.get_or_set("key", lambda: "old")
+    # Another process bumps the shared version
+    cache.incr("test:version")
+
+    assert worker.get_or_set("key", lambda: "new") == "new"
+
+
+@pytest.mark.django_db
+def test_small_values_are_not_compressed():
+    encoded = encode_cache_value({"price": Decimal("1.50")})
+
+    assert encoded.startswith(CODEC_JSON)
+    assert decode_cache_value(encoded) == {"price": "1.50"}
+
+
+@pytest.mark.django_db
+def test_large_values_are_compressed():
+    data = [{"id": i, "name": "Category"} for i in range(200)]
+
+    encoded = encode_cache_value(data)
+
+    assert encoded.startswith(CODEC_ZLIB)
+    assert decode_cache_value(encoded) == data
+
+
+@pytest.mark.django_db
+def test_schema_round_trip():
+    schema = CacheSchema(dump=lambda value: sorted(value), load=lambda data: set(data))
+
+    cache_set("key", {3, 1, 2}, schema)
+
+    assert cache_get("key", schema) == {1, 2, 3}
+
+
+@pytest.mark.django_db
+def test_unreadable_value_is_a_miss():
+    cache.set("key", b"pickled by an older deploy")
+
+    assert cache_get("key", CacheSchema(dump=list, load=list)) is None
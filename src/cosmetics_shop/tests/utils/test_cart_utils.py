@@ -2,9 +2,16 @@ from unittest.mock import Mock
 
 import pytest
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.sessions.models import Session
+from django.urls import reverse
 
-from cosmetics_shop.models import Cart
-from cosmetics_shop.utils.cart_utils import get_cart, get_or_create_cart
+from cosmetics_shop.models import Cart, CartItem
+from cosmetics_shop.services.cart_services import add_product_to_cart
+from cosmetics_shop.utils.cart_utils import (
+    get_cart,
+    get_cart_summary,
+    get_or_create_cart,
+)
 
 
 @pytest.mark.django_db
@@ -42,3 +49,86 @@ class TestCartUtils:
         assert isinstance(cart, Cart)
         assert cart.session_key == request.session.session_key
         assert Cart.objects.count() == 1
+
+    def test_get_cart_is_memoized_per_request(
+        self, rf, admin_user, django_assert_num_queries
+    ):
+        cart = Cart.objects.create(user=admin_user)
+
+        request = rf.get("/")
+        request.user = admin_user
+
+        with django_assert_num_queries(1):
+            assert get_cart(request) == cart
+            assert get_cart(request) == cart
+
+    def test_get_cart_without_session_creates_nothing(self, rf):
+        request = rf.get("/")
+        request.user = type("AnonymousUser", (), {"is_authenticated": False})
+        SessionMiddleware(lambda r: None).process_request(request)
+
+        assert get_cart(request) is None
+        assert request.session.session_key is None
+        assert not Cart.objects.exists()
+
+    def test_product_page_does_not_create_cart(self, client, product):
+        response = client.get(reverse("product_page", args=[product.code]))
+
+        assert response.status_code == 200
+        assert not Cart.objects.exists()
+        assert not Session.objects.exists()
+
+    def test_get_cart_summary_is_memoized_per_request(
+        self, rf, admin_user, product, django_assert_num_queries
+    ):
+        cart = Cart.objects.create(user=admin_user)
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+
+        request = rf.get("/")
+        request.user = admin_user
+
+        with django_assert_num_queries(2):
+            assert get_cart_summary(request).count == 2
+            assert get_cart_summary(request).count == 2
+
+        add_product_to_cart(cart, product.code)
+        assert get_cart_summary(request).count == 2
+        assert get_cart_summary(request, refresh=True).count == 3
+
+    def test_product_page_shows_cart_item_count(self, client, user, product):
+        client.force_login(user)
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+
+        response = client.get(reverse("product_page", args=[product.code]))
+
+        assert response.status_code == 200
+        assert response.context["cart_item_count"]() == 2
+        assert "(2)" in response.content.decode()
+
+    def test_login_merges_session_cart_into_user_cart(self, client, user, products):
+        first, second = products[:2]
+        user_cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=user_cart, product=first, quantity=4)
+
+        for product in (first, first, second):
+            client.post(reverse("ajax_add_to_cart"), {"product_code": product.code})
+        session_cart = Cart.objects.get(user__isnull=True)
+
+        client.login(email=user.email, password="12345678")
+
+        quantities = dict(
+            CartItem.objects.filter(cart=user_cart).values_list("product", "quantity")
+        )
+        assert quantities == {first.pk: first.stock, second.pk: 1}
+        assert not Cart.objects.filter(pk=session_cart.pk).exists()
+
+    def test_login_assigns_session_cart_without_user_cart(self, client, user, product):
+        client.post(reverse("ajax_add_to_cart"), {"product_code": product.code})
+
+        client.login(email=user.email, password="12345678")
+
+        cart = Cart.objects.get()
+        assert cart.user == user
+        assert cart.session_key is None
+        assert cart.cart_items.get().quantity == 1
@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+import pytest
+from django.test import RequestFactory
+from django.utils import timezone
+
+from cosmetics_shop.models import CatalogEntry, OrderStatusLog, Product, Status
+from utils import pagination
+from utils.pagination import (
+    TOTAL_APPROXIMATE,
+    TOTAL_EXACT,
+    CursorPaginator,
+    decode_cursor,
+    encode_cursor,
+    get_cursor_page,
+)
+
+
+def collect_pages(paginator):
+    pages = [paginator.get_page()]
+    while pages[-1].has_next:
+        pages.append(paginator.get_page(pages[-1].next_cursor))
+    return pages
+
+
+@pytest.mark.django_db
+def test_walks_all_pages_in_order(products):
+    queryset = CatalogEntry.objects.for_catalog().order_by_availability("price")
+    paginator = CursorPaginator(queryset, per_page=2)
+
+    pages = collect_pages(paginator)
+
+    expected = list(
+        queryset.order_by("-in_stock", "price", "-pk").values_list("pk", flat=True)
+    )
+    assert [entry.pk for page in pages for entry in page] == expected
+    assert not pages[0].has_previous
+    assert all(page.has_previous for page in pages[1:])
+
+
+@pytest.mark.django_db
+def test_previous_cursor_returns_previous_page(products):
+    paginator = CursorPaginator(Product.objects.for_catalog(), per_page=2)
+
+    first = paginator.get_page()
+    second = paginator.get_page(first.next_cursor)
+    back = paginator.get_page(second.previous_cursor)
+
+    assert list(back) == list(first)
+    assert not back.has_previous
+    assert back.has_next
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_falls_back_to_first_page(products):
+    request = RequestFactory().get("/products/?cursor=not-a-cursor")
+
+    page = get_cursor_page(request, Product.objects.order_by("-pk"), per_page=2)
+
+    assert [product.pk for product in page] == list(
+        Product.objects.order_by("-pk").values_list("pk", flat=True)[:2]
+    )
+
+
+@pytest.mark.django_db
+def test_page_without_total_runs_single_query(products, django_assert_num_queries):
+    paginator = CursorPaginator(Product.objects.order_by("price"), per_page=2)
+
+    with django_assert_num_queries(1):
+        page = paginator.get_page()
+
+    assert page.total is None
+
+
+@pytest.mark.django_db
+def test_totals(products, monkeypatch):
+    queryset = Product.objects.order_by("price")
+
+    exact = CursorPaginator(queryset, per_page=2, total=TOTAL_EXACT).get_page()
+    assert exact.total == queryset.count()
+    assert not exact.total_is_approximate
+
+    monkeypatch.setattr(pagination, "APPROXIMATE_TOTAL_LIMIT", 3)
+    approximate = CursorPaginator(
+        queryset, per_page=2, total=TOTAL_APPROXIMATE
+    ).get_page()
+    assert approximate.total == 3
+    assert approximate.total_is_approximate
+
+
+@pytest.mark.django_db
+def test_random_ordering_is_rejected():
+    with pytest.raises(ValueError):
+        CursorPaginator(Product.objects.order_by("?"))
+
+
+@pytest.mark.django_db
+def test_cursor_keeps_microseconds():
+    changed_at = timezone.now().replace(microsecond=123456)
+
+    values, direction = decode_cursor(encode_cursor([changed_at, 7], "n"))
+
+    assert values == [changed_at, 7]
+    assert direction == "n"
+
+
+@pytest.mark.django_db
+def test_rows_in_same_millisecond_are_not_skipped(order_factory):
+    order = order_factory()
+    base = timezone.now().replace(microsecond=500000)
+    logs = OrderStatusLog.objects.bulk_create(
+        OrderStatusLog(order=order, status=Status.NEW) for _ in range(6)
+    )
+    # Three timestamps within one millisecond, two rows sharing each
+    for log, offset in zip(logs, [100, 100, 200, 200, 300, 300]):
+        OrderStatusLog.objects.filter(pk=log.pk).update(
+            changed_at=base + timedelta(microseconds=offset)
+        )
+    queryset = OrderStatusLog.objects.filter(pk__in=[log.pk for log in logs])
+
+    pages = collect_pages(CursorPaginator(queryset, per_page=2))
+
+    expected = list(queryset.values_list("pk", flat=True))
+    assert [log.pk for page in pages for log in page] == expected
+    assert len(expected) == 6
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "values",
+    [["abc", "x"], [{"a": 1}, [2]], [None, 1], ["10.00"]],
+)
+def test_mismatched_cursor_falls_back_to_first_page(products, values):
+    queryset = Product.objects.order_by("price", "pk")
+    paginator = CursorPaginator(queryset, per_page=2)
+
+    page = paginator.get_page(encode_cursor(values, "n"))
+
+    assert [product.pk for product in page] == list(
+        queryset.values_list("pk", flat=True)[:2]
+    )
+    assert not page.has_previous
+
+
+@pytest.mark.django_db
+def test_cursor_values_are_converted_to_field_types(products):
+    queryset = Product.objects.order_by("price", "pk")
+    paginator = CursorPaginator(queryset, per_page=2)
+    first = paginator.get_page()
+    values, _ = decode_cursor(first.next_cursor)
+
+    # A cursor holding the price as a string still continues the walk
+    page = paginator.get_page(encode_cursor([str(values[0]), values[1]], "n"))
+
+    assert list(page) == list(paginator.get_page(first.next_cursor))
+    assert page.has_previous
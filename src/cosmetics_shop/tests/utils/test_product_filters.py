@@ -1,8 +1,15 @@
+from decimal import Decimal
+
 import pytest
 from django.test import RequestFactory
 
-from cosmetics_shop.models import Product
-from cosmetics_shop.utils.product_filters import ProductFilter
+from cosmetics_shop.forms import ProductFilterForm
+from cosmetics_shop.models import Brand, Product
+from cosmetics_shop.utils.product_filters import (
+    ProductFilter,
+    get_facet_index,
+    get_facet_index_version,
+)
 
 
 @pytest.mark.django_db
@@ -97,3 +104,114 @@ def test_invalid_sort_field():
     sort_by, direction = pf.get_sort_params()
 
     assert sort_by is None
+
+
+@pytest.fixture
+def facet_products(group, group2, brand, tag):
+    other_brand = Brand.objects.create(name="Other Brand")
+
+    cheap = Product.objects.create(
+        name="Cheap", price=50, group=group, brand=brand, stock=1
+    )
+    middle = Product.objects.create(
+        name="Middle", price=300, group=group, brand=other_brand, stock=1
+    )
+    expensive = Product.objects.create(
+        name="Expensive", price=1500, group=group2, brand=brand, stock=0
+    )
+    cheap.tags.add(tag)
+    expensive.tags.add(tag)
+
+    return {
+        "cheap": cheap,
+        "middle": middle,
+        "expensive": expensive,
+        "other_brand": other_brand,
+    }
+
+
+@pytest.mark.django_db
+def test_facet_counts_without_filters(facet_products, brand, group, tag):
+    facets = get_facet_index().search()
+
+    assert facets.total == 3
+    assert facets.counts["brand"] == {
+        brand.pk: 2,
+        facet_products["other_brand"].pk: 1,
+    }
+    assert facets.counts["group"][group.pk] == 2
+    assert facets.counts["tags"] == {tag.pk: 2}
+    assert facets.counts["price"] == {0: 1, 250: 1, 1000: 1}
+
+
+@pytest.mark.django_db
+def test_facet_counts_ignore_own_selection(facet_products, brand, group):
+    facets = get_facet_index().search(selected={"brand": {brand.pk}})
+
+    assert facets.ids == {facet_products["cheap"].pk, facet_products["expensive"].pk}
+    # other brands are still counted so they can be added to the selection
+    assert facets.counts["brand"][facet_products["other_brand"].pk] == 1
+    assert facets.counts["group"][group.pk] == 1
+
+
+@pytest.mark.django_db
+def test_facet_scope_and_price_range(facet_products, group):
+    facets = get_facet_index().search(
+        scope={"group": group.pk}, min_price=Decimal("100")
+    )
+
+    assert facets.ids == {facet_products["middle"].pk}
+
+
+@pytest.mark.django_db
+def test_facet_index_updated_on_product_change(
+    facet_products, group2, django_capture_on_commit_callbacks
+):
+    assert get_facet_index().search().total == 3
+
+    with django_capture_on_commit_callbacks(execute=True):
+        middle = facet_products["middle"]
+        middle.group = group2
+        middle.save()
+        facet_products["cheap"].soft_delete()
+
+        # Not published before the commit
+        assert get_facet_index().search().total == 3
+
+    facets = get_facet_index().search(scope={"group": group2.pk})
+
+    assert facets.ids == {middle.pk, facet_products["expensive"].pk}
+    assert get_facet_index().search().total == 2
+
+
+@pytest.mark.django_db
+def test_filter_form_shows_facet_counts(facet_products, brand):
+    form = ProductFilterForm({"brand": [brand.slug]})
+    assert form.is_valid()
+
+    facets = get_facet_index().search(selected=form.get_facet_selection())
+    form.apply_facets(facets)
+
+    labels = [label for _, label in form.fields["brand"].choices]
+
+    assert "Test Brand (2)" in labels
+    assert "Other Brand (1)" in labels
+
+
+@pytest.mark.django_db
+def test_facet_index_kept_on_non_facet_change(
+    facet_products, django_capture_on_commit_callbacks
+):
+    version = get_facet_index_version()
+    cheap = facet_products["cheap"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        cheap.stock = 1
+        cheap.name = "Renamed"
+        cheap.save()
+    assert get_facet_index_version() == version
+
+    with django_capture_on_commit_callbacks(execute=True):
+        cheap.price = cheap.price + 1
+        cheap.save()
+    assert get_facet_index_version() != version
@@ -2,6 +2,7 @@ import pytest
 from django.contrib.auth.models import AnonymousUser
 from django.test import RequestFactory
 
+from cosmetics_shop.services.favorite_service import mark_favorites
 from cosmetics_shop.utils.product_utils import get_ready_product_list
 
 
@@ -16,9 +17,11 @@ def test_get_ready_product_list_authenticated(user, products):
     request = factory.get("/")
     request.user = user
 
-    result = get_ready_product_list(request)
+    result = list(get_ready_product_list(request))
+    mark_favorites(result, user)
 
-    assert set(result) == set(products)
+    assert {entry.pk for entry in result} == {product.pk for product in products}
+    assert all(entry.is_favorite for entry in result)
 
 
 @pytest.mark.django_db
@@ -27,11 +30,11 @@ def test_get_ready_product_list_anonymous(products):
     request = factory.get("/")
     request.user = AnonymousUser()
 
-    products[0].is_active = False
-    products[0].save()
+    inactive = products[0]
+    inactive.is_active = False
+    inactive.save()
 
-    result = get_ready_product_list(request)
+    result_ids = {entry.pk for entry in get_ready_product_list(request)}
 
-    expected = [p for p in products if p.is_active]
-
-    assert set(result) == set(expected)
+    assert result_ids == {p.pk for p in products if p.is_active}
+    assert inactive.pk not in result_ids
@@ -4,12 +4,17 @@ import pytest
 from django.http import JsonResponse
 from django.test import RequestFactory
 
+from cosmetics_shop.models import Favorite
+from cosmetics_shop.services.cache_service import CATALOG, bump_cache_versions
 from cosmetics_shop.utils.view_helpers import (
     build_context,
     clean_query_params,
+    get_product_list_cache_key,
+    get_user_overlay,
     handle_ajax,
     processing_product_page,
 )
+from utils.pagination import CursorPage
 
 
 @pytest.mark.django_db
@@ -23,6 +28,17 @@ def test_removes_empty_values():
     assert clean_url == "/products/?price=100"
 
 
+@pytest.mark.django_db
+def test_removes_page_number():
+    factory = RequestFactory()
+    request = factory.get("/products/?page=400&price=100")
+
+    query_params, clean_url = clean_query_params(request)
+
+    assert query_params.dict() == {"price": "100"}
+    assert clean_url == "/products/?price=100"
+
+
 @pytest.mark.django_db
 def test_no_params():
     factory = RequestFactory()
@@ -58,13 +74,14 @@ def test_build_context(mocker):
     )
     mocker.patch("cosmetics_shop.utils.view_helpers.get_cart", return_value="cart_obj")
     mocker.patch(
-        "cosmetics_shop.utils.view_helpers.get_id_products_in_cart",
-        return_value=[1, 2],
+        "cosmetics_shop.utils.view_helpers.get_cart_summary",
+        return_value=mocker.Mock(product_ids=[1, 2]),
     )
     mocker.patch(
-        "cosmetics_shop.utils.view_helpers.get_paginator_page",
-        return_value=["page_obj"],
+        "cosmetics_shop.utils.view_helpers.get_cursor_page",
+        return_value=CursorPage(object_list=["page_obj"]),
     )
+    mock_index = mocker.patch("cosmetics_shop.utils.view_helpers.get_facet_index")
 
     context = build_context(request, products=[], title="Catalog")
 
@@ -72,11 +89,14 @@ def test_build_context(mocker):
     assert context["current_sort"] == "price"
     assert context["current_direction"] == "asc"
     assert context["cart_products"] == [1, 2]
-    assert context["products"] == ["page_obj"]
+    assert list(context["products"]) == ["page_obj"]
     assert context["context_categories"] == ["cat1"]
 
     mock_filter_class.assert_called_once_with(request, [])
     mock_filter.apply_sorting.assert_called_once()
+    mock_form.apply_facets.assert_called_once_with(
+        mock_index.return_value.search.return_value
+    )
 
 
 @pytest.mark.django_db
@@ -98,6 +118,62 @@ def test_ajax_response(mocker):
     assert data["url"] == "/products/"
 
 
+@pytest.mark.django_db
+def test_product_list_cache_key(django_capture_on_commit_callbacks):
+    factory = RequestFactory()
+    first = factory.get("/products/?sort=price&brand=1&name=")
+    second = factory.get("/products/?brand=1&sort=price")
+
+    key = get_product_list_cache_key(first)
+    assert key == get_product_list_cache_key(second)
+    assert key != get_product_list_cache_key(factory.get("/products/?brand=2"))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        bump_cache_versions(CATALOG)
+    assert key != get_product_list_cache_key(first)
+
+
+@pytest.mark.django_db
+def test_ajax_served_from_cache(mocker, cart_with_one_item, product, user):
+    factory = RequestFactory()
+    request = factory.get("/products/", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+    request.user = user
+    Favorite.objects.create(user=user, product=product)
+
+    mock_render = mocker.patch("cosmetics_shop.utils.view_helpers.render_to_string")
+    mock_render.return_value = "<html></html>"
+    handle_ajax(request, {"products": CursorPage(object_list=[product])}, "/products/")
+
+    mock_context = mocker.patch("cosmetics_shop.utils.view_helpers.build_context")
+
+    response = processing_product_page(
+        request,
+        products=[],
+        template_name="test.html",
+        title="Test",
+    )
+
+    data = json.loads(response.content)
+
+    mock_context.assert_not_called()
+    assert data["html"] == "<html></html>"
+    assert data["cart_products"] == [product.pk]
+    assert data["favorite_ids"] == [product.pk]
+
+
+@pytest.mark.django_db
+def test_user_overlay_for_anonymous(mocker, product):
+    factory = RequestFactory()
+    request = factory.get("/products/")
+    request.user = mocker.Mock(is_authenticated=False)
+    mocker.patch("cosmetics_shop.utils.view_helpers.get_cart", return_value=None)
+
+    assert get_user_overlay(request, [product.pk]) == {
+        "cart_products": [],
+        "favorite_ids": [],
+    }
+
+
 @pytest.mark.django_db
 def test_redirect(mocker):  # noqa
     factory = RequestFactory()
@@ -1,36 +1,108 @@
 import logging
+import secrets
 
+from django.contrib.auth.signals import user_logged_in
+from django.db.models import Q
+from django.dispatch import receiver
 from django.http import HttpRequest
 
+from accounts.models import CustomUser
 from cosmetics_shop.models import Cart
+from cosmetics_shop.services.cart_services import (
+    CartSummary,
+    add_cart_quantities,
+    build_cart_summary,
+    merge_carts,
+)
+from cosmetics_shop.services.cart_store import SessionCart, get_cart_store
 
 logger = logging.getLogger(__name__)
 
+CART_TOKEN_SESSION_KEY = "cart_token"
+# login() changes the session key, the cart id survives it in the session data
+CART_ID_SESSION_KEY = "cart_id"
 
-def get_cart(request: HttpRequest) -> Cart | None:
+
+def get_cart_owner(request: HttpRequest) -> tuple[str, int | str | None]:
     if request.user.is_authenticated:
-        cart = Cart.objects.filter(user=request.user).first()
-        logger.debug(f"Get cart (user): user_id={request.user.id}, found={bool(cart)}")
-        return cart
+        return "user", request.user.pk
+    return "session", request.session.session_key
 
-    session_key = request.session.session_key
 
-    if session_key:
-        cart = Cart.objects.filter(session_key=session_key).first()
-        logger.debug(f"Get cart (session): session_key={session_key}")
-        return cart
+def remember_cart(request: HttpRequest, cart: Cart | SessionCart | None) -> None:
+    request._cart_lookup = (get_cart_owner(request), cart)
 
-    logger.debug("No cart found")
 
-    return None
+def forget_cart(request: HttpRequest) -> None:
+    request.__dict__.pop("_cart_lookup", None)
+    request.__dict__.pop("_cart_summary", None)
 
 
-def get_or_create_cart(request: HttpRequest) -> Cart:
+def get_session_cart(request: HttpRequest) -> SessionCart | None:
     if request.user.is_authenticated:
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        logger.debug(
-            f"Cart get/create (user): user_id={request.user.id}, created={created}"
-        )
+        return None
+
+    token = request.session.get(CART_TOKEN_SESSION_KEY)
+    store = get_cart_store()
+    if not token or store is None:
+        return None
+
+    return SessionCart(token=token, store=store)
+
+
+def get_cart(request: HttpRequest) -> Cart | SessionCart | None:
+    """
+    Read-only lookup, never creates a session or a cart.
+
+    The result is kept on the request, so the view, the helpers and the
+    context processors share one query.
+    """
+    owner = get_cart_owner(request)
+    lookup = getattr(request, "_cart_lookup", None)
+    if lookup is not None and lookup[0] == owner:
+        return lookup[1]
+
+    kind, owner_id = owner
+
+    if kind == "user":
+        cart = Cart.objects.filter(user_id=owner_id).first()
+        logger.debug(f"Get cart (user): user_id={owner_id}, found={bool(cart)}")
+    elif owner_id:
+        cart = get_session_cart(request)
+        if cart is None:
+            cart = Cart.objects.filter(session_key=owner_id).first()
+        logger.debug(f"Get cart (session): session_key={owner_id}")
+    else:
+        cart = None
+        logger.debug("No cart found")
+
+    remember_cart(request, cart)
+
+    return cart
+
+
+def get_cart_summary(request: HttpRequest, refresh: bool = False) -> CartSummary:
+    """
+    Summary of the request's cart, built once per request.
+
+    Pass refresh=True after changing the cart within the request.
+    """
+    cart = get_cart(request)
+    cached = getattr(request, "_cart_summary", None)
+    if not refresh and cached is not None and cached[0] is cart:
+        return cached[1]
+
+    summary = build_cart_summary(cart)
+    request._cart_summary = (cart, summary)
+    return summary
+
+
+def get_or_create_db_cart(request: HttpRequest, user: CustomUser | None = None) -> Cart:
+    user = user or request.user
+
+    if user.is_authenticated:
+        cart, created = Cart.objects.get_or_create(user=user)
+        logger.debug(f"Cart get/create (user): user_id={user.id}, created={created}")
     else:
         session_key = request.session.session_key
 
@@ -40,9 +112,96 @@ def get_or_create_cart(request: HttpRequest) -> Cart:
             logger.debug(f"Session created: session_key={session_key}")
 
         cart, created = Cart.objects.get_or_create(session_key=session_key)
+        request.session[CART_ID_SESSION_KEY] = cart.pk
 
         logger.debug(
             f"Cart get/create (session): session_key={session_key}, created={created}"
         )
 
+    if user == getattr(request, "user", None):
+        remember_cart(request, cart)
+
+    return cart
+
+
+def get_or_create_cart(request: HttpRequest) -> Cart | SessionCart:
+    """For mutating actions only, read paths use get_cart()"""
+    cart = get_cart(request)
+    if cart is not None:
+        return cart
+
+    store = get_cart_store()
+    if store is None or request.user.is_authenticated:
+        return get_or_create_db_cart(request)
+
+    # Anonymous carts stay out of the database until checkout or login
+    request.session[CART_TOKEN_SESSION_KEY] = secrets.token_urlsafe(16)
+    if not request.session.session_key:
+        request.session.create()
+
+    cart = SessionCart(token=request.session[CART_TOKEN_SESSION_KEY], store=store)
+    logger.debug(f"Session cart created: cart_id={cart.id}")
+    remember_cart(request, cart)
+
     return cart
+
+
+def persist_session_cart(request: HttpRequest, user: CustomUser | None = None) -> None:
+    """
+    Moves the anonymous cart from the cart store into Cart/CartItem rows,
+    of the user when given or already logged in.
+    """
+    store = get_cart_store()
+    token = request.session.get(CART_TOKEN_SESSION_KEY) if store else None
+    if not token:
+        return
+
+    quantities = store.get_quantities(token)
+    del request.session[CART_TOKEN_SESSION_KEY]
+    forget_cart(request)
+
+    cart = None
+    if quantities:
+        cart = get_or_create_db_cart(request, user)
+        add_cart_quantities(cart, quantities)
+    store.clear(token)
+
+    logger.info(
+        f"Session cart persisted: cart_id={cart.id if cart else None}, "
+        f"items={len(quantities)}"
+    )
+
+
+def merge_session_cart(request: HttpRequest, user: CustomUser) -> None:
+    """Moves the anonymous database cart of the session into the user's cart"""
+    cart_id = request.session.pop(CART_ID_SESSION_KEY, None)
+    session_key = request.session.session_key
+    if not cart_id and not session_key:
+        return
+
+    lookup = Q(pk=cart_id) if cart_id else Q(session_key=session_key)
+    session_cart = Cart.objects.filter(lookup, user__isnull=True).first()
+    if session_cart is None:
+        return
+
+    forget_cart(request)
+    user_cart = Cart.objects.filter(user=user).first()
+
+    if user_cart is None:
+        # Nothing to merge with, the session cart becomes the user's cart
+        session_cart.user = user
+        session_cart.session_key = None
+        session_cart.save(update_fields=["user", "session_key"])
+        logger.info(
+            f"Session cart assigned: cart_id={session_cart.id}, user_id={user.id}"
+        )
+        return
+
+    merge_carts(session_cart, user_cart)
+
+
+@receiver(user_logged_in)
+def persist_cart_on_login(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, "session"):
+        persist_session_cart(request, user)
+        merge_session_cart(request, user)
@@ -1,31 +1,69 @@
 import logging
 from typing import Any
 
-from django.core.cache import cache
 from django.db.models import QuerySet
 
-from cosmetics_shop.models import Brand, Category
+from cosmetics_shop.models import Brand, Category, GroupProduct
+from cosmetics_shop.services.cache_service import MENU, namespace_version_key
+from utils.cache_utils import CacheSchema, TwoTierCache
 
 logger = logging.getLogger(__name__)
 
 
+def _dump_menu(context_values: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": item["category"].pk,
+            "name": item["category"].name,
+            "slug": item["category"].slug,
+            "groups": [
+                {"id": group.pk, "name": group.name, "slug": group.slug}
+                for group in item["groups"]
+            ],
+        }
+        for item in context_values
+    ]
+
+
+def _load_menu(data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    context_values = []
+    for item in data:
+        category = Category(id=item["id"], name=item["name"], slug=item["slug"])
+        groups = [
+            GroupProduct(
+                id=group["id"],
+                name=group["name"],
+                slug=group["slug"],
+                category=category,
+            )
+            for group in item["groups"]
+        ]
+        context_values.append({"category": category, "groups": groups})
+    return context_values
+
+
+MENU_SCHEMA = CacheSchema(dump=_dump_menu, load=_load_menu)
+
+menu_cache = TwoTierCache(namespace_version_key(MENU))
+
+
 def context_categories() -> list[dict[str, Any]]:
-    cache_key = "categories_with_groups"
+    return menu_cache.get_or_set(
+        "categories_with_groups",
+        _build_context_categories,
+        timeout=60 * 60 * 12,  # 12 hours
+        schema=MENU_SCHEMA,
+    )
 
-    data = cache.get(cache_key)
-    if data:
-        logger.debug("Categories fetched from cache")
-        return data
 
+def _build_context_categories() -> list[dict[str, Any]]:
     categories = Category.objects.all().prefetch_related("groupproduct_set")
 
     context_values: list[dict[str, Any]] = [
-        {"category": category, "groups": category.groupproduct_set.all()}
+        {"category": category, "groups": list(category.groupproduct_set.all())}
         for category in categories
     ]
 
-    cache.set(cache_key, context_values, timeout=60 * 60)  # 1 hour
-
     logger.debug("Categories cached")
 
     return context_values
@@ -4,7 +4,7 @@ from functools import wraps
 from django.contrib import messages
 from django.shortcuts import redirect
 
-from cosmetics_shop.utils.cart_utils import get_cart
+from cosmetics_shop.utils.cart_utils import get_cart, persist_session_cart
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +14,8 @@ def cart_required(view_func):
 
     @wraps(view_func)
     def wrapped_view(request, *args, **kwargs):
+        # Checkout works on database carts
+        persist_session_cart(request)
         cart = get_cart(request)
 
         if not cart or not cart.cart_items.exists():
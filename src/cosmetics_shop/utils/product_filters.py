@@ -1,11 +1,212 @@
 import logging
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+
+from cosmetics_shop.models import CatalogEntry, Product
+from cosmetics_shop.services.search_service import get_search_backend
+from utils.cache_utils import initial_cache_version
 
 logger = logging.getLogger(__name__)
 
+FACET_INDEX_KEY = "catalog:facet_index:v{version}"
+FACET_INDEX_VERSION_KEY = "catalog:facet_index:version"
+FACET_INDEX_TIMEOUT = 60 * 60 * 24  # 1 day
+
+PRICE_BUCKETS = (0, 100, 250, 500, 1000, 2500)
+
+# Position of every facet in a facet index row
+FACET_FIELDS = {"category": 0, "group": 1, "brand": 2, "tags": 3, "price": 4}
+
+_local_facet_index: dict = {"version": None, "index": None}
+
+
+def get_price_bucket(price: Decimal) -> int:
+    """Returns the lower bound of the price bucket the price falls into"""
+    return PRICE_BUCKETS[bisect_right(PRICE_BUCKETS, price) - 1]
+
+
+def _facet_row(category_id, group_id, brand_id, tag_ids, price) -> tuple:
+    return (category_id, group_id, brand_id, tuple(tag_ids), Decimal(price))
+
+
+def _load_facet_rows() -> dict[int, tuple]:
+    values = CatalogEntry.objects.filter(is_active=True).values_list(
+        "pk", "category_id", "group_id", "brand_id", "tag_ids", "price"
+    )
+    return {pk: _facet_row(*row) for pk, *row in values}
+
+
+def get_facet_rows(entries: Iterable[CatalogEntry]) -> dict[int, tuple]:
+    """Facet index rows of the given entries, inactive ones have none"""
+    return {
+        entry.pk: _facet_row(
+            entry.category_id,
+            entry.group_id,
+            entry.brand_id,
+            entry.tag_ids,
+            entry.price,
+        )
+        for entry in entries
+        if entry.is_active
+    }
+
+
+@dataclass
+class FacetResult:
+    ids: frozenset[int]
+    counts: dict[str, dict[int, int]] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+
+class FacetIndex:
+    """
+    In-memory posting lists of active catalog products per facet value.
+
+    Rows are stored in the cache as {product_id: (category_id, group_id,
+    brand_id, tag_ids, price)}; every process builds its own sets from them.
+    """
+
+    def __init__(self, rows: dict[int, tuple]):
+        self.rows = rows
+        self.all_ids = frozenset(rows)
+        self.postings: dict[str, dict[int, set[int]]] = {
+            facet: {} for facet in FACET_FIELDS
+        }
+
+        for pk, (category_id, group_id, brand_id, tag_ids, price) in rows.items():
+            self.postings["category"].setdefault(category_id, set()).add(pk)
+            self.postings["group"].setdefault(group_id, set()).add(pk)
+            self.postings["brand"].setdefault(brand_id, set()).add(pk)
+            for tag_id in tag_ids:
+                self.postings["tags"].setdefault(tag_id, set()).add(pk)
+            self.postings["price"].setdefault(get_price_bucket(price), set()).add(pk)
+
+        by_price = sorted((row[FACET_FIELDS["price"]], pk) for pk, row in rows.items())
+        self._price_keys = [price for price, _ in by_price]
+        self._price_ids = [pk for _, pk in by_price]
+
+    def ids_for(self, facet: str, values: Iterable[int]) -> set[int]:
+        postings = self.postings[facet]
+        result: set[int] = set()
+        for value in values:
+            result |= postings.get(value, set())
+        return result
+
+    def price_range(self, min_price=None, max_price=None) -> set[int]:
+        start = 0 if min_price is None else bisect_left(self._price_keys, min_price)
+        end = (
+            len(self._price_keys)
+            if max_price is None
+            else bisect_right(self._price_keys, max_price)
+        )
+        return set(self._price_ids[start:end])
+
+    def search(
+        self,
+        scope: dict[str, int] | None = None,
+        selected: dict[str, set[int]] | None = None,
+        min_price=None,
+        max_price=None,
+        restrict_ids: Iterable[int] | None = None,
+    ) -> FacetResult:
+        """
+        Returns matching product ids and the number of products per facet value.
+
+        Counts of a facet ignore the values selected in that facet itself,
+        so they show how many products a click on the value would add.
+        """
+        selected = {facet: ids for facet, ids in (selected or {}).items() if ids}
+
+        base = set(self.all_ids)
+        for facet, value in (scope or {}).items():
+            base &= self.postings[facet].get(value, set())
+        if min_price is not None or max_price is not None:
+            base &= self.price_range(min_price, max_price)
+        if restrict_ids is not None:
+            base &= set(restrict_ids)
+
+        matches = {facet: self.ids_for(facet, ids) for facet, ids in selected.items()}
+
+        counts: dict[str, dict[int, int]] = {}
+        for facet, position in FACET_FIELDS.items():
+            facet_base = base
+            for other, ids in matches.items():
+                if other != facet:
+                    facet_base = facet_base & ids
+
+            if facet == "tags":
+                counter = Counter(
+                    tag_id for pk in facet_base for tag_id in self.rows[pk][position]
+                )
+            elif facet == "price":
+                counter = Counter(
+                    get_price_bucket(self.rows[pk][position]) for pk in facet_base
+                )
+            else:
+                counter = Counter(self.rows[pk][position] for pk in facet_base)
+
+            for value in selected.get(facet, ()):
+                counter.setdefault(value, 0)
+            counts[facet] = dict(counter)
+
+        for ids in matches.values():
+            base &= ids
+
+        return FacetResult(ids=frozenset(base), counts=counts)
+
+
+def get_facet_index_version() -> int:
+    return cache.get_or_set(
+        FACET_INDEX_VERSION_KEY, initial_cache_version, timeout=None
+    )
+
+
+def get_facet_index() -> FacetIndex:
+    """
+    Rows are cached under the version read before loading them, so a build
+    racing with a change can only fill a key nobody reads anymore.
+    """
+    version = get_facet_index_version()
+    if _local_facet_index["version"] == version:
+        return _local_facet_index["index"]
+
+    key = FACET_INDEX_KEY.format(version=version)
+    rows = cache.get(key)
+    if rows is None:
+        logger.debug("Building facet index")
+        rows = _load_facet_rows()
+        cache.set(key, rows, timeout=FACET_INDEX_TIMEOUT)
+
+    index = FacetIndex(rows)
+    _local_facet_index.update(version=version, index=index)
+    return index
+
+
+def _bump_facet_index_version() -> None:
+    try:
+        cache.incr(FACET_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.add(FACET_INDEX_VERSION_KEY, initial_cache_version(), timeout=None)
+
+
+def invalidate_facet_index() -> None:
+    """Drops the index once the current transaction commits"""
+    transaction.on_commit(_bump_facet_index_version)
+
 
 class ProductFilter:
     def __init__(self, request, queryset):
         self.request = request
+        self.base_queryset = queryset
         self.queryset = queryset
         self.form_data = request.GET or None
         self._prepare_sort_context()
@@ -25,7 +226,10 @@ class ProductFilter:
             )
 
         if form.cleaned_data.get("tags"):
-            self.queryset = self.queryset.filter(tags__in=form.cleaned_data.get("tags"))
+            tagged = Product.tags.through.objects.filter(
+                tag__in=form.cleaned_data.get("tags")
+            ).values("product_id")
+            self.queryset = self.queryset.filter(pk__in=tagged)
 
         if form.cleaned_data.get("min_price") is not None:
             self.queryset = self.queryset.filter(
@@ -43,8 +247,20 @@ class ProductFilter:
             )
 
         if form.cleaned_data.get("name"):
-            name = form.cleaned_data.get("name").lower()
-            self.queryset = self.queryset.filter(name__icontains=name)
+            self.queryset = get_search_backend().search(
+                self.queryset, form.cleaned_data.get("name")
+            )
+
+    def get_search_ids(self, form):
+        """Returns ids of products matching the name filter, if it is set"""
+        name = form.cleaned_data.get("name")
+        if not name:
+            return None
+        return (
+            get_search_backend()
+            .search(self.base_queryset, name)
+            .values_list("pk", flat=True)
+        )
 
     def _get_param(self, key, default=None):
         """Getting parameters from GET request"""
@@ -115,13 +331,11 @@ class ProductFilter:
             extra={"sort_by": sort_by, "direction": direction},
         )
 
-        qs = self.queryset.annotate_availability()
-
         if not sort_by:
-            return qs.order_by("is_out_of_stock", "-id")
+            return self.queryset.order_by_availability("-pk")
 
         sort_field = f"-{sort_by}" if direction == "desc" else sort_by
-        return qs.order_by("is_out_of_stock", sort_field)
+        return self.queryset.order_by_availability(sort_field)
 
     def get_clear_sort_url(self):
         """Return URL without sorting parameters, keeping filters"""
@@ -1,20 +1,28 @@
+import hashlib
 import logging
+from typing import Any
+from urllib.parse import urlencode
 
+from django.core.cache import cache
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
 
 from cosmetics_shop.forms import ProductFilterForm
+from cosmetics_shop.services.cache_service import CATALOG, versioned_key
 from cosmetics_shop.services.cart_services import (
     get_id_products_in_cart,
 )
-from cosmetics_shop.utils.cart_utils import get_cart
+from cosmetics_shop.services.favorite_service import get_favorite_ids, mark_favorites
+from cosmetics_shop.utils.cart_utils import get_cart, get_cart_summary
 from cosmetics_shop.utils.context_utils import context_categories
-from cosmetics_shop.utils.product_filters import ProductFilter
-from utils.helper_function import get_paginator_page
+from cosmetics_shop.utils.product_filters import ProductFilter, get_facet_index
+from utils.pagination import TOTAL_APPROXIMATE, get_cursor_page
 
 logger = logging.getLogger(__name__)
 
+PRODUCT_LIST_CACHE_TIMEOUT = 60 * 60 * 6  # 6 hours
+
 
 def clean_query_params(request):
     query_params = request.GET.copy()
@@ -22,7 +30,8 @@ def clean_query_params(request):
     removed_keys = []
 
     for key, value in list(query_params.items()):
-        if value in ("", "None", None):
+        # Page numbers were replaced by cursors, old links fall back to page 1
+        if value in ("", "None", None) or key == "page":
             query_params.pop(key)
             removed_keys.append(key)
 
@@ -45,31 +54,44 @@ def build_context(request, products, title, extra_context=None, **kwargs):
 
     form = ProductFilterForm(
         request.GET or None,
-        products_qs=products,
         hide_group=hide_group,
         hide_brand=hide_brand,
     )
 
+    facet_filters: dict[str, Any] = {}
+
     if form.is_valid():
         product_filter.apply_filters(form)
         logger.debug("Filters applied", extra={"filters": form.cleaned_data})
+
+        facet_filters = {
+            "selected": form.get_facet_selection(),
+            "min_price": form.cleaned_data.get("min_price"),
+            "max_price": form.cleaned_data.get("max_price"),
+            "restrict_ids": product_filter.get_search_ids(form),
+        }
     else:
         logger.debug("Invalid filter form")
 
-    cart = get_cart(request)
-    if cart:
-        cart_products = get_id_products_in_cart(cart)
+    facets = get_facet_index().search(scope=kwargs.get("facet_scope"), **facet_filters)
+    form.apply_facets(facets)
+
+    # Shares the query with the cart counter of the context processor
+    if get_cart(request):
+        cart_products = get_cart_summary(request).product_ids
     else:
         cart_products = None
 
     products = product_filter.apply_sorting()
 
-    page = get_paginator_page(request, products)
+    page = get_cursor_page(request, products, total=TOTAL_APPROXIMATE)
+    if request.user.is_authenticated:
+        mark_favorites(page, request.user)
     categories = context_categories()
 
     logger.debug(
         "Pagination applied",
-        extra={"page": request.GET.get("page"), "count": page.count},
+        extra={"cursor": request.GET.get("cursor"), "count": page.total},
     )
 
     context = {
@@ -83,6 +105,7 @@ def build_context(request, products, title, extra_context=None, **kwargs):
         "hide_brands_field": hide_brand,
         "hide_group_field": hide_group,
         "cart_products": cart_products,
+        "facets": facets,
     }
 
     if extra_context:
@@ -91,28 +114,84 @@ def build_context(request, products, title, extra_context=None, **kwargs):
     return context
 
 
-def handle_ajax(request, context, clean_url):
-    logger.debug("Handling AJAX request")
-
-    html = render_to_string(
-        "cosmetics_shop/includes/product_list.html",
-        context,
-        request=request,
-    )
-    html_sorting = render_to_string(
-        "cosmetics_shop/includes/sorting_panel.html",
-        context,
-        request=request,
+def get_product_list_cache_key(request) -> str:
+    """Same filters, sorting and cursor give the same key in any param order"""
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+        if value not in ("", "None")
     )
+    signature = hashlib.md5(urlencode(params).encode()).hexdigest()
+    return versioned_key(f"catalog:product_list:{request.path}:{signature}", CATALOG)
+
+
+def render_product_list(request, context) -> dict[str, Any]:
+    """
+    Renders the AJAX fragments without anything user specific, the cart and
+    favorites are sent next to the HTML and applied by the browser.
+    """
+    page = context.get("products") or []
+    fragment_context = {**context, "cart_products": None, "user_overlay": True}
+
+    return {
+        "html": render_to_string(
+            "cosmetics_shop/includes/product_list.html",
+            fragment_context,
+            request=request,
+        ),
+        "sorting_html": render_to_string(
+            "cosmetics_shop/includes/sorting_panel.html",
+            fragment_context,
+            request=request,
+        ),
+        "product_ids": [product.pk for product in page],
+        "next_cursor": getattr(page, "next_cursor", None),
+        "previous_cursor": getattr(page, "previous_cursor", None),
+    }
+
+
+def get_user_overlay(request, product_ids) -> dict[str, list[int]]:
+    if not product_ids:
+        return {"cart_products": [], "favorite_ids": []}
+
+    cart = get_cart(request)
+    cart_products = set(get_id_products_in_cart(cart)) if cart else set()
+
+    favorite_ids = get_favorite_ids(request.user)
+
+    return {
+        "cart_products": [pk for pk in product_ids if pk in cart_products],
+        "favorite_ids": [pk for pk in product_ids if pk in favorite_ids],
+    }
+
+
+def product_list_response(request, fragment, clean_url):
     return JsonResponse(
         {
-            "html": html,
+            "html": fragment["html"],
             "url": clean_url,
-            "sorting_html": html_sorting,
+            "sorting_html": fragment["sorting_html"],
+            "next_cursor": fragment["next_cursor"],
+            "previous_cursor": fragment["previous_cursor"],
+            **get_user_overlay(request, fragment["product_ids"]),
         }
     )
 
 
+def handle_ajax(request, context, clean_url):
+    logger.debug("Handling AJAX request")
+
+    fragment = render_product_list(request, context)
+    cache.set(
+        get_product_list_cache_key(request),
+        fragment,
+        timeout=PRODUCT_LIST_CACHE_TIMEOUT,
+    )
+
+    return product_list_response(request, fragment, clean_url)
+
+
 def processing_product_page(
     request,
     products,
@@ -121,6 +200,7 @@ def processing_product_page(
     hide_group_field=None,
     hide_brands_field=None,
     extra_context=None,
+    facet_scope=None,
 ):
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
 
@@ -131,6 +211,12 @@ def processing_product_page(
 
     query_params, clean_url = clean_query_params(request)
 
+    if is_ajax:
+        fragment = cache.get(get_product_list_cache_key(request))
+        if fragment is not None:
+            logger.debug("Product list fragment served from cache")
+            return product_list_response(request, fragment, clean_url)
+
     context = build_context(
         request,
         products,
@@ -138,6 +224,7 @@ def processing_product_page(
         extra_context,
         hide_group_field=hide_group_field,
         hide_brands_field=hide_brands_field,
+        facet_scope=facet_scope,
     )
 
     if clean_url != request.get_full_path() and not is_ajax:
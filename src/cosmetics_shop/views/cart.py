@@ -1,7 +1,6 @@
 import logging
 
 from django.contrib import messages
-from django.db.models import QuerySet
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
 from django.views.decorators.http import require_POST
@@ -10,7 +9,9 @@ from cosmetics_shop.models import CartItem
 from cosmetics_shop.services.cart_services import (
     delete_cart,
     delete_product_from_cart,
+    get_cart_items,
     get_cart_total_price,
+    set_available_stock,
 )
 from cosmetics_shop.utils.cart_utils import get_cart
 
@@ -21,14 +22,13 @@ def cart(request: HttpRequest) -> HttpResponse:
     logger.debug(f"Cart view accessed: user_id={getattr(request.user, 'id', None)}")
 
     cart_object = get_cart(request)
-    cart_items: QuerySet[CartItem] = CartItem.objects.select_related("product").filter(
-        cart=cart_object
-    )
+    cart_items: list[CartItem] = list(get_cart_items(cart_object))
+    set_available_stock(cart_items)
     total_price = get_cart_total_price(cart_items)
 
     logger.debug(
         f"Cart loaded: cart_id={cart_object.id if cart_object else None}"
-        f", items={cart_items.count()}"
+        f", items={len(cart_items)}"
     )
 
     return render(
@@ -6,7 +6,7 @@ from django.shortcuts import get_object_or_404, render
 
 from cosmetics_shop.models import Brand, Category, GroupProduct, Product, Tag
 from cosmetics_shop.services.cart_services import is_product_in_cart
-from cosmetics_shop.utils.cart_utils import get_or_create_cart
+from cosmetics_shop.utils.cart_utils import get_cart
 from cosmetics_shop.utils.context_utils import get_grouped_for_alphabet_brands
 from cosmetics_shop.utils.product_utils import get_ready_product_list
 from cosmetics_shop.utils.view_helpers import processing_product_page
@@ -28,13 +28,14 @@ def main_page(request: HttpRequest) -> HttpResponse:
 
 def category_page(request: HttpRequest, category_slug: str) -> HttpResponse:
     title: Category = get_object_or_404(Category, slug=category_slug)
-    products = get_ready_product_list(request).filter(group__category=title)
+    products = get_ready_product_list(request).filter(category=title)
 
     return processing_product_page(
         request=request,
         products=products,
         title=title,
         template_name="cosmetics_shop/main_page.html",
+        facet_scope={"category": title.pk},
     )
 
 
@@ -50,14 +51,15 @@ def group_page(
         products=products,
         template_name="cosmetics_shop/main_page.html",
         hide_group_field=True,
+        facet_scope={"group": title.pk},
     )
 
 
 def product_page(request: HttpRequest, product_code: int) -> HttpResponse:
     product: Product = get_object_or_404(Product, code=product_code)
     tags: QuerySet[Tag] = product.tags.all()
-    cart = get_or_create_cart(request)
-    is_it_in_cart = is_product_in_cart(cart, product.pk)
+    # Viewing a product must not create a session or a cart
+    is_it_in_cart = is_product_in_cart(get_cart(request), product.pk)
     return render(
         request,
         "cosmetics_shop/product_page.html",
@@ -97,4 +99,5 @@ def brand_products(request: HttpRequest, brand_slug: str) -> HttpResponse:
         title=title,
         template_name="cosmetics_shop/main_page.html",
         hide_brands_field=True,
+        facet_scope={"brand": title.pk},
     )
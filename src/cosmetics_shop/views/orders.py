@@ -14,18 +14,30 @@ from cosmetics_shop.payments.mono import (
     init_payment,
 )
 from cosmetics_shop.services.cart_services import clear_cart_after_order
+from cosmetics_shop.services.idempotency_service import (
+    IdempotentResponse,
+    get_idempotency_scope,
+    request_fingerprint,
+    run_idempotent,
+)
 from cosmetics_shop.services.order_service import (
     create_order_from_cart,
     update_order_from_cart,
 )
-from cosmetics_shop.utils.cart_utils import get_cart
+from cosmetics_shop.services.reservation_service import commit_reservations
+from cosmetics_shop.utils.cart_utils import get_cart, get_cart_summary
 from cosmetics_shop.utils.client_utils import get_client, process_delivery_data
 from cosmetics_shop.utils.decorators import cart_required, order_session_required
-from utils.custom_exceptions import OutOfStockError
+from utils.custom_exceptions import IdempotencyInProgress, OutOfStockError
 from utils.custom_types import AuthenticatedRequest
 
 logger = logging.getLogger(__name__)
 
+# A duplicate checkout waits this many seconds for the first one to finish,
+# its redirect is replayed for double submits only, not for the next order
+CHECKOUT_REPLAY_WAIT = 5
+CHECKOUT_REPLAY_TTL = 60  # 1 minute
+
 
 @cart_required
 def delivery(request: HttpRequest) -> HttpResponse:
@@ -77,39 +89,65 @@ def create_order(request: AuthenticatedRequest) -> HttpResponse:
 
         client_data = request.session.get("client_data", {})
         address_data = request.session.get("address_data", {})
-
-        order_id = request.session.get("order_id")
-
-        existing_order = None
-        if order_id:
-            existing_order = Order.objects.filter(
-                id=order_id, status__in=[Status.NEW, Status.PAYMENT_FAILED]
-            ).first()
-
-        if existing_order:
-            order = update_order_from_cart(
-                existing_order, cart, client_data, address_data
-            )
-        else:
-            order = create_order_from_cart(cart, client_data, address_data)
-            request.session["order_id"] = order.id
-
         payment_method = request.session.get("payment_method", "card")
 
-        if payment_method == "card":
-            return redirect("pay_order", order_id=order.id)
-        else:
-            Payment.objects.create(
-                order=order,
-                method=Payment.PaymentMethod.CASH,
-                amount=order.total_price,
-                status=Payment.PaymentStatus.SUCCESS,
-            )
-            return redirect("order_result")
+        # A double submit of the same checkout replays the first redirect
+        lines = get_cart_summary(request).lines
+        fingerprint = request_fingerprint(
+            [(line.product.code, line.quantity) for line in lines],
+            client_data,
+            address_data,
+            payment_method,
+        )
+
+        def place_order():
+            order_id = request.session.get("order_id")
+
+            existing_order = None
+            if order_id:
+                existing_order = Order.objects.filter(
+                    id=order_id, status__in=[Status.NEW, Status.PAYMENT_FAILED]
+                ).first()
+
+            if existing_order:
+                order = update_order_from_cart(
+                    existing_order, cart, client_data, address_data
+                )
+            else:
+                order = create_order_from_cart(cart, client_data, address_data)
+                request.session["order_id"] = order.id
+
+            if payment_method == "card":
+                response = redirect("pay_order", order_id=order.id)
+            else:
+                Payment.objects.create(
+                    order=order,
+                    method=Payment.PaymentMethod.CASH,
+                    amount=order.total_price,
+                    status=Payment.PaymentStatus.SUCCESS,
+                )
+                # Cash orders are confirmed now, the hold becomes a sale
+                commit_reservations(order)
+                response = redirect("order_result")
+
+            return IdempotentResponse(response.status_code, response.url)
+
+        stored, _ = run_idempotent(
+            scope=get_idempotency_scope(request),
+            key=f"checkout:{fingerprint}",
+            fingerprint=fingerprint,
+            func=place_order,
+            wait=CHECKOUT_REPLAY_WAIT,
+            ttl=CHECKOUT_REPLAY_TTL,
+        )
+        return redirect(stored.data)
 
     except OutOfStockError as e:
         messages.warning(request, str(e))
         return redirect("cart")
+    except IdempotencyInProgress:
+        messages.info(request, "Заказ уже оформляется, подождите немного")
+        return redirect("cart")
     except Exception as e:
         logger.error(f"Order processing error: {e}")
         messages.error(request, "Ошибка при оформлении заказа")
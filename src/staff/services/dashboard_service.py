@@ -1,11 +1,13 @@
 import logging
+from decimal import Decimal
+from typing import Any
 
 from dateutil.relativedelta import relativedelta
-from django.core.cache import cache
 from django.db.models import Avg, Count, Sum
 from django.utils import timezone
 
-from cosmetics_shop.models import Order, Product, Status
+from cosmetics_shop.models import GroupProduct, Order, Product, Status
+from utils.cache_utils import CacheSchema, cache_get, cache_set
 from utils.date_utils import get_first_order_year
 
 logger = logging.getLogger(__name__)
@@ -60,6 +62,36 @@ def get_month_stats(current_date):
     }
 
 
+def _dump_dashboard(context: dict[str, Any]) -> dict[str, Any]:
+    return {
+        **context,
+        "max_favorite": [
+            [product.pk, product.name, product.group_id, product.group.name]
+            for product in context["max_favorite"]
+        ],
+        "years": [context["years"].start, context["years"].stop],
+    }
+
+
+def _load_dashboard(data: dict[str, Any]) -> dict[str, Any]:
+    return {
+        **data,
+        "average_bill": Decimal(data["average_bill"]),
+        "max_favorite": [
+            Product(
+                id=pk,
+                name=name,
+                group=GroupProduct(id=group_id, name=group_name),
+            )
+            for pk, name, group_id, group_name in data["max_favorite"]
+        ],
+        "years": range(*data["years"]),
+    }
+
+
+DASHBOARD_SCHEMA = CacheSchema(dump=_dump_dashboard, load=_load_dashboard)
+
+
 def get_dashboard_context():
     logger.debug("Building dashboard context")
 
@@ -67,7 +99,7 @@ def get_dashboard_context():
 
     cache_key = f"dashboard:{today.date().isoformat()}"
 
-    data = cache.get(cache_key)
+    data = cache_get(cache_key, DASHBOARD_SCHEMA)
     if data:
         logger.debug("Dashboard from cache")
         return data
@@ -75,8 +107,9 @@ def get_dashboard_context():
     today_stats = get_today_stats()
     month_stats = get_month_stats(today)
 
-    max_favorite = (
+    max_favorite = list(
         Product.objects.annotate(fav_count=Count("favorites"))
+        .select_related("group")
         .filter(fav_count__gt=0)
         .order_by("-fav_count", "id")[:3]
     )
@@ -99,6 +132,6 @@ def get_dashboard_context():
         "current_year": current_year,
     }
 
-    cache.set(cache_key, context, timeout=60 * 5)  # 5 minute
+    cache_set(cache_key, context, DASHBOARD_SCHEMA, timeout=60 * 5)  # 5 minute
 
     return context
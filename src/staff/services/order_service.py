@@ -44,11 +44,7 @@ def filter_orders_status(queryset: QuerySet, filters: dict) -> QuerySet:
             datetime.combine(date_to, time.max)
         )
 
-    qs = queryset.filter(**orm_filters).order_by("status")
-
-    logger.info(f"Orders filtered: count={qs.count()}")
-
-    return qs
+    return queryset.filter(**orm_filters).order_by("status")
 
 
 def change_order_status_log(order: Order, user, status: int, comment: str) -> bool:
@@ -2,10 +2,12 @@ import logging
 from typing import Any
 
 from django.contrib.auth.models import Permission
-from django.core.cache import cache
+from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 from django.db.models import Q, QuerySet
 
+from utils.cache_utils import CacheSchema, TwoTierCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,16 +42,50 @@ def get_individually_assigned_permits() -> QuerySet[Permission]:
     return permissions
 
 
+def _dump_permissions(permissions_by_app: dict[str, Any]) -> dict[str, Any]:
+    return {
+        app_label: [
+            [perm.pk, perm.name, perm.codename, perm.content_type_id]
+            for perm in permissions
+        ]
+        for app_label, permissions in permissions_by_app.items()
+    }
+
+
+def _load_permissions(data: dict[str, Any]) -> dict[str, Any]:
+    return {
+        app_label: [
+            Permission(
+                id=pk,
+                name=name,
+                codename=codename,
+                # Served from the ContentType manager's in-process cache
+                content_type=ContentType.objects.get_for_id(content_type_id),
+            )
+            for pk, name, codename, content_type_id in permissions
+        ]
+        for app_label, permissions in data.items()
+    }
+
+
+PERMISSIONS_SCHEMA = CacheSchema(dump=_dump_permissions, load=_load_permissions)
+
+permissions_cache = TwoTierCache("permissions:version")
+
+
 def get_permissions_by_app() -> dict[str, Any]:
     logger.debug("Grouping permissions by app")
 
-    cache_key = "permissions_by_app"
+    return permissions_cache.get_or_set(
+        "permissions_by_app",
+        _group_permissions_by_app,
+        timeout=60 * 60,  # 1 hour
+        schema=PERMISSIONS_SCHEMA,
+    )
 
-    data = cache.get(cache_key)
-    if data:
-        return data
 
-    permissions = get_individually_assigned_permits()
+def _group_permissions_by_app() -> dict[str, Any]:
+    permissions = get_individually_assigned_permits().select_related("content_type")
 
     permissions_by_app: dict[str, Any] = {}
     for perm in permissions:
@@ -60,8 +96,6 @@ def get_permissions_by_app() -> dict[str, Any]:
 
     logger.info(f"Permissions grouped: apps={len(permissions_by_app)}")
 
-    cache.set(cache_key, permissions_by_app, timeout=60 * 60)  # 1 hour
-
     return permissions_by_app
 
 
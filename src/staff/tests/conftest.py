@@ -5,6 +5,7 @@ from cosmetics_shop.tests.conftest import (  # noqa
     brand,
     category,
     category2,
+    clear_cache,
     client_obj,
     group,
     group2,
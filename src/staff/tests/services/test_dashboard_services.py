@@ -113,3 +113,15 @@ def test_get_dashboard_context_max_favorite(user, client_obj, products):
     assert len(result_products) == 3
     for p in expected_products:
         assert p in result_products
+
+
+@pytest.mark.django_db
+def test_get_dashboard_context_from_cache(user, products):
+    Favorite.objects.create(user=user, product=products[0])
+
+    context = get_dashboard_context()
+    cached = get_dashboard_context()
+
+    assert cached == {**context, "max_favorite": cached["max_favorite"]}
+    assert cached["max_favorite"] == context["max_favorite"]
+    assert str(cached["max_favorite"][0]) == str(products[0])
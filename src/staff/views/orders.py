@@ -17,7 +17,7 @@ from staff.services.order_service import (
     get_latest_order_statuses,
 )
 from utils.custom_types import AuthenticatedRequest
-from utils.helper_function import get_paginator_page
+from utils.pagination import TOTAL_APPROXIMATE, get_cursor_page
 
 logger = logging.getLogger(__name__)
 
@@ -33,11 +33,9 @@ def orders(request: HttpRequest) -> HttpResponse:
         logger.debug(f"Orders filter applied: {form.cleaned_data}")
         latest_statuses = filter_orders_status(latest_statuses, form.cleaned_data)
 
-    page = get_paginator_page(request, latest_statuses)
+    page = get_cursor_page(request, latest_statuses, total=TOTAL_APPROXIMATE)
 
-    logger.info(
-        f"Orders page loaded: user_id={request.user.id}, count={page.paginator.count}"
-    )
+    logger.info(f"Orders page loaded: user_id={request.user.id}, count={page.total}")
 
     return render(
         request,
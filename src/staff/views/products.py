@@ -11,8 +11,9 @@ from cosmetics_shop.models import (
     Product,
     Tag,
 )
+from cosmetics_shop.services.image_service import schedule_image_processing
 from staff.forms import ProductFilterForm, ProductForm
-from utils.helper_function import get_paginator_page
+from utils.pagination import TOTAL_APPROXIMATE, get_cursor_page
 
 logger = logging.getLogger(__name__)
 
@@ -31,11 +32,9 @@ def products(request: HttpRequest) -> HttpResponse:
         logger.debug(f"Product filters applied: {form.cleaned_data}")
         products_list = form.apply_filters(products_list)
 
-    page = get_paginator_page(request, products_list)
+    page = get_cursor_page(request, products_list, total=TOTAL_APPROXIMATE)
 
-    logger.info(
-        f"Products page loaded: user_id={request.user.id}, count={page.paginator.count}"
-    )
+    logger.info(f"Products page loaded: user_id={request.user.id}, count={page.total}")
 
     return render(
         request,
@@ -56,11 +55,9 @@ def archive_products(request: HttpRequest) -> HttpResponse:
         Product.objects.all().order_by("-id").filter(is_active=False).for_catalog()
     )
 
-    page = get_paginator_page(request, products_list)
+    page = get_cursor_page(request, products_list, total=TOTAL_APPROXIMATE)
 
-    logger.info(
-        f"Products page loaded: user_id={request.user.id}, count={page.paginator.count}"
-    )
+    logger.info(f"Products page loaded: user_id={request.user.id}, count={page.total}")
 
     return render(
         request,
@@ -100,6 +97,8 @@ def create_products(request: HttpRequest) -> HttpResponse:
         form = ProductForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
             product = form.save()
+            if "image" in form.changed_data:
+                schedule_image_processing(product)
             logger.info(
                 f"Product created: product_id={product.id}, user_id={request.user.id}"
             )
@@ -139,6 +138,8 @@ def edit_products(request: HttpRequest, product_code: int) -> HttpResponse:
 
         if form.is_valid():
             form.save()
+            if "image" in form.changed_data:
+                schedule_image_processing(product)
             logger.info(
                 f"Product updated: product_id={product.id}, user_id={request.user.id}"
             )
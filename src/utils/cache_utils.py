@@ -0,0 +1,167 @@
+import json
+import logging
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+CODEC_JSON = b"j"
+CODEC_ZLIB = b"z"
+COMPRESS_THRESHOLD = 1024  # bytes
+
+_instances: "weakref.WeakSet[TwoTierCache]" = weakref.WeakSet()
+
+
+@dataclass(frozen=True)
+class CacheSchema:
+    """Converts a cached structure to JSON-compatible data and back"""
+
+    dump: Callable[[Any], Any]
+    load: Callable[[Any], Any]
+
+
+def encode_cache_value(data: Any) -> bytes:
+    raw = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+    if len(raw) >= COMPRESS_THRESHOLD:
+        return CODEC_ZLIB + zlib.compress(raw)
+    return CODEC_JSON + raw
+
+
+def decode_cache_value(value: bytes) -> Any:
+    codec, payload = value[:1], value[1:]
+    if codec == CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    elif codec != CODEC_JSON:
+        raise ValueError(f"Unknown cache codec: {codec!r}")
+    return json.loads(payload)
+
+
+def cache_get(key: str, schema: CacheSchema | None = None) -> Any:
+    value = cache.get(key)
+    if value is None or schema is None:
+        return value
+
+    try:
+        return schema.load(decode_cache_value(value))
+    except (ValueError, TypeError, KeyError, zlib.error):
+        # Written by an older deploy in another format
+        logger.warning(f"Unreadable cache value dropped: key={key}")
+        return None
+
+
+def cache_set(
+    key: str, value: Any, schema: CacheSchema | None = None, timeout: int | None = None
+) -> None:
+    if schema is not None:
+        value = encode_cache_value(schema.dump(value))
+    cache.set(key, value, timeout=timeout)
+
+
+def initial_cache_version() -> int:
+    # Seeded from the clock so an evicted counter never reuses old versions
+    return time.time_ns() // 1_000_000
+
+
+class TwoTierCache:
+    """
+    Bounded per-process LRU in front of the Django cache for small hot keys.
+
+    Shared entries are stored under "<key>:v<version>" where the version is
+    read from version_key. Each process polls that key at most once every
+    check_interval seconds and drops its local entries when it changed, so
+    incrementing it invalidates the data in every worker at once.
+    """
+
+    def __init__(
+        self,
+        version_key: str,
+        maxsize: int = 128,
+        local_timeout: float = 60,
+        check_interval: float = 1,
+    ):
+        self.version_key = version_key
+        self.maxsize = maxsize
+        self.local_timeout = local_timeout
+        self.check_interval = check_interval
+
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._checked_at = float("-inf")
+
+        _instances.add(self)
+
+    def _get_version(self) -> int:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return self._version
+
+        version = cache.get_or_set(
+            self.version_key, initial_cache_version, timeout=None
+        )
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._checked_at = now
+
+        return version
+
+    def get_or_set(
+        self,
+        key: str,
+        default: Callable[[], Any],
+        timeout: int | None = None,
+        schema: CacheSchema | None = None,
+    ) -> Any:
+        version = self._get_version()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        shared_key = f"{key}:v{version}"
+        value = cache_get(shared_key, schema)
+        if value is None:
+            logger.debug(f"Two-tier cache miss: key={key}")
+            value = default()
+            cache_set(shared_key, value, schema, timeout=timeout)
+
+        with self._lock:
+            self._entries[key] = (now + self.local_timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def invalidate(self) -> None:
+        """Drops the data in every process"""
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, initial_cache_version(), timeout=None)
+        clear_local_caches(self.version_key)
+
+
+def clear_local_caches(version_key: str | None = None) -> None:
+    """Clears the local tier of this process, other workers follow the version"""
+    for instance in list(_instances):
+        if version_key is None or instance.version_key == version_key:
+            instance.clear_local()
@@ -1,4 +1,34 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class StockShortage:
+    code: int
+    name: str
+    requested: int
+    available: int
+
+
 class OutOfStockError(Exception):
     """An exception for the situation when the product is out of stock."""
 
-    pass
+    def __init__(self, message="", shortages: list[StockShortage] | None = None):
+        super().__init__(message)
+        self.shortages = shortages or []
+
+    @classmethod
+    def for_shortages(cls, shortages: list[StockShortage]) -> "OutOfStockError":
+        names = ", ".join(shortage.name or str(shortage.code) for shortage in shortages)
+        return cls(f"Товара {names} недостаточно", shortages)
+
+
+class IdempotencyError(Exception):
+    """A repeated request cannot be answered from its idempotency key."""
+
+
+class IdempotencyKeyMismatch(IdempotencyError):
+    """The key was already used for a request with different data."""
+
+
+class IdempotencyInProgress(IdempotencyError):
+    """The first request with this key has not finished yet."""
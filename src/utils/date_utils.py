@@ -1,9 +1,9 @@
 from datetime import datetime
 
-from django.core.cache import cache
 from django.utils import timezone
 
 from cosmetics_shop.models import Order
+from utils.cache_utils import TwoTierCache
 
 
 def to_date(value):
@@ -12,17 +12,15 @@ def to_date(value):
     return value
 
 
-def get_first_order_year():
-    cache_key = "stats:first_order_year"
-    first_year = cache.get(cache_key)
+stats_cache = TwoTierCache("stats:version")
+
 
-    if first_year is None:
-        first_order = Order.objects.order_by("created_at").first()
-        if first_order:
-            first_year = first_order.created_at.year
-        else:
-            first_year = timezone.now().year
+def get_first_order_year():
+    return stats_cache.get_or_set("stats:first_order_year", _load_first_order_year)
 
-        cache.set(cache_key, first_year, timeout=None)
 
-    return first_year
+def _load_first_order_year():
+    first_order = Order.objects.order_by("created_at").first()
+    if first_order:
+        return first_order.created_at.year
+    return timezone.now().year
@@ -0,0 +1,268 @@
+import base64
+import binascii
+import datetime
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.core.exceptions import FieldDoesNotExist, FieldError, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Field, Model, Q, QuerySet
+from django.http import HttpRequest
+
+from config.settings.base import PRODUCTS_PER_PAGE
+
+logger = logging.getLogger(__name__)
+
+CURSOR_PARAM = "cursor"
+CURSOR_NEXT = "n"
+CURSOR_PREVIOUS = "p"
+
+TOTAL_EXACT = "exact"
+TOTAL_APPROXIMATE = "approximate"
+APPROXIMATE_TOTAL_LIMIT = 1000
+
+
+# Tag of values kept as {TAG: type, "v": isoformat}
+CURSOR_TYPE_TAG = "$t"
+CURSOR_TYPES = {
+    "datetime": datetime.datetime,
+    "time": datetime.time,
+}
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder cuts datetimes and times to milliseconds, the keyset
+    filter would then skip rows sharing a millisecond with the cursor row.
+    """
+
+    def default(self, o):
+        for name, value_type in CURSOR_TYPES.items():
+            if isinstance(o, value_type):
+                return {CURSOR_TYPE_TAG: name, "v": o.isoformat()}
+        return super().default(o)
+
+
+def _decode_cursor_value(obj: dict):
+    if CURSOR_TYPE_TAG not in obj:
+        return obj
+    return CURSOR_TYPES[obj[CURSOR_TYPE_TAG]].fromisoformat(obj["v"])
+
+
+def encode_cursor(values: list, direction: str) -> str:
+    payload = json.dumps(
+        {"v": values, "d": direction}, cls=CursorEncoder, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[list, str] | None:
+    try:
+        payload = json.loads(
+            base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)),
+            object_hook=_decode_cursor_value,
+        )
+        values, direction = payload["v"], payload["d"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+
+    if not isinstance(values, list) or direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+        return None
+
+    return values, direction
+
+
+@dataclass
+class CursorPage:
+    object_list: list = field(default_factory=list)
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+    total: int | None = None
+    total_is_approximate: bool = False
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over the ordering of a queryset.
+
+    Pages are fetched with a WHERE on the sort tuple of the last (or first)
+    row instead of OFFSET, so every page costs the same. The ordering must
+    consist of field or annotation names; the primary key is appended as a
+    tiebreaker when missing. No COUNT(*) is run unless a total is requested.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int = PRODUCTS_PER_PAGE,
+        total: str | None = None,
+    ):
+        self.ordering = self._get_ordering(queryset)
+        self.queryset = queryset.order_by(*self.ordering)
+        self.per_page = per_page
+        self.total_mode = total
+
+    @staticmethod
+    def _get_ordering(queryset: QuerySet) -> list[str]:
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+
+        for name in ordering:
+            if not isinstance(name, str) or name == "?":
+                raise ValueError(f"Cursor pagination needs field ordering: {name!r}")
+
+        pk_names = {"pk", queryset.model._meta.pk.name}
+        if not any(name.lstrip("-") in pk_names for name in ordering):
+            ordering.append("-pk")
+
+        return ordering
+
+    def _row_values(self, obj: Model) -> list[Any]:
+        values = []
+        for name in self.ordering:
+            value = obj
+            for attr in name.lstrip("-").split("__"):
+                value = getattr(value, attr)
+            values.append(value)
+        return values
+
+    def _get_field(self, name: str) -> Field | None:
+        query = self.queryset.query
+        if name in query.annotations:
+            try:
+                return query.annotations[name].output_field
+            except FieldError:
+                return None
+
+        opts = self.queryset.model._meta
+        *path, last = name.split("__")
+        try:
+            for part in path:
+                opts = opts.get_field(part).related_model._meta
+            return opts.pk if last == "pk" else opts.get_field(last)
+        except (FieldDoesNotExist, AttributeError):
+            return None
+
+    def _clean_cursor_values(self, values: list) -> list | None:
+        """Cursor values converted to the ordering field types, None if invalid."""
+        if len(values) != len(self.ordering):
+            return None
+
+        cleaned = []
+        for name, value in zip(self.ordering, values):
+            model_field = self._get_field(name.lstrip("-"))
+            try:
+                cleaned.append(model_field.to_python(value) if model_field else value)
+            except (ValidationError, TypeError, ValueError):
+                return None
+
+        if None in cleaned:
+            return None
+        return cleaned
+
+    def _keyset_filter(self, values: list, reverse: bool) -> Q:
+        """(a, b, c) after (x, y, z) as a > x OR a = x AND b > y OR ..."""
+        condition = Q()
+        equal = Q()
+
+        for name, value in zip(self.ordering, values):
+            field_name = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") != reverse else "gt"
+            condition |= equal & Q(**{f"{field_name}__{lookup}": value})
+            equal &= Q(**{field_name: value})
+
+        return condition
+
+    def _get_total(self) -> tuple[int | None, bool]:
+        if self.total_mode == TOTAL_EXACT:
+            return self.queryset.count(), False
+
+        if self.total_mode == TOTAL_APPROXIMATE:
+            total = self.queryset.order_by()[: APPROXIMATE_TOTAL_LIMIT + 1].count()
+            if total > APPROXIMATE_TOTAL_LIMIT:
+                return APPROXIMATE_TOTAL_LIMIT, True
+            return total, False
+
+        return None, False
+
+    def get_page(self, token: str | None = None) -> CursorPage:
+        cursor = decode_cursor(token) if token else None
+
+        if cursor:
+            values = self._clean_cursor_values(cursor[0])
+            if values is None:
+                logger.debug(f"Cursor does not match ordering: {self.ordering}")
+                cursor = None
+            else:
+                cursor = values, cursor[1]
+
+        queryset = self.queryset
+        reverse = cursor is not None and cursor[1] == CURSOR_PREVIOUS
+
+        if cursor:
+            queryset = queryset.filter(self._keyset_filter(cursor[0], reverse))
+        if reverse:
+            queryset = queryset.reverse()
+
+        items = list(queryset[: self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[: self.per_page]
+
+        if reverse:
+            items.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = cursor is not None, has_more
+
+        total, total_is_approximate = self._get_total()
+
+        if not items:
+            return CursorPage(total=total, total_is_approximate=total_is_approximate)
+
+        return CursorPage(
+            object_list=items,
+            next_cursor=(
+                encode_cursor(self._row_values(items[-1]), CURSOR_NEXT)
+                if has_next
+                else None
+            ),
+            previous_cursor=(
+                encode_cursor(self._row_values(items[0]), CURSOR_PREVIOUS)
+                if has_previous
+                else None
+            ),
+            total=total,
+            total_is_approximate=total_is_approximate,
+        )
+
+
+def get_cursor_page(
+    request: HttpRequest,
+    queryset: QuerySet,
+    per_page: int = PRODUCTS_PER_PAGE,
+    total: str | None = None,
+) -> CursorPage:
+    paginator = CursorPaginator(queryset, per_page, total=total)
+    return paginator.get_page(request.GET.get(CURSOR_PARAM))